@@ -1 +1,24 @@
 from .adl_api import *
+from .adl_callstats import CallProfiler, CallStats, CallSummary
+from .adl_topology import AdapterTopology
+from .adl_snapshot import snapshot, Snapshot, SNAPSHOT_COLUMNS, SNAPSHOT_MISSING
+from .adl_sampler import Sampler, Sweep, LOCK_GLOBAL, LOCK_ADAPTER, LOCK_NONE
+from .adl_exporter import MetricsExporter, parse_address
+from .adl_format import make_writer, status_values, STATUS_FIELDS, FORMATS
+from .adl_history import History, HISTORY_METRICS, WindowStats
+from .adl_transaction import Transaction, ADLTransactionError, apply_desired_state, StateCache, StateChange
+from .adl_profile import Profile, ProfileError, load_profile, parse_profile, apply_profile
+from .adl_fancontrol import FanCurve, FanController
+from .adl_scheduler import Scheduler, MetricSource
+from .adl_caps import (probe, CapabilityCache, capability_names, CAP_NAMES, CAP_ALL,
+                       CAP_CURRENT_ACTIVITY, CAP_TEMPERATURE, CAP_FAN_SPEED_INFO, CAP_FAN_SPEED_PERCENT,
+                       CAP_FAN_SPEED_RPM, CAP_FAN_SPEED_SET, CAP_OD_PARAMETERS, CAP_DISCRETE_LEVELS,
+                       CAP_PERFORMANCE_LEVELS, CAP_POWER_CONTROL, CAP_ADAPTER_SPEED, CAP_MEMORY_INFO,
+                       CAP_DISPLAY_CAPABILITIES)
+from .adl_snapshot import set_capabilities
+from .adl_adapter import Adapter, get_adapters, Activity, FanSpeed, PerformanceLevel, ValueRange, FanSpeedRange
+from .adl_edid import EDID, EDIDCache, DetailedTiming, ExtensionBlock, default_edid_cache
+from .adl_modes import Mode, ModeCatalog, display_map_signature
+from .adl_memory import ADLBuffer, Arena, outstanding_allocations, outstanding_bytes
+from .adl_displaymap import DisplayMap, DisplayLayout, DisplayMapPlanner
+from .adl_sls import SLSGrid, SLSLayout, SLSMapConfig, SLSEngine
@@ -0,0 +1,246 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from collections import namedtuple
+from ctypes import c_int
+
+from .adl_defines import (ADL_DL_FANCTRL_SPEED_TYPE_PERCENT, ADL_DL_FANCTRL_SPEED_TYPE_RPM,
+                          ADL_DL_FANCTRL_FLAG_USER_DEFINED_SPEED)
+from .adl_structures import (ADLPMActivity, ADLTemperature, ADLFanSpeedValue, ADLODParameters,
+                             ADLFanSpeedInfo, StructurePool)
+from .adl_api import (ADLError, ADLNotSupportedError,
+                      ADL_Overdrive5_CurrentActivity_Get,
+                      ADL_Overdrive5_Temperature_Get,
+                      ADL_Overdrive5_FanSpeed_Get,
+                      ADL_Overdrive5_FanSpeedInfo_Get,
+                      ADL_Overdrive5_ODParameters_Get,
+                      ADL_Overdrive5_ODPerformanceLevels_Get,
+                      ADL_Overdrive5_PowerControl_Get)
+from .adl_caps import CAP_ALL, CAP_FAN_SPEED_PERCENT, CAP_FAN_SPEED_RPM
+from .adl_scheduler import _get_video_bios_info
+from .adl_transaction import apply_desired_state
+
+# Readings in the units atitweak prints: clocks in MHz, voltages in VDC, temperatures in degrees C.
+Activity = namedtuple("Activity", "engine_clock memory_clock core_voltage utilization performance_level "
+                                  "bus_speed bus_lanes max_bus_lanes")
+FanSpeed = namedtuple("FanSpeed", "percent rpm user_defined")
+PerformanceLevel = namedtuple("PerformanceLevel", "engine_clock memory_clock core_voltage")
+ValueRange = namedtuple("ValueRange", "min max step")
+FanSpeedRange = namedtuple("FanSpeedRange", "min_percent max_percent min_rpm max_rpm")
+
+def _text(value):
+    return value if isinstance(value, str) else value.decode("ascii", "replace")
+
+class Adapter(object):
+    """One adapter, wrapping its AdapterInfo.
+    
+    Static facts (names, UDID, bus, Overdrive ranges, level count, BIOS) are read once and
+    cached; refresh() forgets them. Readings are fetched on every call into structures the
+    adapter keeps, and come back as namedtuples in MHz, VDC, degrees C and percent. Set
+    calls go through apply_desired_state(), so unchanged values aren't written.
+    
+    An Adapter isn't thread-safe; use one per thread or lock around it.
+    """
+    
+    __slots__ = ["info", "adapter_index", "caps", "_pool",
+                 "_od_parameters", "_fan_speed_range", "_bios_info"]
+    
+    def __init__(self, info, caps=CAP_ALL):
+        self.info = info
+        self.adapter_index = info.iAdapterIndex
+        self.caps = caps
+        self._pool = StructurePool()
+        self.refresh()
+
+    def __repr__(self):
+        return "<Adapter %d: %s>" % (self.adapter_index, self.name)
+
+    def refresh(self):
+        self._od_parameters = None
+        self._fan_speed_range = None
+        self._bios_info = None
+
+    def supports(self, capability):
+        return bool(self.caps & capability)
+
+    # static properties
+
+    @property
+    def name(self):
+        return _text(self.info.strAdapterName)
+
+    @property
+    def display_name(self):
+        return _text(self.info.strDisplayName)
+
+    @property
+    def udid(self):
+        return _text(self.info.strUDID)
+
+    @property
+    def bus_number(self):
+        return self.info.iBusNumber
+
+    @property
+    def od_parameters(self):
+        """The raw ADLODParameters, read once."""
+        if self._od_parameters is None:
+            od_parameters, od_parameters_ref = self._pool.slot(self.adapter_index, ADLODParameters)
+            ADL_Overdrive5_ODParameters_Get(self.adapter_index, od_parameters_ref)
+            self._od_parameters = od_parameters
+        return self._od_parameters
+
+    @property
+    def engine_clock_range(self):
+        value_range = self.od_parameters.sEngineClock
+        return ValueRange(value_range.iMin/100.0, value_range.iMax/100.0, value_range.iStep/100.0)
+
+    @property
+    def memory_clock_range(self):
+        value_range = self.od_parameters.sMemoryClock
+        return ValueRange(value_range.iMin/100.0, value_range.iMax/100.0, value_range.iStep/100.0)
+
+    @property
+    def core_voltage_range(self):
+        value_range = self.od_parameters.sVddc
+        return ValueRange(value_range.iMin/1000.0, value_range.iMax/1000.0, value_range.iStep/1000.0)
+
+    @property
+    def discrete_performance_levels(self):
+        return bool(self.od_parameters.iDiscretePerformanceLevels)
+
+    @property
+    def num_performance_levels(self):
+        return self.od_parameters.iNumberOfPerformanceLevels
+
+    @property
+    def fan_speed_range(self):
+        if self._fan_speed_range is None:
+            fan_speed_info, fan_speed_info_ref = self._pool.slot(self.adapter_index, ADLFanSpeedInfo)
+            ADL_Overdrive5_FanSpeedInfo_Get(self.adapter_index, 0, fan_speed_info_ref)
+            self._fan_speed_range = FanSpeedRange(fan_speed_info.iMinPercent, fan_speed_info.iMaxPercent,
+                                                  fan_speed_info.iMinRPM, fan_speed_info.iMaxRPM)
+        return self._fan_speed_range
+
+    @property
+    def bios_info(self):
+        """(part number, version, date) of the video BIOS."""
+        if self._bios_info is None:
+            bios_info = _get_video_bios_info(self.adapter_index)
+            self._bios_info = (_text(bios_info.strPartNumber), _text(bios_info.strVersion), _text(bios_info.strDate))
+        return self._bios_info
+
+    # readings
+
+    def activity(self):
+        activity, activity_ref = self._pool.slot(self.adapter_index, ADLPMActivity)
+        ADL_Overdrive5_CurrentActivity_Get(self.adapter_index, activity_ref)
+        return Activity(activity.iEngineClock/100.0, activity.iMemoryClock/100.0, activity.iVddc/1000.0,
+                        activity.iActivityPercent, activity.iCurrentPerformanceLevel,
+                        activity.iCurrentBusSpeed, activity.iCurrentBusLanes, activity.iMaximumBusLanes)
+
+    def temperature(self, thermal_controller_index=0):
+        temperature, temperature_ref = self._pool.slot(self.adapter_index, ADLTemperature)
+        ADL_Overdrive5_Temperature_Get(self.adapter_index, thermal_controller_index, temperature_ref)
+        return temperature.iTemperature/1000.0
+
+    def fan_speed(self, thermal_controller_index=0):
+        """Returns a FanSpeed; percent or rpm is None if the driver can't report it, and
+        raises ADLError if it can report neither."""
+        fan_speed_value, fan_speed_value_ref = self._pool.slot(self.adapter_index, ADLFanSpeedValue)
+        speeds = []
+        user_defined = False
+        error = None
+        
+        for speed_type, capability in ((ADL_DL_FANCTRL_SPEED_TYPE_PERCENT, CAP_FAN_SPEED_PERCENT),
+                                       (ADL_DL_FANCTRL_SPEED_TYPE_RPM, CAP_FAN_SPEED_RPM)):
+            speeds.append(None)
+            if not self.caps & capability:
+                continue
+            fan_speed_value.iSpeedType = speed_type
+            try:
+                ADL_Overdrive5_FanSpeed_Get(self.adapter_index, thermal_controller_index, fan_speed_value_ref)
+            except ADLError as err:
+                error = err
+                continue
+            speeds[-1] = fan_speed_value.iFanSpeed
+            user_defined = bool(fan_speed_value.iFlags & ADL_DL_FANCTRL_FLAG_USER_DEFINED_SPEED)
+        
+        if speeds == [None, None]:
+            raise error or ADLNotSupportedError("Adapter %d can't report its fan speed." % self.adapter_index,
+                                                function="ADL_Overdrive5_FanSpeed_Get",
+                                                adapter_index=self.adapter_index)
+        return FanSpeed(speeds[0], speeds[1], user_defined)
+
+    def powertune(self):
+        powertune, powertune_ref = self._pool.slot(self.adapter_index, c_int, "powertune")
+        default_ref = self._pool.slot(self.adapter_index, c_int, "powertune_default")[1]
+        ADL_Overdrive5_PowerControl_Get(self.adapter_index, powertune_ref, default_ref)
+        return powertune.value
+
+    def performance_levels(self, default=False):
+        """Returns a list of PerformanceLevel, or [] without discrete performance levels."""
+        if not self.discrete_performance_levels:
+            return []
+        plevels, plevels_ref = self._pool.performance_levels(self.adapter_index, self.num_performance_levels)
+        ADL_Overdrive5_ODPerformanceLevels_Get(self.adapter_index, 1 if default else 0, plevels_ref)
+        return [PerformanceLevel(level.iEngineClock/100.0, level.iMemoryClock/100.0, level.iVddc/1000.0)
+                for level in plevels.aLevels]
+
+    # settings
+
+    def desired_state(self, levels=None, fan_speed=None, powertune=None):
+        """Converts settings in MHz/VDC into the driver-unit form apply_desired_state() takes.
+        
+        levels maps performance levels to (engine clock, memory clock, core voltage) with None
+        for values to leave alone.
+        """
+        wanted = {}
+        if levels:
+            wanted["levels"] = dict((level, (None if engine_clock is None else int(round(engine_clock*100.0)),
+                                             None if memory_clock is None else int(round(memory_clock*100.0)),
+                                             None if core_voltage is None else int(round(core_voltage*1000.0))))
+                                    for level, (engine_clock, memory_clock, core_voltage) in levels.items())
+        if fan_speed is not None:
+            wanted["fan_speed"] = fan_speed
+        if powertune is not None:
+            wanted["powertune"] = powertune
+        return wanted
+
+    def set_performance_level(self, level, engine_clock=None, memory_clock=None, core_voltage=None):
+        return self.apply(levels={level: (engine_clock, memory_clock, core_voltage)})
+
+    def set_fan_speed(self, fan_speed):
+        """Sets a fan speed in percent, or "default" for automatic control."""
+        return self.apply(fan_speed=fan_speed)
+
+    def set_powertune(self, powertune):
+        return self.apply(powertune=powertune)
+
+    def apply(self, levels=None, fan_speed=None, powertune=None, cache=None):
+        """Applies settings in one verified transaction; returns the StateChanges made."""
+        return apply_desired_state({self.adapter_index: self.desired_state(levels, fan_speed, powertune)}, cache=cache)
+
+def get_adapters(topology, capabilities=None):
+    """Returns an Adapter for every adapter of an AdapterTopology, with capabilities looked up
+    in a CapabilityCache when one is given."""
+    return [Adapter(info, CAP_ALL if capabilities is None else capabilities.get(info))
+            for info in topology.adapters]
@@ -0,0 +1,144 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import threading
+from array import array
+from collections import namedtuple
+
+# Latencies are kept in microseconds in log-linear buckets, HDR histogram style: values below
+# 2 * _SUB_BUCKETS get a bucket each, and every power of two above that is split into
+# _SUB_BUCKETS buckets, so any recorded value is off by at most 1/_SUB_BUCKETS (about 6%).
+_SUB_BUCKETS = 16
+_SUB_BUCKET_BITS = 4
+# anything slower than about a minute lands in the last bucket
+_MAX_MICROSECONDS = (1 << 26) - 1
+_NUM_BUCKETS = ((_MAX_MICROSECONDS.bit_length() - _SUB_BUCKET_BITS) * _SUB_BUCKETS) + _SUB_BUCKETS
+
+CallSummary = namedtuple("CallSummary", "function adapter_index calls errors total mean p50 p90 p99 max")
+
+def _bucket(microseconds):
+    if microseconds < 2 * _SUB_BUCKETS:
+        return microseconds
+    if microseconds > _MAX_MICROSECONDS:
+        microseconds = _MAX_MICROSECONDS
+    shift = microseconds.bit_length() - _SUB_BUCKET_BITS - 1
+    return shift * _SUB_BUCKETS + (microseconds >> shift)
+
+def _bucket_value(bucket):
+    # the middle of the range of microsecond values that fall into a bucket
+    if bucket < 2 * _SUB_BUCKETS:
+        return bucket
+    shift = bucket // _SUB_BUCKETS - 1
+    low = (bucket - shift * _SUB_BUCKETS) << shift
+    return low + ((1 << shift) - 1) / 2.0
+
+class CallStats(object):
+    """Call count, error count and a fixed-size latency histogram for one function on one adapter."""
+    
+    __slots__ = ["calls", "errors", "total", "max", "histogram"]
+    
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = array("L", [0]) * _NUM_BUCKETS
+
+    def record(self, seconds, failed=False):
+        self.calls += 1
+        if failed:
+            self.errors += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.histogram[_bucket(int(seconds * 1000000.0))] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.calls if self.calls else 0.0
+
+    def percentile(self, percent):
+        """The latency (in seconds) below which percent of the calls fall."""
+        if not self.calls:
+            return 0.0
+        threshold = self.calls * percent / 100.0
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= threshold:
+                return min(_bucket_value(bucket) / 1000000.0, self.max)
+        return self.max
+
+class CallProfiler(object):
+    """Collects CallStats per (ADL function name, adapter index); the adapter index is None
+    for functions that don't take one. Safe to record into from several threads."""
+    
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, function, adapter_index, seconds, failed=False):
+        key = (function, adapter_index)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = CallStats()
+            stats.record(seconds, failed)
+
+    def stats(self, function, adapter_index=None):
+        return self._stats.get((function, adapter_index))
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def summary(self, by_adapter=True):
+        """Returns a CallSummary (times in seconds) per function, or per function and adapter
+        if by_adapter is set, slowest total first."""
+        with self._lock:
+            if by_adapter:
+                groups = dict((key, [stats]) for key, stats in self._stats.items())
+            else:
+                groups = {}
+                for (function, adapter_index), stats in self._stats.items():
+                    groups.setdefault((function, None), []).append(stats)
+            
+            rows = []
+            for (function, adapter_index), group in groups.items():
+                stats = group[0] if len(group) == 1 else _merge(group)
+                rows.append(CallSummary(function, adapter_index, stats.calls, stats.errors, stats.total, stats.mean,
+                                        stats.percentile(50), stats.percentile(90), stats.percentile(99), stats.max))
+        
+        rows.sort(key=lambda row: row.total, reverse=True)
+        return rows
+
+def _merge(group):
+    merged = CallStats()
+    histogram = merged.histogram
+    for stats in group:
+        merged.calls += stats.calls
+        merged.errors += stats.errors
+        merged.total += stats.total
+        merged.max = max(merged.max, stats.max)
+        for bucket, count in enumerate(stats.histogram):
+            if count:
+                histogram[bucket] += count
+    return merged
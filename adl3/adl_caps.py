@@ -0,0 +1,253 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import json
+import os
+import sys
+import tempfile
+from ctypes import byref, c_int
+
+from . import adl_api
+from .adl_defines import (ADL_DL_FANCTRL_SPEED_TYPE_PERCENT, ADL_DL_FANCTRL_SPEED_TYPE_RPM,
+                          ADL_DL_FANCTRL_SUPPORTS_PERCENT_READ, ADL_DL_FANCTRL_SUPPORTS_PERCENT_WRITE,
+                          ADL_DL_FANCTRL_SUPPORTS_RPM_READ)
+from .adl_api import ADLError, ADLNotSupportedError
+from .adl_overdrive import (get_current_activity, get_temperature, get_fan_speed_info, get_fan_speed,
+                            get_od_parameters, get_performance_levels, get_power_control)
+from .adl_scheduler import _get_memory_info, _get_video_bios_info
+
+# Capability bits, one per thing an adapter may or may not support
+CAP_CURRENT_ACTIVITY = 0x0001
+CAP_TEMPERATURE = 0x0002
+CAP_FAN_SPEED_INFO = 0x0004
+CAP_FAN_SPEED_PERCENT = 0x0008
+CAP_FAN_SPEED_RPM = 0x0010
+CAP_FAN_SPEED_SET = 0x0020
+CAP_OD_PARAMETERS = 0x0040
+CAP_DISCRETE_LEVELS = 0x0080
+CAP_PERFORMANCE_LEVELS = 0x0100
+CAP_POWER_CONTROL = 0x0200
+CAP_ADAPTER_SPEED = 0x0400
+CAP_MEMORY_INFO = 0x0800
+CAP_DISPLAY_CAPABILITIES = 0x1000
+
+CAP_ALL = 0x1fff
+
+CAP_NAMES = {
+    CAP_CURRENT_ACTIVITY: "current_activity",
+    CAP_TEMPERATURE: "temperature",
+    CAP_FAN_SPEED_INFO: "fan_speed_info",
+    CAP_FAN_SPEED_PERCENT: "fan_speed_percent",
+    CAP_FAN_SPEED_RPM: "fan_speed_rpm",
+    CAP_FAN_SPEED_SET: "fan_speed_set",
+    CAP_OD_PARAMETERS: "od_parameters",
+    CAP_DISCRETE_LEVELS: "discrete_levels",
+    CAP_PERFORMANCE_LEVELS: "performance_levels",
+    CAP_POWER_CONTROL: "power_control",
+    CAP_ADAPTER_SPEED: "adapter_speed",
+    CAP_MEMORY_INFO: "memory_info",
+    CAP_DISPLAY_CAPABILITIES: "display_capabilities",
+}
+
+# bumped whenever the meaning of the bits changes, so old cache files are ignored
+_CACHE_VERSION = 1
+
+def capability_names(caps):
+    return [CAP_NAMES[bit] for bit in sorted(CAP_NAMES) if caps & bit]
+
+class _Probe(object):
+    # trial reads that tell "unsupported" apart from a read that just failed this time
+    
+    def __init__(self):
+        self.complete = True
+        self.value = None
+
+    def supports(self, read, *args):
+        """True if read(*args) works (its result is left in value), False if the adapter
+        doesn't support it, None if it failed for some other reason, which makes the
+        probe incomplete."""
+        self.value = None
+        try:
+            self.value = read(*args)
+            return True
+        except ADLNotSupportedError:
+            # ADLFunctionNotFoundError is an ADLNotSupportedError, so missing entry points count too
+            return False
+        except ADLError:
+            self.complete = False
+            return None
+
+    def call(self, name, *args):
+        function = getattr(adl_api, name, None)
+        if function is None:
+            return False
+        return self.supports(function, *args)
+
+def _probe(adapter_index):
+    # (caps, complete): a capability whose probe failed for a reason other than "unsupported"
+    # is kept, and the result is incomplete, so it isn't cached
+    trial = _Probe()
+    caps = 0
+    
+    if trial.supports(get_current_activity, adapter_index) is not False:
+        caps |= CAP_CURRENT_ACTIVITY
+    if trial.supports(get_temperature, adapter_index) is not False:
+        caps |= CAP_TEMPERATURE
+    
+    supported = trial.supports(get_fan_speed_info, adapter_index)
+    if supported is None:
+        caps |= CAP_FAN_SPEED_INFO | CAP_FAN_SPEED_PERCENT | CAP_FAN_SPEED_RPM | CAP_FAN_SPEED_SET
+    elif supported:
+        flags = trial.value.iFlags
+        caps |= CAP_FAN_SPEED_INFO
+        if (flags & ADL_DL_FANCTRL_SUPPORTS_PERCENT_READ and
+                trial.supports(get_fan_speed, adapter_index, ADL_DL_FANCTRL_SPEED_TYPE_PERCENT) is not False):
+            caps |= CAP_FAN_SPEED_PERCENT
+        if (flags & ADL_DL_FANCTRL_SUPPORTS_RPM_READ and
+                trial.supports(get_fan_speed, adapter_index, ADL_DL_FANCTRL_SPEED_TYPE_RPM) is not False):
+            caps |= CAP_FAN_SPEED_RPM
+        if flags & ADL_DL_FANCTRL_SUPPORTS_PERCENT_WRITE:
+            caps |= CAP_FAN_SPEED_SET
+    
+    supported = trial.supports(get_od_parameters, adapter_index)
+    if supported is None:
+        caps |= CAP_OD_PARAMETERS | CAP_PERFORMANCE_LEVELS
+    elif supported:
+        od_parameters = trial.value
+        caps |= CAP_OD_PARAMETERS
+        if od_parameters.iDiscretePerformanceLevels:
+            caps |= CAP_DISCRETE_LEVELS
+        if trial.supports(get_performance_levels, adapter_index, od_parameters.iNumberOfPerformanceLevels) is not False:
+            caps |= CAP_PERFORMANCE_LEVELS
+    
+    value = c_int()
+    supported = trial.call("ADL_Overdrive5_PowerControl_Caps", adapter_index, byref(value), byref(c_int()))
+    if supported is None or (supported and value.value and trial.supports(get_power_control, adapter_index) is not False):
+        caps |= CAP_POWER_CONTROL
+    
+    value = c_int()
+    supported = trial.call("ADL_Adapter_Speed_Caps", adapter_index, byref(value), byref(c_int()))
+    if supported is None or (supported and value.value):
+        caps |= CAP_ADAPTER_SPEED
+    
+    if trial.supports(_get_memory_info, adapter_index) is not False:
+        caps |= CAP_MEMORY_INFO
+    
+    if trial.call("ADL_Display_Capabilities_Get", adapter_index, byref(c_int()), byref(c_int())) is not False:
+        caps |= CAP_DISPLAY_CAPABILITIES
+    
+    return caps, trial.complete
+
+def probe(adapter_index):
+    """Finds out what an adapter supports with the *_Caps functions and trial reads;
+    returns a bitmap of CAP_* flags. Nothing is written to the adapter. A capability
+    whose trial fails with anything but ADLNotSupportedError is assumed to be there."""
+    return _probe(adapter_index)[0]
+
+def default_cache_path():
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "adl3", "capabilities.json")
+
+def _text(value):
+    return value if isinstance(value, str) else value.decode("ascii", "replace")
+
+class CapabilityCache(object):
+    """Capability bitmaps kept on disk between runs, keyed by adapter UDID and video BIOS
+    version, so a BIOS flash (or a different card in the slot) triggers a new probe.
+    
+    Pass path=None to keep the cache in memory only. Write failures are ignored: the cache
+    only saves time, it's never needed for correctness.
+    """
+    
+    def __init__(self, path=False):
+        self.path = default_cache_path() if path is False else path
+        self._entries = {}
+        self._by_index = {}
+        self._load()
+
+    def _load(self):
+        if self.path is None:
+            return
+        try:
+            with open(self.path) as cache_file:
+                data = json.load(cache_file)
+        except (IOError, OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == _CACHE_VERSION:
+            self._entries = dict((key, value["caps"]) for key, value in data.get("adapters", {}).items()
+                                 if isinstance(value, dict) and isinstance(value.get("caps"), int))
+
+    def save(self):
+        if self.path is None:
+            return
+        data = {"version": _CACHE_VERSION,
+                "adapters": dict((key, {"caps": caps, "names": capability_names(caps)})
+                                 for key, caps in self._entries.items())}
+        directory = os.path.dirname(self.path)
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            # write to a temporary file and rename it, so concurrent runs never see half a file
+            handle, temporary_path = tempfile.mkstemp(dir=directory, prefix=".capabilities")
+            with os.fdopen(handle, "w") as cache_file:
+                json.dump(data, cache_file, indent=1, sort_keys=True, separators=(",", ": "))
+            if sys.platform.startswith("win") and os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(temporary_path, self.path)
+        except (IOError, OSError):
+            pass
+
+    def key(self, info):
+        """The cache key for an AdapterInfo; None if the BIOS version can't be read."""
+        try:
+            bios_info = _get_video_bios_info(info.iAdapterIndex)
+        except ADLError:
+            return None
+        return "%s|%s" % (_text(info.strUDID), _text(bios_info.strVersion))
+
+    def get(self, info, refresh=False):
+        """Returns the capability bitmap of the adapter described by the AdapterInfo info,
+        probing (and saving) it if it isn't cached yet or refresh is set. A probe that hit
+        a transient error is not saved, so the next lookup probes again."""
+        key = self.key(info)
+        caps = None if refresh or key is None else self._entries.get(key)
+        
+        if caps is None:
+            caps, complete = _probe(info.iAdapterIndex)
+            # a probe cut short by a transient error is used this time, but not saved
+            if key is not None and complete:
+                self._entries[key] = caps
+                self.save()
+        
+        self._by_index[info.iAdapterIndex] = caps
+        return caps
+
+    def get_index(self, adapter_index):
+        """Returns the bitmap last looked up for an ADL adapter index, or CAP_ALL if none was."""
+        return self._by_index.get(adapter_index, CAP_ALL)
+
+    def clear(self):
+        self._entries = {}
+        self._by_index = {}
+        self.save()
@@ -0,0 +1,343 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from collections import namedtuple
+from ctypes import byref, c_int, cast, POINTER
+
+from .adl_defines import ADL_DISPLAY_POSSIBLEMAPRESULT_VALID
+from .adl_structures import ADLDisplayMap, ADLDisplayTarget, ADLPossibleMap, ADLPossibleMapResult
+from .adl_memory import ADLBuffer, Arena
+from .adl_api import (ADLError,
+                      ADL_Display_DisplayMapConfig_Get,
+                      ADL_Display_DisplayMapConfig_Set,
+                      ADL_Display_DisplayMapConfig_Validate,
+                      ADL_Display_DisplayMapConfig_PossibleAddAndRemove)
+
+# One desktop: a mode at a position, shown on targets (a sorted tuple of display indexes).
+DisplayMap = namedtuple("DisplayMap", "xres yres refresh_rate colour_depth x y targets")
+
+def _same_desktop(a, b):
+    return a[:6] == b[:6]
+
+class DisplayLayout(object):
+    """An immutable snapshot of an adapter's display maps and the displays they target.
+    
+    Layouts compare and hash by their maps, so they can key caches; the with_* and
+    without_* methods return new layouts.
+    """
+    
+    __slots__ = ["adapter_index", "maps", "_hash"]
+    
+    def __init__(self, adapter_index, maps):
+        self.adapter_index = adapter_index
+        self.maps = tuple(sorted(DisplayMap(display_map.xres, display_map.yres, round(display_map.refresh_rate, 2),
+                                            display_map.colour_depth, display_map.x, display_map.y,
+                                            tuple(sorted(display_map.targets)))
+                                 for display_map in maps))
+        self._hash = hash((adapter_index, self.maps))
+
+    @classmethod
+    def from_driver(cls, adapter_index):
+        num_maps = c_int()
+        num_targets = c_int()
+        with Arena() as arena:
+            maps = arena.buffer(ADLDisplayMap)
+            targets = arena.buffer(ADLDisplayTarget)
+            ADL_Display_DisplayMapConfig_Get(adapter_index, byref(num_maps), maps.ref, byref(num_targets), targets.ref, 0)
+            maps.count = num_maps.value
+            targets.count = num_targets.value
+            
+            layout = []
+            for display_map in maps:
+                mode = display_map.displayMode
+                first = display_map.iFirstDisplayTargetArrayIndex
+                layout.append(DisplayMap(mode.iXRes, mode.iYRes, mode.fRefreshRate, mode.iColourDepth,
+                                         mode.iXPos, mode.iYPos,
+                                         [targets[index].displayID.iDisplayLogicalIndex
+                                          for index in range(first, first + display_map.iNumDisplayTarget)]))
+        return cls(adapter_index, layout)
+
+    def __eq__(self, other):
+        return isinstance(other, DisplayLayout) and self.adapter_index == other.adapter_index and self.maps == other.maps
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return "<DisplayLayout %s>" % "; ".join("%dx%d@%g %s at %d,%d" % (m.xres, m.yres, m.refresh_rate,
+                                                                         "+".join(str(t) for t in m.targets), m.x, m.y)
+                                                for m in self.maps)
+
+    def displays(self):
+        return tuple(sorted(target for display_map in self.maps for target in display_map.targets))
+
+    def map_of(self, display_index):
+        for display_map in self.maps:
+            if display_index in display_map.targets:
+                return display_map
+        return None
+
+    def without_display(self, display_index):
+        """The layout with display_index unmapped; a map left without displays is dropped."""
+        maps = []
+        for display_map in self.maps:
+            if display_index in display_map.targets:
+                targets = tuple(target for target in display_map.targets if target != display_index)
+                if not targets:
+                    continue
+                display_map = display_map._replace(targets=targets)
+            maps.append(display_map)
+        return DisplayLayout(self.adapter_index, maps)
+
+    def with_display(self, display_map, display_index):
+        """The layout with display_index added to display_map (one of its maps), or mapped on its
+        own with display_map's mode if display_map isn't one of them."""
+        if display_map in self.maps:
+            maps = [m._replace(targets=m.targets + (display_index,)) if m == display_map else m for m in self.maps]
+        else:
+            maps = list(self.maps) + [display_map._replace(targets=(display_index,))]
+        return DisplayLayout(self.adapter_index, maps)
+
+    def with_map_replaced(self, old, new):
+        return DisplayLayout(self.adapter_index, [new if display_map == old else display_map for display_map in self.maps])
+
+    def to_structures(self):
+        """(ADLDisplayMap array, ADLDisplayTarget array) describing the layout."""
+        num_targets = sum(len(display_map.targets) for display_map in self.maps)
+        maps = (ADLDisplayMap * max(len(self.maps), 1))()
+        targets = (ADLDisplayTarget * max(num_targets, 1))()
+        
+        target_index = 0
+        for map_index, display_map in enumerate(self.maps):
+            entry = maps[map_index]
+            entry.iDisplayMapIndex = map_index
+            mode = entry.displayMode
+            mode.iAdapterIndex = self.adapter_index
+            mode.iXRes, mode.iYRes = display_map.xres, display_map.yres
+            mode.fRefreshRate, mode.iColourDepth = display_map.refresh_rate, display_map.colour_depth
+            mode.iXPos, mode.iYPos = display_map.x, display_map.y
+            entry.iNumDisplayTarget = len(display_map.targets)
+            entry.iFirstDisplayTargetArrayIndex = target_index
+            for display_index in display_map.targets:
+                target = targets[target_index]
+                target.displayID.iDisplayLogicalIndex = display_index
+                target.displayID.iDisplayPhysicalIndex = display_index
+                target.displayID.iDisplayLogicalAdapterIndex = self.adapter_index
+                target.displayID.iDisplayPhysicalAdapterIndex = self.adapter_index
+                target.iDisplayMapIndex = map_index
+                target_index += 1
+        return maps, targets
+
+class DisplayMapPlanner(object):
+    """Plans and applies display map changes for one adapter with as few driver calls as possible.
+    
+    validate() results are memoized per candidate layout, and possible_add_remove() results per
+    display map until the configuration changes. ADL_Display_DisplayMapConfig_Set replaces the
+    whole configuration, so plan() goes straight to a valid target unless a clone group it keeps
+    gains or loses displays the driver won't add or remove; only then does it search breadth-first
+    for the shortest sequence of single changes (unmap a display, add it to a clone group, map it
+    on its own, or change a map's mode or position) whose every step the driver accepts,
+    validating each step of the search with one batched ADL_Display_DisplayMapConfig_Validate
+    call. Call clear() after displays are connected or disconnected.
+    """
+    
+    def __init__(self, adapter_index):
+        self.adapter_index = getattr(adapter_index, "iAdapterIndex", adapter_index)
+        self.validate_calls = 0
+        self._current = None
+        self._valid = {}
+        self._add_remove = {}
+
+    def current(self, refresh=False):
+        if self._current is None or refresh:
+            layout = DisplayLayout.from_driver(self.adapter_index)
+            if layout != self._current:
+                # what can be added to or removed from a map depends on the rest of the configuration
+                self._add_remove.clear()
+            self._current = layout
+            self._valid[layout] = True
+        return self._current
+
+    def clear(self):
+        self._current = None
+        self._valid.clear()
+        self._add_remove.clear()
+
+    def validate(self, layout):
+        return self.validate_all([layout])[0]
+
+    def validate_all(self, layouts):
+        """Returns whether the driver would accept each layout, asking it (in one call) only
+        about layouts it hasn't been asked about before."""
+        unknown = [layout for layout in set(layouts) if layout not in self._valid]
+        if unknown:
+            structures = [layout.to_structures() for layout in unknown]
+            possible_maps = (ADLPossibleMap * len(unknown))()
+            for index, (layout, (maps, targets)) in enumerate(zip(unknown, structures)):
+                possible_map = possible_maps[index]
+                possible_map.iIndex = index
+                possible_map.iAdapterIndex = self.adapter_index
+                possible_map.iNumDisplayMap = len(layout.maps)
+                possible_map.displayMap = cast(maps, POINTER(ADLDisplayMap))
+                possible_map.iNumDisplayTarget = sum(len(display_map.targets) for display_map in layout.maps)
+                possible_map.displayTarget = cast(targets, POINTER(ADLDisplayTarget))
+            
+            num_results = c_int()
+            self.validate_calls += 1
+            with ADLBuffer(ADLPossibleMapResult) as results:
+                ADL_Display_DisplayMapConfig_Validate(self.adapter_index, len(unknown), possible_maps,
+                                                      byref(num_results), results.ref)
+                results.count = num_results.value
+                valid = dict((result.iIndex, bool(result.iPossibleMapResultMask & result.iPossibleMapResultValue &
+                                                  ADL_DISPLAY_POSSIBLEMAPRESULT_VALID))
+                             for result in results)
+            for index, layout in enumerate(unknown):
+                self._valid[layout] = valid.get(index, False)
+        
+        return [self._valid[layout] for layout in layouts]
+
+    def possible_add_remove(self, display_map):
+        """(displays that can be added to, displays that can be removed from) a map of the
+        current configuration, as frozensets of display indexes."""
+        cached = self._add_remove.get(display_map)
+        if cached is not None:
+            return cached
+        
+        maps, targets = DisplayLayout(self.adapter_index, [display_map]).to_structures()
+        num_add = c_int()
+        num_remove = c_int()
+        with Arena() as arena:
+            add = arena.buffer(ADLDisplayTarget)
+            remove = arena.buffer(ADLDisplayTarget)
+            ADL_Display_DisplayMapConfig_PossibleAddAndRemove(self.adapter_index, 1, maps, len(display_map.targets), targets,
+                                                              byref(num_add), add.ref, byref(num_remove), remove.ref)
+            add.count = num_add.value
+            remove.count = num_remove.value
+            cached = (frozenset(target.displayID.iDisplayLogicalIndex for target in add),
+                      frozenset(target.displayID.iDisplayLogicalIndex for target in remove))
+        
+        self._add_remove[display_map] = cached
+        return cached
+
+    def _direct(self, start, target):
+        # whether the driver allows going from the current layout to target in one Set: every
+        # current map that lives on in target may only gain and lose displays it can add and
+        # remove. A display taken from another map is freed by the same Set (and validate() has
+        # accepted the target as a whole), so only unmapped displays are checked for adding.
+        mapped = set(start.displays())
+        for display_map in start.maps:
+            for wanted in target.maps:
+                if not (_same_desktop(display_map, wanted) and set(display_map.targets) & set(wanted.targets)):
+                    continue
+                added = set(wanted.targets) - mapped
+                removed = set(display_map.targets) - set(wanted.targets)
+                if added or removed:
+                    addable, removable = self.possible_add_remove(display_map)
+                    if not (added <= addable and removed <= removable):
+                        return False
+        return True
+
+    def _moves(self, layout, target):
+        # single changes that bring layout closer to target
+        current = layout == self._current
+        moves = []
+        for display_index in set(layout.displays()) | set(target.displays()):
+            mapped = layout.map_of(display_index)
+            wanted = target.map_of(display_index)
+            
+            if mapped is not None and not (wanted is not None and _same_desktop(mapped, wanted) and
+                                           set(mapped.targets) <= set(wanted.targets)):
+                if not (current and len(mapped.targets) > 1 and
+                        display_index not in self.possible_add_remove(mapped)[1]):
+                    moves.append(layout.without_display(display_index))
+            
+            if mapped is None and wanted is not None:
+                group = [m for m in layout.maps if _same_desktop(m, wanted) and set(m.targets) <= set(wanted.targets)]
+                if group:
+                    if not (current and display_index not in self.possible_add_remove(group[0])[0]):
+                        moves.append(layout.with_display(group[0], display_index))
+                else:
+                    moves.append(layout.with_display(wanted, display_index))
+        
+        for display_map in layout.maps:
+            wanted = set(target.map_of(display_index) for display_index in display_map.targets)
+            if len(wanted) == 1:
+                wanted = wanted.pop()
+                if (wanted is not None and not _same_desktop(display_map, wanted) and
+                        set(display_map.targets) <= set(wanted.targets)):
+                    moves.append(layout.with_map_replaced(display_map, wanted._replace(targets=display_map.targets)))
+        return moves
+
+    def plan(self, target, max_steps=None):
+        """The shortest list of layouts that leads from the current layout to target (a
+        DisplayLayout, or a list of DisplayMaps), each accepted by the driver: just [target]
+        when it can be set directly. Raises ADLError if target isn't valid or can't be
+        reached in max_steps changes."""
+        if not isinstance(target, DisplayLayout):
+            target = DisplayLayout(self.adapter_index, target)
+        start = self.current()
+        if start == target:
+            return []
+        if not self.validate(target):
+            raise ADLError("The display layout %r is not valid for adapter %d." % (target, self.adapter_index),
+                           function="ADL_Display_DisplayMapConfig_Validate", adapter_index=self.adapter_index)
+        if self._direct(start, target):
+            return [target]
+        if max_steps is None:
+            max_steps = 2 * len(set(start.displays()) | set(target.displays())) + len(target.maps)
+        
+        parents = {start: None}
+        frontier = [start]
+        for step in range(max_steps):
+            candidates = []
+            for layout in frontier:
+                for move in self._moves(layout, target):
+                    if move not in parents:
+                        parents[move] = layout
+                        candidates.append(move)
+            
+            frontier = [layout for layout, valid in zip(candidates, self.validate_all(candidates)) if valid]
+            if target in frontier:
+                steps = []
+                layout = target
+                while layout != start:
+                    steps.append(layout)
+                    layout = parents[layout]
+                return steps[::-1]
+            if not frontier:
+                break
+        
+        raise ADLError("No sequence of valid display map changes leads to %r on adapter %d." % (target, self.adapter_index),
+                       function="ADL_Display_DisplayMapConfig_Validate", adapter_index=self.adapter_index)
+
+    def apply(self, target, max_steps=None):
+        """Plans the change to target and applies it step by step; returns the steps taken."""
+        steps = self.plan(target, max_steps)
+        for layout in steps:
+            maps, targets = layout.to_structures()
+            ADL_Display_DisplayMapConfig_Set(self.adapter_index, len(layout.maps), maps,
+                                             sum(len(display_map.targets) for display_map in layout.maps), targets)
+            self._current = layout
+            self._add_remove.clear()
+        return steps
@@ -0,0 +1,329 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import threading
+import time
+from collections import namedtuple
+from ctypes import addressof, byref, c_int, sizeof, string_at
+
+from .adl_defines import ADL_DISPLAY_DISPLAYINFO_DISPLAYCONNECTED
+from .adl_structures import ADLDisplayEDIDData, ADLDisplayInfo
+from .adl_memory import ADLBuffer
+from .adl_api import (ADLError,
+                      ADL_Display_ConnectedDisplays_Get,
+                      ADL_Display_DisplayInfo_Get,
+                      ADL_Display_EdidData_Get)
+
+EDID_BLOCK_SIZE = 128
+# ADL hands back up to 256 bytes (two EDID blocks) per ADL_Display_EdidData_Get call
+_CHUNK_SIZE = 256
+_EDID_DATA_OFFSET = ADLDisplayEDIDData.cEDIDData.offset
+_EDID_HEADER = b"\x00\xff\xff\xff\xff\xff\xff\x00"
+
+_clock = getattr(time, "monotonic", time.time)
+
+# pixel_clock in kHz, sizes in mm, refresh_rate in Hz
+DetailedTiming = namedtuple("DetailedTiming", "pixel_clock h_active h_blanking h_sync_offset h_sync_width "
+                                              "v_active v_blanking v_sync_offset v_sync_width "
+                                              "width_mm height_mm interlaced refresh_rate")
+ExtensionBlock = namedtuple("ExtensionBlock", "tag revision data")
+
+def _read_edid(adapter_index, display_index):
+    # the raw EDID bytes of one display: block 0 says how many extension blocks follow
+    edid_data = ADLDisplayEDIDData()
+    edid_data_ref = byref(edid_data)
+    data_address = addressof(edid_data) + _EDID_DATA_OFFSET
+    
+    chunks = []
+    size = None
+    received = 0
+    block_index = 0
+    while size is None or received < size:
+        edid_data.iSize = sizeof(edid_data)
+        edid_data.iFlag = 0
+        edid_data.iBlockIndex = block_index
+        edid_data.iEDIDSize = 0
+        ADL_Display_EdidData_Get(adapter_index, display_index, edid_data_ref)
+        
+        # c_char arrays stop at the first NUL, and EDIDs start with one, so copy the bytes out directly
+        length = min(edid_data.iEDIDSize, _CHUNK_SIZE)
+        if length <= 0:
+            break
+        chunk = string_at(data_address, length)
+        chunks.append(chunk)
+        received += length
+        block_index += 1
+        
+        if size is None:
+            if len(chunk) < EDID_BLOCK_SIZE or chunk[:8] != _EDID_HEADER:
+                raise ADLError("Display %d on adapter %d returned a malformed EDID." % (display_index, adapter_index),
+                               function="ADL_Display_EdidData_Get", adapter_index=adapter_index)
+            size = EDID_BLOCK_SIZE * (1 + bytearray(chunk[126:127])[0])
+    
+    return b"".join(chunks)[:size]
+
+def _text(data):
+    return data.split(b"\n")[0].rstrip(b" \x00").decode("ascii", "replace")
+
+def _decode_timing(data):
+    pixel_clock = (data[0] | (data[1] << 8)) * 10
+    h_active = data[2] | ((data[4] >> 4) << 8)
+    h_blanking = data[3] | ((data[4] & 0xf) << 8)
+    v_active = data[5] | ((data[7] >> 4) << 8)
+    v_blanking = data[6] | ((data[7] & 0xf) << 8)
+    h_sync_offset = data[8] | ((data[11] >> 6) << 8)
+    h_sync_width = data[9] | (((data[11] >> 4) & 0x3) << 8)
+    v_sync_offset = (data[10] >> 4) | (((data[11] >> 2) & 0x3) << 4)
+    v_sync_width = (data[10] & 0xf) | ((data[11] & 0x3) << 4)
+    width_mm = data[12] | ((data[14] >> 4) << 8)
+    height_mm = data[13] | ((data[14] & 0xf) << 8)
+    interlaced = bool(data[17] & 0x80)
+    
+    total = (h_active + h_blanking) * (v_active + v_blanking)
+    refresh_rate = pixel_clock * 1000.0 / total if total else 0.0
+    return DetailedTiming(pixel_clock, h_active, h_blanking, h_sync_offset, h_sync_width,
+                          v_active, v_blanking, v_sync_offset, v_sync_width,
+                          width_mm, height_mm, interlaced, refresh_rate)
+
+class EDID(object):
+    """A display's raw EDID bytes; the fields are decoded the first time they're asked for."""
+    
+    __slots__ = ["raw", "_data", "_descriptors", "_detailed_timings", "_extensions"]
+    
+    def __init__(self, raw):
+        self.raw = raw
+        self._data = bytearray(raw)
+        self._descriptors = None
+        self._detailed_timings = None
+        self._extensions = None
+
+    def __repr__(self):
+        return "<EDID %s %04x serial %d, %d bytes>" % (self.vendor, self.product_code, self.serial_number, len(self.raw))
+
+    @property
+    def valid(self):
+        """True if the header and the checksum of every block are correct."""
+        data = self._data
+        if len(data) < EDID_BLOCK_SIZE or bytes(data[:8]) != _EDID_HEADER:
+            return False
+        return all(sum(data[offset:offset + EDID_BLOCK_SIZE]) & 0xff == 0
+                   for offset in range(0, len(data), EDID_BLOCK_SIZE))
+
+    @property
+    def vendor(self):
+        """The three letter PNP manufacturer ID."""
+        value = (self._data[8] << 8) | self._data[9]
+        return "".join(chr(ord("A") - 1 + ((value >> shift) & 0x1f)) for shift in (10, 5, 0))
+
+    @property
+    def product_code(self):
+        return self._data[10] | (self._data[11] << 8)
+
+    @property
+    def serial_number(self):
+        data = self._data
+        return data[12] | (data[13] << 8) | (data[14] << 16) | (data[15] << 24)
+
+    @property
+    def manufacture_year(self):
+        return 1990 + self._data[17]
+
+    @property
+    def manufacture_week(self):
+        return self._data[16]
+
+    @property
+    def version(self):
+        return "%d.%d" % (self._data[18], self._data[19])
+
+    @property
+    def width_cm(self):
+        return self._data[21]
+
+    @property
+    def height_cm(self):
+        return self._data[22]
+
+    def _get_descriptors(self):
+        # the four 18 byte descriptors of the base block: timings, or tagged display descriptors
+        if self._descriptors is None:
+            data = self._data
+            timings = []
+            descriptors = {}
+            for offset in (54, 72, 90, 108):
+                if offset + 18 > len(data):
+                    break
+                if data[offset] or data[offset + 1]:
+                    timings.append(_decode_timing(data[offset:offset + 18]))
+                else:
+                    descriptors.setdefault(data[offset + 3], bytes(data[offset + 5:offset + 18]))
+            self._descriptors = descriptors
+            self._detailed_timings = timings
+        return self._descriptors
+
+    @property
+    def name(self):
+        """The monitor name descriptor, or None."""
+        text = self._get_descriptors().get(0xfc)
+        return _text(text) if text is not None else None
+
+    @property
+    def serial_string(self):
+        """The serial number descriptor, or None."""
+        text = self._get_descriptors().get(0xff)
+        return _text(text) if text is not None else None
+
+    @property
+    def detailed_timings(self):
+        """The DetailedTimings of the base block, preferred timing first."""
+        self._get_descriptors()
+        return self._detailed_timings
+
+    @property
+    def num_extensions(self):
+        return self._data[126]
+
+    @property
+    def extensions(self):
+        """The extension blocks (CEA-861 and so on) as ExtensionBlocks."""
+        if self._extensions is None:
+            data = self._data
+            self._extensions = [ExtensionBlock(data[offset], data[offset + 1], bytes(data[offset:offset + EDID_BLOCK_SIZE]))
+                                for offset in range(EDID_BLOCK_SIZE, len(data) - EDID_BLOCK_SIZE + 1, EDID_BLOCK_SIZE)]
+        return self._extensions
+
+class EDIDCache(object):
+    """Raw EDIDs by (adapter index, display index), read once and kept until a hotplug.
+    
+    Each adapter has a hotplug generation, bumped whenever its connected display bitmap
+    changes or by hand with notify_hotplug(); EDIDs read under an older generation are read
+    again. The bitmap costs one cheap ADL_Display_ConnectedDisplays_Get call, made at most
+    every check_interval seconds per adapter (never if check_interval is None), instead of
+    the several DDC reads of an EDID. Safe to use from several threads.
+    """
+    
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self._edids = {}
+        self._generations = {}
+        self._connections = {}
+        self._checked = {}
+        self._displays = {}
+        self._lock = threading.Lock()
+
+    def generation(self, adapter_index):
+        return self._generations.get(adapter_index, 0)
+
+    def notify_hotplug(self, adapter_index=None):
+        """Starts a new generation for one adapter (or all of them), so their EDIDs are read again."""
+        with self._lock:
+            if adapter_index is not None:
+                adapters = [adapter_index]
+            else:
+                # every adapter something is cached for, not just those that have seen a hotplug
+                adapters = (set(self._generations) | set(self._displays) | set(self._checked) |
+                            set(index for index, display_index in self._edids))
+            for index in adapters:
+                self._generations[index] = self._generations.get(index, 0) + 1
+
+    def check(self, adapter_index):
+        """Compares the adapter's connected displays with the last check, starting a new
+        generation if they changed. Returns the current generation."""
+        connections = c_int()
+        try:
+            ADL_Display_ConnectedDisplays_Get(adapter_index, byref(connections))
+        except ADLError:
+            return self.generation(adapter_index)
+        
+        with self._lock:
+            self._checked[adapter_index] = _clock()
+            previous = self._connections.get(adapter_index)
+            self._connections[adapter_index] = connections.value
+            if previous is not None and previous != connections.value:
+                self._generations[adapter_index] = self._generations.get(adapter_index, 0) + 1
+            return self._generations.get(adapter_index, 0)
+
+    def _current_generation(self, adapter_index):
+        if self.check_interval is not None:
+            checked = self._checked.get(adapter_index)
+            if checked is None or _clock() - checked >= self.check_interval:
+                return self.check(adapter_index)
+        return self.generation(adapter_index)
+
+    def displays(self, adapter_index, refresh=False):
+        """The indexes of the displays connected to an adapter, cached per generation."""
+        generation = self._current_generation(adapter_index)
+        cached = self._displays.get(adapter_index)
+        if cached is not None and cached[0] == generation and not refresh:
+            return cached[1]
+        
+        num_displays = c_int()
+        with ADLBuffer(ADLDisplayInfo) as display_info:
+            ADL_Display_DisplayInfo_Get(adapter_index, byref(num_displays), display_info.ref, 0)
+            display_info.count = num_displays.value
+            displays = [info.displayID.iDisplayLogicalIndex for info in display_info
+                        if info.iDisplayInfoValue & ADL_DISPLAY_DISPLAYINFO_DISPLAYCONNECTED]
+        
+        with self._lock:
+            self._displays[adapter_index] = (generation, displays)
+        return displays
+
+    def get(self, adapter_index, display_index, refresh=False):
+        """The EDID of a display, read from the driver only if it isn't cached for the adapter's
+        current generation."""
+        generation = self._current_generation(adapter_index)
+        key = (adapter_index, display_index)
+        cached = self._edids.get(key)
+        if cached is not None and cached[0] == generation and not refresh:
+            return cached[1]
+        return self._read(key, generation)
+
+    def get_raw(self, adapter_index, display_index, refresh=False):
+        return self.get(adapter_index, display_index, refresh).raw
+
+    def _read(self, key, generation):
+        edid = EDID(_read_edid(*key))
+        with self._lock:
+            self._edids[key] = (generation, edid)
+        return edid
+
+    def get_all(self, adapters):
+        """Returns {(adapter index, display index): EDID} for every connected display of the
+        given adapters (AdapterInfos or adapter indexes). Displays whose EDID can't be read
+        are left out."""
+        edids = {}
+        for adapter in adapters:
+            adapter_index = getattr(adapter, "iAdapterIndex", adapter)
+            for display_index in self.displays(adapter_index):
+                try:
+                    edids[adapter_index, display_index] = self.get(adapter_index, display_index)
+                except ADLError:
+                    pass
+        return edids
+
+    def clear(self):
+        with self._lock:
+            self._edids.clear()
+            self._displays.clear()
+            self._checked.clear()
+
+# shared by everything in the process that reads EDIDs
+default_edid_cache = EDIDCache()
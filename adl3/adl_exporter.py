@@ -0,0 +1,235 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import socket
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+from .adl_api import ADLError
+from .adl_snapshot import snapshot, SNAPSHOT_COLUMNS, SNAPSHOT_MISSING
+
+# prefer a monotonic clock for scheduling and staleness, so wall clock adjustments don't skew them
+_clock = getattr(time, "monotonic", time.time)
+
+# (snapshot column, metric name, divisor from the driver's units, help)
+_METRICS = [
+    ("engine_clock", "adl_engine_clock_mhz", 100.0, "Current engine clock in MHz."),
+    ("memory_clock", "adl_memory_clock_mhz", 100.0, "Current memory clock in MHz."),
+    ("vddc", "adl_core_voltage_volts", 1000.0, "Current core voltage in volts."),
+    ("activity", "adl_utilization_percent", 1, "GPU utilization in percent."),
+    ("performance_level", "adl_performance_level", 1, "Current performance level."),
+    ("bus_speed", "adl_pcie_bus_speed", 1, "Current PCIe bus speed as reported by the driver."),
+    ("bus_lanes", "adl_pcie_lanes", 1, "Current number of PCIe lanes."),
+    ("max_bus_lanes", "adl_pcie_max_lanes", 1, "Maximum number of PCIe lanes."),
+    ("fan_percent", "adl_fan_speed_percent", 1, "Fan speed in percent."),
+    ("fan_rpm", "adl_fan_speed_rpm", 1, "Fan speed in RPM."),
+    ("temperature", "adl_temperature_celsius", 1000.0, "GPU temperature in degrees Celsius."),
+    ("powertune", "adl_powertune_percent", 1, "Powertune level in percent."),
+]
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+def _escape_label(value):
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "replace")
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def parse_address(address):
+    """Parses "host:port", ":port" or "[ipv6 address]:port" into a (host, port) tuple for the
+    HTTP server. Raises ValueError if address isn't one of those."""
+    host, sep, port = address.rpartition(":")
+    if host.startswith("[") and host.endswith("]"):
+        host = host[1:-1]
+    elif ":" in host:
+        raise ValueError("Invalid address '%s'; put an IPv6 address in brackets, e.g. [::1]:9400" % address)
+    try:
+        return host, int(port)
+    except ValueError:
+        raise ValueError("Invalid address '%s'; expected [HOST]:PORT" % address)
+
+class MetricsExporter(object):
+    """Serves Prometheus/OpenMetrics metrics for a list of adapters from a background sampler.
+    
+    A single background thread takes a snapshot every interval seconds and renders it once;
+    scrapes only ever return the last rendering and never call into ADL. If the last successful
+    sample is older than max_age seconds (three intervals by default), scrapes get a 503.
+    Samples that fail with an ADLError are counted in errors (and adl_sample_errors_total),
+    and the message of the last one is kept in last_error.
+    """
+    
+    def __init__(self, adapters, interval=1.0, max_age=None, labels=None):
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0, not %r" % (interval,))
+        self.adapters = list(adapters)
+        self.interval = interval
+        self.max_age = max_age if max_age is not None else 3 * interval
+        
+        # label sets are fixed for the life of the exporter, so format them once
+        if labels is None:
+            labels = [{"adapter": str(index),
+                       "name": info.strAdapterName,
+                       "bus": str(info.iBusNumber)} for index, info in enumerate(self.adapters)]
+        self._labels = ["{" + ",".join('%s="%s"' % (key, _escape_label(value))
+                                       for key, value in sorted(label_set.items())) + "}"
+                        for label_set in labels]
+        self._columns = [(SNAPSHOT_COLUMNS.index(column), name, divisor,
+                          "# HELP %s %s\n# TYPE %s gauge\n" % (name, help, name))
+                         for column, name, divisor, help in _METRICS]
+        
+        self._rendered = None
+        self._sampled_at = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.samples = 0
+        self.errors = 0
+        self.last_error = None
+
+    def render(self, status, duration, openmetrics=False):
+        """Renders a snapshot in the Prometheus text format, or in OpenMetrics (without the
+        closing "# EOF") if openmetrics is True."""
+        return self._render_gauges(status, duration) + self._render_errors(openmetrics)
+
+    def _render_gauges(self, status, duration):
+        lines = []
+        num_columns = len(SNAPSHOT_COLUMNS)
+        data = status.data
+        for column, name, divisor, header in self._columns:
+            lines.append(header)
+            for row, labels in enumerate(self._labels):
+                value = data[row * num_columns + column]
+                if value != SNAPSHOT_MISSING:
+                    lines.append("%s%s %r\n" % (name, labels, value / divisor if divisor != 1 else value))
+        
+        lines.append("# HELP adl_sample_timestamp_seconds When the metrics were sampled.\n"
+                     "# TYPE adl_sample_timestamp_seconds gauge\n"
+                     "adl_sample_timestamp_seconds %.3f\n" % status.timestamp)
+        lines.append("# HELP adl_sample_duration_seconds How long sampling all adapters took.\n"
+                     "# TYPE adl_sample_duration_seconds gauge\n"
+                     "adl_sample_duration_seconds %.6f\n" % duration)
+        return "".join(lines).encode("utf-8")
+
+    def _render_errors(self, openmetrics):
+        # an OpenMetrics counter family is named without the _total its sample carries
+        family = "adl_sample_errors" if openmetrics else "adl_sample_errors_total"
+        return ("# HELP %s Samples that failed with an ADL error.\n"
+                "# TYPE %s counter\n"
+                "adl_sample_errors_total %d\n" % (family, family, self.errors)).encode("utf-8")
+
+    def _sample(self):
+        status = None
+        next_tick = _clock()
+        
+        while not self._stop.is_set():
+            start = _clock()
+            try:
+                status = snapshot(self.adapters, out=status)
+            except ADLError as err:
+                self.errors += 1
+                self.last_error = str(err)
+            else:
+                gauges = self._render_gauges(status, _clock() - start)
+                # swap in the new renderings and their time together; scrapes read them without locking
+                self._rendered = (gauges + self._render_errors(False), gauges + self._render_errors(True), _clock())
+                self.samples += 1
+            
+            next_tick += self.interval
+            delay = next_tick - _clock()
+            if delay < 0:
+                # we overran; skip the missed ticks rather than sampling back-to-back to catch up
+                next_tick += (int(-delay / self.interval) + 1) * self.interval
+                delay = next_tick - _clock()
+            self._stop.wait(delay)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="adl3-exporter-sampler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def metrics(self, openmetrics=False):
+        """Returns the last rendered metrics, or None if there are none or they are older than max_age."""
+        rendered = self._rendered
+        if rendered is None or _clock() - rendered[2] > self.max_age:
+            return None
+        return rendered[1] if openmetrics else rendered[0]
+
+    def make_server(self, address):
+        exporter = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self._reply(404, "text/plain; charset=utf-8", b"Not found. Metrics are at /metrics.\n")
+                    return
+                
+                openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+                body = exporter.metrics(openmetrics)
+                if body is None:
+                    message = "Metrics are stale or not sampled yet."
+                    if exporter.last_error is not None:
+                        message += " Last error: %s" % exporter.last_error
+                    self._reply(503, "text/plain; charset=utf-8", (message + "\n").encode("utf-8"))
+                elif openmetrics:
+                    self._reply(200, OPENMETRICS_CONTENT_TYPE, body + b"# EOF\n")
+                else:
+                    self._reply(200, PROMETHEUS_CONTENT_TYPE, body)
+
+            def _reply(self, code, content_type, body):
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # don't write a log line for every scrape
+                pass
+        
+        class Server(ThreadingMixIn, HTTPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+            address_family = socket.AF_INET6 if ":" in address[0] else socket.AF_INET
+        
+        return Server(address, Handler)
+
+    def serve_forever(self, address):
+        """Starts sampling and serves /metrics on address, a (host, port) tuple, until interrupted."""
+        server = self.make_server(address)
+        self.start()
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self.stop()
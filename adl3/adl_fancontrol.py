@@ -0,0 +1,222 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import time
+from bisect import bisect_right
+
+from .adl_api import ADLError
+from .adl_overdrive import get_temperature, get_fan_speed_info, set_fan_speed, set_fan_speed_default
+from .adl_structures import StructurePool
+
+_clock = getattr(time, "monotonic", time.time)
+
+class FanCurve(object):
+    """A piecewise-linear map from temperature (degrees C) to fan speed (percent).
+    
+    Below the first point and above the last one the curve is flat.
+    """
+    
+    __slots__ = ["temperatures", "percents"]
+    
+    def __init__(self, points):
+        points = [(float(temperature), float(percent)) for temperature, percent in points]
+        if not points:
+            raise ValueError("A fan curve needs at least one point.")
+        if any(a[0] >= b[0] for a, b in zip(points, points[1:])):
+            raise ValueError("Fan curve temperatures must be increasing.")
+        self.temperatures = [temperature for temperature, percent in points]
+        self.percents = [percent for temperature, percent in points]
+
+    @classmethod
+    def parse(cls, text):
+        """Parses "TEMP:PERCENT,TEMP:PERCENT,...", e.g. "50:30,70:60,85:100"."""
+        try:
+            return cls([point.split(":") for point in text.split(",")])
+        except (TypeError, ValueError):
+            raise ValueError("Invalid fan curve '%s'; expected TEMP:PERCENT,TEMP:PERCENT,..." % text)
+
+    @property
+    def max_percent(self):
+        return max(self.percents)
+
+    def __call__(self, temperature):
+        temperatures = self.temperatures
+        position = bisect_right(temperatures, temperature)
+        if position == 0:
+            return self.percents[0]
+        if position == len(temperatures):
+            return self.percents[-1]
+        t0, t1 = temperatures[position - 1], temperatures[position]
+        p0, p1 = self.percents[position - 1], self.percents[position]
+        return p0 + (p1 - p0) * (temperature - t0) / (t1 - t0)
+
+class _FanState(object):
+    
+    __slots__ = ["adapter_index", "curve", "min_percent", "max_percent",
+                 "reference", "percent", "written_at"]
+    
+    def __init__(self, adapter_index, curve, fan_speed_info):
+        self.adapter_index = adapter_index
+        self.curve = curve
+        self.min_percent = fan_speed_info.iMinPercent
+        self.max_percent = fan_speed_info.iMaxPercent
+        self.reference = None
+        self.percent = None
+        self.written_at = None
+
+class FanController(object):
+    """Drives the fans of several adapters from their temperatures.
+    
+    curves maps ADL adapter indexes to FanCurves; a single FanCurve is used for every
+    adapter. Each step():
+    
+      - reads the temperature of every adapter
+      - ignores drops of less than hysteresis degrees C, so a fan doesn't hunt around a
+        curve point
+      - moves the fan by at most max_rate percent per second
+      - only writes when the speed changes by min_change percent or more, or when it
+        reaches the curve's maximum
+    
+    If a temperature can't be read, the fan is set to the curve's maximum. A fan write
+    that fails is left out of step()'s result and kept in errors, and the next step tries
+    again. Adapters whose fan limits (ADL_Overdrive5_FanSpeedInfo_Get) can't be read
+    aren't controlled at all; they're in skipped. close() (or leaving a with block) hands
+    every fan back to the driver's automatic control.
+    """
+    
+    def __init__(self, adapters, curves, hysteresis=3.0, max_rate=10.0, min_change=2.0):
+        adapter_indexes = [getattr(adapter, "iAdapterIndex", adapter) for adapter in adapters]
+        if isinstance(curves, FanCurve):
+            curves = dict((adapter_index, curves) for adapter_index in adapter_indexes)
+        
+        self.hysteresis = hysteresis
+        self.max_rate = max_rate
+        self.min_change = min_change
+        self._pool = StructurePool()
+        # {adapter index: ADLError} of the adapters left out, and of the last step()'s failed writes
+        self.skipped = {}
+        self.errors = {}
+        
+        self._states = []
+        for adapter_index in adapter_indexes:
+            if curves.get(adapter_index) is None:
+                continue
+            try:
+                fan_speed_info = get_fan_speed_info(adapter_index)
+            except ADLError as err:
+                self.skipped[adapter_index] = err
+                continue
+            self._states.append(_FanState(adapter_index, curves[adapter_index], fan_speed_info))
+
+    def __len__(self):
+        return len(self._states)
+
+    def _target(self, state, now):
+        try:
+            temperature = get_temperature(state.adapter_index, pool=self._pool) / 1000.0
+        except ADLError:
+            return None, state.curve.max_percent
+        
+        if state.reference is None or temperature > state.reference or temperature <= state.reference - self.hysteresis:
+            state.reference = temperature
+        target = state.curve(state.reference)
+        
+        if state.percent is not None and self.max_rate is not None:
+            max_step = self.max_rate * (now - state.written_at)
+            target = max(state.percent - max_step, min(state.percent + max_step, target))
+        
+        return temperature, target
+
+    def step(self, now=None):
+        """Runs one control period; returns [(adapter index, temperature, percent written)]
+        for the fans it changed. temperature is None when it couldn't be read."""
+        if now is None:
+            now = _clock()
+        
+        written = []
+        self.errors = {}
+        for state in self._states:
+            temperature, target = self._target(state, now)
+            percent = int(round(max(state.min_percent, min(state.max_percent, target))))
+            
+            if state.percent is not None:
+                if percent == state.percent:
+                    continue
+                if abs(percent - state.percent) < self.min_change and target < state.curve.max_percent:
+                    continue
+            
+            try:
+                set_fan_speed(state.adapter_index, percent, pool=self._pool)
+            except ADLError as err:
+                self.errors[state.adapter_index] = err
+                continue
+            state.percent = percent
+            state.written_at = now
+            written.append((state.adapter_index, temperature, percent))
+        
+        return written
+
+    def run(self, period=2.0, stop=None, callback=None):
+        """Calls step() every period seconds until stop (a threading.Event) is set, then
+        restores automatic fan control. callback, if given, gets each step's result."""
+        if period <= 0:
+            raise ValueError("period must be greater than 0, not %r" % (period,))
+        next_step = _clock()
+        try:
+            while stop is None or not stop.is_set():
+                written = self.step()
+                if callback is not None:
+                    callback(written)
+                
+                next_step += period
+                delay = next_step - _clock()
+                if delay < 0:
+                    # skip the periods we missed instead of stepping back-to-back
+                    next_step += (int(-delay / period) + 1) * period
+                    delay = next_step - _clock()
+                if stop is not None:
+                    stop.wait(max(0.0, delay))
+                else:
+                    time.sleep(max(0.0, delay))
+        finally:
+            self.close()
+
+    def close(self):
+        """Returns every fan the controller has set to automatic control."""
+        errors = []
+        for state in self._states:
+            if state.percent is None:
+                continue
+            try:
+                set_fan_speed_default(state.adapter_index)
+            except ADLError as err:
+                errors.append("adapter %d: %s" % (state.adapter_index, err))
+            state.percent = None
+            state.reference = None
+        if errors:
+            raise ADLError("Couldn't restore default fan control: %s" % "; ".join(errors))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
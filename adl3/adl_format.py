@@ -0,0 +1,176 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import json
+
+from .adl_snapshot import SNAPSHOT_MISSING
+
+try:
+    _string_types = basestring
+except NameError:
+    _string_types = str
+
+FORMATS = ("json", "ndjson", "csv")
+
+# Field layout of a status record: snapshot values converted to MHz, VDC and degrees C.
+STATUS_FIELDS = [
+    ("timestamp", float),
+    ("adapter", int),
+    ("adapter_index", int),
+    ("engine_clock", float),
+    ("memory_clock", float),
+    ("core_voltage", float),
+    ("utilization", int),
+    ("performance_level", int),
+    ("bus_speed", int),
+    ("bus_lanes", int),
+    ("max_bus_lanes", int),
+    ("fan_speed_percent", int),
+    ("fan_speed_rpm", int),
+    ("temperature", float),
+    ("powertune", int),
+]
+
+def status_values(status, row, adapter):
+    """Returns the STATUS_FIELDS values for one row of a Snapshot; adapter is the caller's adapter number."""
+    (adapter_index, engine_clock, memory_clock, vddc, activity, performance_level,
+     bus_speed, bus_lanes, max_bus_lanes, fan_percent, fan_rpm, temperature, powertune) = status.row(row)
+    missing = SNAPSHOT_MISSING
+    
+    if engine_clock == missing:
+        engine_clock = memory_clock = vddc = activity = performance_level = None
+        bus_speed = bus_lanes = max_bus_lanes = None
+    else:
+        engine_clock /= 100.0
+        memory_clock /= 100.0
+        vddc /= 1000.0
+    
+    return (status.timestamp, adapter, adapter_index,
+            engine_clock, memory_clock, vddc, activity, performance_level,
+            bus_speed, bus_lanes, max_bus_lanes,
+            None if fan_percent == missing else fan_percent,
+            None if fan_rpm == missing else fan_rpm,
+            None if temperature == missing else temperature / 1000.0,
+            None if powertune == missing else powertune)
+
+class RecordWriter(object):
+    """Streams records with a fixed field layout to a file object.
+    
+    fields is a list of (name, type) pairs, type being int, float or str. The output line
+    for a record is a format string built once from the layout; records that contain None
+    or strings go through a slower path that formats each value separately.
+    """
+    
+    def __init__(self, stream, fields):
+        self.stream = stream
+        self.fields = list(fields)
+        self._has_strings = any(kind is str for name, kind in self.fields)
+        self._template = self._make_template([self._native_format(kind) for name, kind in self.fields])
+        self._slow_template = self._make_template(["%s"] * len(self.fields))
+        self._open()
+
+    def _native_format(self, kind):
+        return {int: "%d", float: "%r"}.get(kind, "%s")
+
+    def write(self, values):
+        if self._has_strings or None in values:
+            self.stream.write(self._slow_template % tuple(self._format_value(value) for value in values))
+        else:
+            self.stream.write(self._template % tuple(values))
+
+    def write_all(self, records):
+        for values in records:
+            self.write(values)
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+
+    def _open(self):
+        pass
+
+class NDJSONWriter(RecordWriter):
+    """One JSON object per line."""
+    
+    def _make_template(self, formats):
+        return "{" + ",".join("%s:%s" % (json.dumps(name), format)
+                              for (name, kind), format in zip(self.fields, formats)) + "}\n"
+
+    def _format_value(self, value):
+        if value is None:
+            return "null"
+        elif isinstance(value, _string_types):
+            return json.dumps(value)
+        elif isinstance(value, bytes):
+            return json.dumps(value.decode("utf-8", "replace"))
+        return repr(value)
+
+class JSONWriter(NDJSONWriter):
+    """A single JSON array of objects, closed by close()."""
+    
+    def _open(self):
+        self.stream.write("[")
+        self._separator = "\n"
+
+    def write(self, values):
+        self.stream.write(self._separator)
+        self._separator = ",\n"
+        NDJSONWriter.write(self, values)
+
+    def _make_template(self, formats):
+        # the separator goes before each record, so drop the newline NDJSON puts after it
+        return NDJSONWriter._make_template(self, formats)[:-1]
+
+    def close(self):
+        self.stream.write("\n]\n")
+        self.flush()
+
+class CSVWriter(RecordWriter):
+    """A header line with the field names, then one line per record."""
+    
+    def _open(self):
+        self.stream.write(",".join(name for name, kind in self.fields) + "\n")
+
+    def _make_template(self, formats):
+        return ",".join(formats) + "\n"
+
+    def _format_value(self, value):
+        if value is None:
+            return ""
+        if isinstance(value, bytes) and not isinstance(value, _string_types):
+            value = value.decode("utf-8", "replace")
+        if isinstance(value, _string_types):
+            if any(char in value for char in ",\"\r\n"):
+                return "\"" + value.replace("\"", "\"\"") + "\""
+            return value
+        return repr(value)
+
+def make_writer(format, stream, fields):
+    """Returns a RecordWriter for format, one of FORMATS."""
+    if format == "json":
+        return JSONWriter(stream, fields)
+    elif format == "ndjson":
+        return NDJSONWriter(stream, fields)
+    elif format == "csv":
+        return CSVWriter(stream, fields)
+    raise ValueError("Unknown format '%s'." % format)
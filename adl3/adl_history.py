@@ -0,0 +1,264 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from array import array
+from collections import namedtuple
+
+from .adl_snapshot import SNAPSHOT_COLUMNS, SNAPSHOT_MISSING
+
+# every snapshot column but adapter_index, in the driver's own units
+HISTORY_METRICS = SNAPSHOT_COLUMNS[1:]
+
+_NUM_METRICS = len(HISTORY_METRICS)
+_METRIC_INDEX = dict((name, index) for index, name in enumerate(HISTORY_METRICS))
+
+# resolutions (bucket width in seconds, number of buckets) kept next to the raw samples:
+# an hour of 10s buckets and a day of 1 minute buckets
+DEFAULT_TIERS = ((10.0, 360), (60.0, 1440))
+
+_INT_MAX = 2147483647
+
+WindowStats = namedtuple("WindowStats", "min max mean count resolution")
+
+class _RawRing(object):
+    # the last capacity samples, row-major in one array('i') like a Snapshot
+    
+    __slots__ = ["capacity", "timestamps", "values", "head", "size"]
+    
+    resolution = 0.0
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = array("d", [0.0]) * capacity
+        self.values = array("i", [SNAPSHOT_MISSING]) * (capacity * _NUM_METRICS)
+        self.head = 0
+        self.size = 0
+
+    def append(self, timestamp, data, offset):
+        head = self.head
+        self.timestamps[head] = timestamp
+        base = head * _NUM_METRICS
+        self.values[base:base + _NUM_METRICS] = data[offset:offset + _NUM_METRICS]
+        self.head = (head + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def oldest(self):
+        if not self.size:
+            return None
+        return self.timestamps[(self.head - self.size) % self.capacity]
+
+    def scan(self, metric, cutoff):
+        # yields (timestamp, min, max, sum, count) newest first, down to cutoff
+        values = self.values
+        timestamps = self.timestamps
+        capacity = self.capacity
+        slot = self.head
+        for _ in range(self.size):
+            slot = (slot - 1) % capacity
+            timestamp = timestamps[slot]
+            if timestamp < cutoff:
+                break
+            value = values[slot * _NUM_METRICS + metric]
+            if value != SNAPSHOT_MISSING:
+                yield timestamp, value, value, value, 1
+
+class _BucketRing(object):
+    # per-bucket min/max/sum/count of every metric over fixed-width time buckets
+    
+    __slots__ = ["resolution", "capacity", "starts", "mins", "maxs", "sums", "counts",
+                 "head", "size", "key"]
+    
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.starts = array("d", [0.0]) * capacity
+        self.mins = array("i", [_INT_MAX]) * (capacity * _NUM_METRICS)
+        self.maxs = array("i", [SNAPSHOT_MISSING]) * (capacity * _NUM_METRICS)
+        self.sums = array("d", [0.0]) * (capacity * _NUM_METRICS)
+        self.counts = array("i", [0]) * (capacity * _NUM_METRICS)
+        self.head = 0
+        self.size = 0
+        self.key = None
+
+    def append(self, timestamp, data, offset):
+        key = int(timestamp // self.resolution)
+        
+        # start a new bucket when the sample falls past the current one; samples from a
+        # clock that stepped backwards are folded into the current bucket
+        if self.key is None or key > self.key:
+            if self.size:
+                self.head = (self.head + 1) % self.capacity
+            if self.size < self.capacity:
+                self.size += 1
+            self.key = key
+            self.starts[self.head] = key * self.resolution
+            
+            base = self.head * _NUM_METRICS
+            for index in range(base, base + _NUM_METRICS):
+                self.mins[index] = _INT_MAX
+                self.maxs[index] = SNAPSHOT_MISSING
+                self.sums[index] = 0.0
+                self.counts[index] = 0
+        
+        base = self.head * _NUM_METRICS
+        mins, maxs, sums, counts = self.mins, self.maxs, self.sums, self.counts
+        for metric in range(_NUM_METRICS):
+            value = data[offset + metric]
+            if value != SNAPSHOT_MISSING:
+                index = base + metric
+                if value < mins[index]:
+                    mins[index] = value
+                if value > maxs[index]:
+                    maxs[index] = value
+                sums[index] += value
+                counts[index] += 1
+
+    def oldest(self):
+        if not self.size:
+            return None
+        return self.starts[(self.head - self.size + 1) % self.capacity]
+
+    def scan(self, metric, cutoff):
+        # a bucket is included when any part of it falls inside the window
+        capacity = self.capacity
+        slot = self.head
+        for _ in range(self.size):
+            start = self.starts[slot]
+            if start + self.resolution <= cutoff:
+                break
+            index = slot * _NUM_METRICS + metric
+            count = self.counts[index]
+            if count:
+                yield start, self.mins[index], self.maxs[index], self.sums[index], count
+            slot = (slot - 1) % capacity
+
+class _AdapterHistory(object):
+    
+    __slots__ = ["rings", "latest"]
+    
+    def __init__(self, raw_capacity, tiers):
+        self.rings = [_RawRing(raw_capacity)] + [_BucketRing(resolution, capacity)
+                                                  for resolution, capacity in tiers]
+        self.latest = None
+
+    def append(self, timestamp, data, offset):
+        for ring in self.rings:
+            ring.append(timestamp, data, offset)
+        self.latest = timestamp
+
+class History(object):
+    """Fixed-memory telemetry history, fed from Snapshots.
+    
+    Every adapter keeps the last raw_capacity samples plus one ring of downsampled buckets
+    per (bucket width in seconds, number of buckets) pair in tiers, so memory use is set
+    when an adapter is first seen and doesn't grow with uptime. Adapters are keyed by ADL
+    adapter index; values are in the driver's units, as in a Snapshot.
+    """
+    
+    def __init__(self, raw_capacity=600, tiers=DEFAULT_TIERS):
+        self.raw_capacity = raw_capacity
+        self.tiers = tuple(sorted(tiers))
+        self._adapters = {}
+
+    def __contains__(self, adapter_index):
+        return adapter_index in self._adapters
+
+    def adapters(self):
+        return sorted(self._adapters)
+
+    def append(self, snapshot):
+        """Records every row of snapshot under its timestamp."""
+        data = snapshot.data
+        timestamp = snapshot.timestamp
+        stride = _NUM_METRICS + 1
+        
+        for offset in range(0, snapshot.num_adapters * stride, stride):
+            adapter_index = data[offset]
+            history = self._adapters.get(adapter_index)
+            if history is None:
+                history = self._adapters[adapter_index] = _AdapterHistory(self.raw_capacity, self.tiers)
+            # skip the adapter_index column
+            history.append(timestamp, data, offset + 1)
+
+    def _select(self, adapter_index, seconds, now, resolution):
+        history = self._adapters[adapter_index]
+        if now is None:
+            now = history.latest
+        cutoff = now - seconds if seconds is not None else float("-inf")
+        
+        if resolution is not None:
+            for ring in history.rings:
+                if ring.resolution == resolution:
+                    return ring, cutoff
+            raise ValueError("No history kept at %gs resolution." % resolution)
+        
+        # the finest ring that still reaches back to the start of the window, or the
+        # coarsest one if none does
+        for ring in history.rings:
+            oldest = ring.oldest()
+            if oldest is None or oldest <= cutoff or ring.size < ring.capacity:
+                return ring, cutoff
+        return history.rings[-1], cutoff
+
+    def window(self, adapter_index, metric, seconds=None, now=None, resolution=None):
+        """Returns WindowStats for metric over the last seconds (everything kept if None).
+        
+        The window ends at now, which defaults to the adapter's latest sample. Without an
+        explicit resolution the finest one covering the whole window is used. min, max and
+        mean are None when no readings fall inside the window.
+        """
+        ring, cutoff = self._select(adapter_index, seconds, now, resolution)
+        
+        minimum = _INT_MAX
+        maximum = SNAPSHOT_MISSING
+        total = 0.0
+        count = 0
+        for timestamp, low, high, subtotal, subcount in ring.scan(_METRIC_INDEX[metric], cutoff):
+            if low < minimum:
+                minimum = low
+            if high > maximum:
+                maximum = high
+            total += subtotal
+            count += subcount
+        
+        if not count:
+            return WindowStats(None, None, None, 0, ring.resolution)
+        return WindowStats(minimum, maximum, total / count, count, ring.resolution)
+
+    def series(self, adapter_index, metric, seconds=None, now=None, resolution=None):
+        """Returns [(timestamp, value)] oldest first; downsampled values are bucket means."""
+        ring, cutoff = self._select(adapter_index, seconds, now, resolution)
+        points = [(timestamp, subtotal / subcount)
+                  for timestamp, low, high, subtotal, subcount in ring.scan(_METRIC_INDEX[metric], cutoff)]
+        points.reverse()
+        return points
+
+    def nbytes(self):
+        """The memory held by the history arrays."""
+        total = 0
+        for history in self._adapters.values():
+            for ring in history.rings:
+                for name in ("timestamps", "values", "starts", "mins", "maxs", "sums", "counts"):
+                    column = getattr(ring, name, None)
+                    if column is not None:
+                        total += len(column) * column.itemsize
+        return total
@@ -0,0 +1,133 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from ctypes import POINTER, addressof, byref, cast, c_void_p
+
+from . import adl_api
+
+# ADL returns variable-length results (modes, display maps, targets, SLS grids, ...) in buffers it
+# allocates with the ADL_Main_Memory_Alloc callback passed to ADL_Main_Control_Create, and the
+# caller has to free them. ADLBuffer owns one such buffer; an Arena owns all the buffers of, say,
+# one polling cycle and frees them together.
+
+def outstanding_allocations():
+    """The number of ADL-allocated buffers that haven't been freed."""
+    return len(adl_api._allocations)
+
+def outstanding_bytes():
+    """The total size of the ADL-allocated buffers that haven't been freed."""
+    with adl_api._allocations_lock:
+        return sum(adl_api._allocations.values())
+
+def free(pointer):
+    """Frees the ADL-allocated buffer a ctypes pointer points to (NULL is fine) and resets it to NULL."""
+    address = cast(pointer, c_void_p).value
+    if address:
+        adl_api._free_adl_memory(address)
+        c_void_p.from_address(addressof(pointer)).value = None
+
+class ADLBuffer(object):
+    """Owns one buffer of structures of the given type that ADL allocates.
+    
+    Pass ref to the ADL function in place of byref(POINTER(type)()), and set count to the
+    number of entries it reports. The buffer is freed by free(), at the end of a with block,
+    or when the ADLBuffer is garbage collected, whichever comes first.
+    """
+    
+    __slots__ = ["type", "pointer", "count"]
+    
+    def __init__(self, type, count=0):
+        self.type = type
+        self.pointer = POINTER(type)()
+        self.count = count
+
+    def __repr__(self):
+        return "<ADLBuffer of %d %s at 0x%x>" % (self.count, self.type.__name__,
+                                                  cast(self.pointer, c_void_p).value or 0)
+
+    @property
+    def ref(self):
+        return byref(self.pointer)
+
+    def __bool__(self):
+        return bool(self.pointer)
+
+    __nonzero__ = __bool__
+
+    def __len__(self):
+        return self.count if self.pointer else 0
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError("ADLBuffer index out of range")
+        return self.pointer[index]
+
+    def __iter__(self):
+        pointer = self.pointer
+        for index in range(len(self)):
+            yield pointer[index]
+
+    def free(self):
+        free(self.pointer)
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.free()
+
+    def __del__(self):
+        # a partly constructed buffer has no pointer yet
+        if getattr(self, "pointer", None) is not None:
+            self.free()
+
+class Arena(object):
+    """Hands out ADLBuffers and frees them all at once with release() or at the end of a
+    with block, e.g. once per polling cycle. The arena can be reused after release().
+    Structures read from its buffers must be copied out before then."""
+    
+    def __init__(self):
+        self._buffers = []
+
+    def buffer(self, type, count=0):
+        buffer = ADLBuffer(type, count)
+        self._buffers.append(buffer)
+        return buffer
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def nbytes(self):
+        """The bytes held by the arena's buffers that ADL has filled in so far."""
+        with adl_api._allocations_lock:
+            return sum(adl_api._allocations.get(cast(buffer.pointer, c_void_p).value, 0) for buffer in self._buffers)
+
+    def release(self):
+        buffers, self._buffers = self._buffers, []
+        for buffer in buffers:
+            buffer.free()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.release()
@@ -0,0 +1,220 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from ctypes import byref, c_int
+
+from .adl_structures import ADLMode, ADLDisplayMap, ADLDisplayTarget
+from .adl_memory import ADLBuffer, Arena
+from .adl_api import (ADL_Display_Modes_Get,
+                      ADL_Display_DisplayMapConfig_Get)
+
+Mode = namedtuple("Mode", "display_index xres yres refresh_rate colour_depth orientation")
+
+def _resolution_key(xres, yres):
+    return (xres << 16) | yres
+
+def _single(value):
+    # ADLMode.fRefreshRate, and so the catalog's array("f") of rates, is single precision:
+    # 59.94 is stored as 59.939998626..., below the double 59.94
+    return array("f", [value])[0]
+
+def display_map_signature(adapter_index):
+    """A hashable summary of an adapter's display maps (mode, position and targets of each), for
+    telling whether the display configuration changed."""
+    num_maps = c_int()
+    num_targets = c_int()
+    with Arena() as arena:
+        maps = arena.buffer(ADLDisplayMap)
+        targets = arena.buffer(ADLDisplayTarget)
+        ADL_Display_DisplayMapConfig_Get(adapter_index, byref(num_maps), maps.ref, byref(num_targets), targets.ref, 0)
+        maps.count = num_maps.value
+        targets.count = num_targets.value
+        
+        signature = []
+        for display_map in maps:
+            mode = display_map.displayMode
+            signature.append((display_map.iDisplayMapIndex, mode.iXPos, mode.iYPos, mode.iXRes, mode.iYRes,
+                              round(mode.fRefreshRate, 2), mode.iColourDepth, mode.iOrientation))
+        for target in targets:
+            signature.append((target.iDisplayMapIndex, target.displayID.iDisplayLogicalAdapterIndex,
+                              target.displayID.iDisplayLogicalIndex))
+        return tuple(signature)
+
+class _DisplayModes(object):
+    # one display's modes as parallel columns, sorted by (xres, yres, refresh rate, colour depth),
+    # with sorted permutations for looking them up by refresh rate or colour depth
+    
+    __slots__ = ["resolution", "xres", "yres", "refresh_rate", "colour_depth", "orientation",
+                 "by_refresh_rate", "refresh_rate_keys", "by_colour_depth", "colour_depth_keys"]
+    
+    def __init__(self, rows):
+        rows.sort()
+        self.resolution = array("l", [_resolution_key(row[0], row[1]) for row in rows])
+        self.xres = array("i", [row[0] for row in rows])
+        self.yres = array("i", [row[1] for row in rows])
+        self.refresh_rate = array("f", [row[2] for row in rows])
+        self.colour_depth = array("i", [row[3] for row in rows])
+        self.orientation = array("i", [row[4] for row in rows])
+        
+        self.by_refresh_rate = array("i", sorted(range(len(rows)), key=lambda row: rows[row][2]))
+        self.refresh_rate_keys = array("f", [rows[row][2] for row in self.by_refresh_rate])
+        self.by_colour_depth = array("i", sorted(range(len(rows)), key=lambda row: rows[row][3]))
+        self.colour_depth_keys = array("i", [rows[row][3] for row in self.by_colour_depth])
+
+    def __len__(self):
+        return len(self.xres)
+
+    def resolution_range(self, xres, yres):
+        key = _resolution_key(xres, yres)
+        return bisect_left(self.resolution, key), bisect_right(self.resolution, key)
+
+class ModeCatalog(object):
+    """The modes ADL_Display_Modes_Get reports for an adapter's displays, copied once into
+    compact per-display columns so lookups don't go back to the driver.
+    
+    The ADL buffer is freed (see adl_memory) as soon as it's copied. Modes are indexed by resolution, refresh
+    rate and colour depth, so find() and the per-key queries are binary searches. The catalog
+    remembers the adapter's display map; refresh_if_changed() reloads only if that changed.
+    """
+    
+    def __init__(self, adapter_index, load=True):
+        self.adapter_index = getattr(adapter_index, "iAdapterIndex", adapter_index)
+        self._displays = {}
+        self._signature = None
+        if load:
+            self.refresh()
+
+    def refresh(self):
+        """Reloads the modes (and the display map they belong to) from the driver."""
+        self._signature = display_map_signature(self.adapter_index)
+        
+        num_modes = c_int()
+        rows = {}
+        with ADLBuffer(ADLMode) as modes:
+            ADL_Display_Modes_Get(self.adapter_index, -1, byref(num_modes), modes.ref)
+            modes.count = num_modes.value
+            for mode in modes:
+                rows.setdefault(mode.displayID.iDisplayLogicalIndex, []).append(
+                    (mode.iXRes, mode.iYRes, mode.fRefreshRate, mode.iColourDepth, mode.iOrientation))
+        
+        # the driver can list a mode more than once; keep one copy
+        self._displays = dict((display_index, _DisplayModes(list(set(display_rows))))
+                              for display_index, display_rows in rows.items())
+
+    def changed(self):
+        """Returns True if the adapter's display map differs from the one the modes were loaded for."""
+        return display_map_signature(self.adapter_index) != self._signature
+
+    def refresh_if_changed(self):
+        """Refreshes if the display map changed. Returns True if the modes were reloaded."""
+        if not self.changed():
+            return False
+        self.refresh()
+        return True
+
+    def displays(self):
+        return sorted(self._displays)
+
+    def __len__(self):
+        return sum(len(table) for table in self._displays.values())
+
+    def _mode(self, display_index, table, row):
+        return Mode(display_index, table.xres[row], table.yres[row], table.refresh_rate[row],
+                    table.colour_depth[row], table.orientation[row])
+
+    def modes(self, display_index):
+        """Every mode of a display, sorted by resolution, refresh rate and colour depth."""
+        table = self._displays.get(display_index)
+        if table is None:
+            return []
+        return [self._mode(display_index, table, row) for row in range(len(table))]
+
+    def resolutions(self, display_index):
+        """The distinct (xres, yres) of a display, smallest first."""
+        table = self._displays.get(display_index)
+        if table is None:
+            return []
+        resolutions = []
+        previous = None
+        for key in table.resolution:
+            if key != previous:
+                resolutions.append((key >> 16, key & 0xffff))
+                previous = key
+        return resolutions
+
+    def with_resolution(self, display_index, xres, yres):
+        table = self._displays.get(display_index)
+        if table is None:
+            return []
+        low, high = table.resolution_range(xres, yres)
+        return [self._mode(display_index, table, row) for row in range(low, high)]
+
+    def with_refresh_rate(self, display_index, refresh_rate, tolerance=0.5):
+        """The modes of a display within tolerance Hz of refresh_rate."""
+        table = self._displays.get(display_index)
+        if table is None:
+            return []
+        # compare like with like, or an exact match on a rate like 59.94 would fall outside the range
+        low = bisect_left(table.refresh_rate_keys, _single(refresh_rate - tolerance))
+        high = bisect_right(table.refresh_rate_keys, _single(refresh_rate + tolerance))
+        return [self._mode(display_index, table, table.by_refresh_rate[index]) for index in range(low, high)]
+
+    def with_colour_depth(self, display_index, colour_depth):
+        table = self._displays.get(display_index)
+        if table is None:
+            return []
+        low = bisect_left(table.colour_depth_keys, colour_depth)
+        high = bisect_right(table.colour_depth_keys, colour_depth)
+        return [self._mode(display_index, table, table.by_colour_depth[index]) for index in range(low, high)]
+
+    def find(self, display_index, xres, yres, refresh_rate=None, colour_depth=None):
+        """The best mode of a display at exactly xres x yres, or None if there is none: the
+        refresh rate closest to refresh_rate (the highest if it's None; ties go to the higher
+        rate), then colour_depth if that rate has it, or else the deepest colour."""
+        table = self._displays.get(display_index)
+        if table is None:
+            return None
+        low, high = table.resolution_range(xres, yres)
+        if low == high:
+            return None
+        
+        # rows low..high are sorted by refresh rate, then colour depth
+        rates = table.refresh_rate
+        if refresh_rate is None:
+            rate = rates[high - 1]
+        else:
+            index = bisect_left(rates, refresh_rate, low, high)
+            candidates = [rates[row] for row in (index - 1, index) if low <= row < high]
+            rate = min(candidates, key=lambda candidate: (abs(candidate - refresh_rate), -candidate))
+        rate_low = bisect_left(rates, rate, low, high)
+        rate_high = bisect_right(rates, rate, low, high)
+        
+        # within one rate the rows are sorted by colour depth
+        row = rate_high - 1
+        if colour_depth is not None:
+            depths = table.colour_depth
+            index = bisect_left(depths, colour_depth, rate_low, rate_high)
+            if index < rate_high and depths[index] == colour_depth:
+                row = index
+        return self._mode(display_index, table, row)
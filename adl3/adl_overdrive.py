@@ -0,0 +1,133 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from ctypes import byref, cast, c_int, resize, sizeof, POINTER
+
+from .adl_defines import (ADL_DL_FANCTRL_SPEED_TYPE_PERCENT,
+                          ADL_DL_FANCTRL_FLAG_USER_DEFINED_SPEED)
+from .adl_structures import (ADLPMActivity, ADLTemperature, ADLFanSpeedInfo, ADLFanSpeedValue,
+                             ADLODParameters, ADLODPerformanceLevel, ADLODPerformanceLevels, new_structure)
+from .adl_api import (ADL_Overdrive5_CurrentActivity_Get,
+                      ADL_Overdrive5_Temperature_Get,
+                      ADL_Overdrive5_FanSpeedInfo_Get,
+                      ADL_Overdrive5_FanSpeed_Get,
+                      ADL_Overdrive5_FanSpeed_Set,
+                      ADL_Overdrive5_FanSpeedToDefault_Set,
+                      ADL_Overdrive5_ODParameters_Get,
+                      ADL_Overdrive5_ODPerformanceLevels_Get,
+                      ADL_Overdrive5_ODPerformanceLevels_Set,
+                      ADL_Overdrive5_PowerControl_Get,
+                      ADL_Overdrive5_PowerControl_Set)
+
+# Plain blocking wrappers around the Overdrive5 calls; failed calls raise an ADLError subclass.
+# All values are in the driver's units: clocks in 10kHz, vddc in mV, temperature in millidegrees C.
+# Given a StructurePool, the wrappers reuse its structures for the adapter instead of allocating
+# new ones, so a structure they return is overwritten by the next call with the same pool.
+
+def _slot(adapter_index, structure_type, pool, name=None):
+    if pool is None:
+        structure = new_structure(structure_type)
+        return structure, byref(structure)
+    return pool.slot(adapter_index, structure_type, name)
+
+def get_current_activity(adapter_index, pool=None):
+    activity, activity_ref = _slot(adapter_index, ADLPMActivity, pool)
+    
+    ADL_Overdrive5_CurrentActivity_Get(adapter_index, activity_ref)
+    
+    return activity
+
+def get_temperature(adapter_index, thermal_controller_index=0, pool=None):
+    temperature, temperature_ref = _slot(adapter_index, ADLTemperature, pool)
+    
+    ADL_Overdrive5_Temperature_Get(adapter_index, thermal_controller_index, temperature_ref)
+    
+    return temperature.iTemperature
+
+def get_fan_speed_info(adapter_index, thermal_controller_index=0, pool=None):
+    fan_speed_info, fan_speed_info_ref = _slot(adapter_index, ADLFanSpeedInfo, pool)
+    
+    ADL_Overdrive5_FanSpeedInfo_Get(adapter_index, thermal_controller_index, fan_speed_info_ref)
+    
+    return fan_speed_info
+
+def get_fan_speed(adapter_index, speed_type=ADL_DL_FANCTRL_SPEED_TYPE_PERCENT, thermal_controller_index=0, pool=None):
+    fan_speed_value, fan_speed_value_ref = _slot(adapter_index, ADLFanSpeedValue, pool)
+    fan_speed_value.iSpeedType = speed_type
+    
+    ADL_Overdrive5_FanSpeed_Get(adapter_index, thermal_controller_index, fan_speed_value_ref)
+    
+    return fan_speed_value
+
+def set_fan_speed(adapter_index, fan_speed, thermal_controller_index=0, pool=None):
+    fan_speed_value, fan_speed_value_ref = _slot(adapter_index, ADLFanSpeedValue, pool, "set")
+    fan_speed_value.iSpeedType = ADL_DL_FANCTRL_SPEED_TYPE_PERCENT
+    fan_speed_value.iFanSpeed = fan_speed
+    fan_speed_value.iFlags = ADL_DL_FANCTRL_FLAG_USER_DEFINED_SPEED
+    
+    ADL_Overdrive5_FanSpeed_Set(adapter_index, thermal_controller_index, fan_speed_value_ref)
+
+def set_fan_speed_default(adapter_index, thermal_controller_index=0):
+    ADL_Overdrive5_FanSpeedToDefault_Set(adapter_index, thermal_controller_index)
+
+def get_power_control(adapter_index, pool=None):
+    """Returns the current and default powertune levels, in percent."""
+    powertune_level_value, powertune_level_value_ref = _slot(adapter_index, c_int, pool, "powertune")
+    powertune_default_value, powertune_default_value_ref = _slot(adapter_index, c_int, pool, "powertune_default")
+    
+    ADL_Overdrive5_PowerControl_Get(adapter_index, powertune_level_value_ref, powertune_default_value_ref)
+    
+    return powertune_level_value.value, powertune_default_value.value
+
+def set_power_control(adapter_index, powertune_level):
+    ADL_Overdrive5_PowerControl_Set(adapter_index, powertune_level)
+
+def get_od_parameters(adapter_index, pool=None):
+    od_parameters, od_parameters_ref = _slot(adapter_index, ADLODParameters, pool)
+    
+    ADL_Overdrive5_ODParameters_Get(adapter_index, od_parameters_ref)
+    
+    return od_parameters
+
+def new_performance_levels(num_levels):
+    # ADLODPerformanceLevels ends in a one-element array, so grow it to hold num_levels
+    plevels = ADLODPerformanceLevels()
+    plevels_size = sizeof(ADLODPerformanceLevels) + sizeof(ADLODPerformanceLevel) * (num_levels - 1)
+    resize(plevels, plevels_size)
+    plevels.iSize = plevels_size
+    return plevels
+
+def get_levels(plevels):
+    """Returns an indexable pointer to the ADLODPerformanceLevel entries of plevels.
+    
+    The pointer doesn't keep plevels alive; hold on to plevels for as long as it's used.
+    """
+    return cast(plevels.aLevels, POINTER(ADLODPerformanceLevel))
+
+def get_performance_levels(adapter_index, num_levels, default=False):
+    plevels = new_performance_levels(num_levels)
+    
+    ADL_Overdrive5_ODPerformanceLevels_Get(adapter_index, 1 if default else 0, byref(plevels))
+    
+    return plevels
+
+def set_performance_levels(adapter_index, plevels):
+    ADL_Overdrive5_ODPerformanceLevels_Set(adapter_index, byref(plevels))
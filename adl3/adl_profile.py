@@ -0,0 +1,278 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import json
+
+try:
+    import tomllib
+except ImportError:
+    # Python < 3.11: JSON profiles only
+    tomllib = None
+
+from .adl_api import ADLError
+from .adl_overdrive import get_od_parameters, get_fan_speed_info
+from .adl_transaction import apply_desired_state
+
+# Profile files hold a list of adapter entries, each picking its adapter by UDID or PCI bus
+# number, in the units atitweak uses on the command line:
+#
+#   {"adapters": [
+#       {"bus": 3,
+#        "levels": {"2": {"engine_clock": 1000, "memory_clock": 1375, "core_voltage": 1.2}},
+#        "fan_speed": 60,
+#        "powertune": 10},
+#       {"udid": "PCI_VEN_1002&DEV_6798&...",
+#        "fan_curve": [[40, 30], [70, 60], [85, 100]]}
+#   ]}
+#
+# Clocks are in MHz and voltages in VDC; fan_speed is a percentage or "default"; fan_curve
+# maps temperatures in degrees C to fan percentages and is used by fan control, not applied
+# here. TOML files (with [[adapters]] tables) work where tomllib is available.
+
+_ENTRY_KEYS = frozenset(["udid", "bus", "levels", "fan_speed", "fan_curve", "powertune"])
+_LEVEL_KEYS = ("engine_clock", "memory_clock", "core_voltage")
+
+try:
+    _string_types = basestring
+except NameError:
+    _string_types = str
+
+class ProfileError(ADLError):
+    pass
+
+def _adapter_udid(info):
+    udid = info.strUDID
+    if not isinstance(udid, str):
+        udid = udid.decode("ascii", "replace")
+    return udid
+
+class ProfileEntry(object):
+    """The settings for one adapter; levels maps performance levels to (engine clock MHz,
+    memory clock MHz, core voltage VDC), with None for values left alone."""
+    
+    __slots__ = ["udid", "bus", "levels", "fan_speed", "fan_curve", "powertune"]
+    
+    def __init__(self, udid=None, bus=None, levels=None, fan_speed=None, fan_curve=None, powertune=None):
+        self.udid = udid
+        self.bus = bus
+        self.levels = levels or {}
+        self.fan_speed = fan_speed
+        self.fan_curve = fan_curve
+        self.powertune = powertune
+
+    def describe(self):
+        if self.udid is not None:
+            return "UDID %s" % self.udid
+        return "bus %d" % self.bus
+
+    def matches(self, info):
+        if self.udid is not None:
+            return _adapter_udid(info) == self.udid
+        return info.iBusNumber == self.bus
+
+    @classmethod
+    def parse(cls, data, position):
+        where = "adapter entry %d" % position
+        if not isinstance(data, dict):
+            raise ProfileError("%s is not a table." % where)
+        
+        unknown = set(data) - _ENTRY_KEYS
+        if unknown:
+            raise ProfileError("%s has unknown settings: %s." % (where, ", ".join(sorted(unknown))))
+        
+        udid = data.get("udid")
+        bus = data.get("bus")
+        if (udid is None) == (bus is None):
+            raise ProfileError("%s needs exactly one of udid or bus." % where)
+        if udid is not None and not isinstance(udid, _string_types):
+            raise ProfileError("%s: udid must be a string." % where)
+        if bus is not None and not isinstance(bus, int):
+            raise ProfileError("%s: bus must be an integer." % where)
+        
+        levels = {}
+        raw_levels = data.get("levels", {})
+        if isinstance(raw_levels, list):
+            # TOML-friendly [[adapters.levels]] tables carrying their own level number
+            raw_levels = dict((level.get("level"), dict((key, value) for key, value in level.items() if key != "level"))
+                              for level in raw_levels if isinstance(level, dict))
+        if not isinstance(raw_levels, dict):
+            raise ProfileError("%s: levels must be a table." % where)
+        for level, values in raw_levels.items():
+            try:
+                level = int(level)
+            except (TypeError, ValueError):
+                raise ProfileError("%s: '%s' is not a performance level number." % (where, level))
+            if not isinstance(values, dict) or set(values) - set(_LEVEL_KEYS):
+                raise ProfileError("%s: performance level %d takes only %s." % (where, level, ", ".join(_LEVEL_KEYS)))
+            levels[level] = tuple(_number(values.get(key), "%s level %d %s" % (where, level, key)) for key in _LEVEL_KEYS)
+        
+        fan_speed = data.get("fan_speed")
+        if fan_speed is not None and fan_speed != "default":
+            fan_speed = int(_number(fan_speed, "%s fan_speed" % where))
+        
+        fan_curve = data.get("fan_curve")
+        if fan_curve is not None:
+            try:
+                fan_curve = [(float(temperature), float(percent)) for temperature, percent in fan_curve]
+            except (TypeError, ValueError):
+                raise ProfileError("%s: fan_curve must be a list of [temperature, percent] pairs." % where)
+            if not fan_curve or any(a[0] >= b[0] for a, b in zip(fan_curve, fan_curve[1:])):
+                raise ProfileError("%s: fan_curve temperatures must be increasing." % where)
+        
+        powertune = data.get("powertune")
+        if powertune is not None:
+            powertune = int(_number(powertune, "%s powertune" % where))
+        
+        return cls(udid, bus, levels, fan_speed, fan_curve, powertune)
+
+def _number(value, what):
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ProfileError("%s must be a number." % what)
+    return value
+
+class Profile(object):
+    """A parsed profile file; see load_profile()."""
+    
+    def __init__(self, entries):
+        self.entries = entries
+        
+        seen = set()
+        for entry in entries:
+            key = (entry.udid, entry.bus)
+            if key in seen:
+                raise ProfileError("More than one adapter entry for %s." % entry.describe())
+            seen.add(key)
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict) or not isinstance(data.get("adapters"), list):
+            raise ProfileError("A profile needs a list of adapters.")
+        return cls([ProfileEntry.parse(entry, position) for position, entry in enumerate(data["adapters"])])
+
+    def match(self, adapters):
+        """Returns [(AdapterInfo, ProfileEntry)] for the adapters the profile mentions."""
+        matched = []
+        for info in adapters:
+            entries = [entry for entry in self.entries if entry.matches(info)]
+            if len(entries) > 1:
+                raise ProfileError("Adapter %d is matched by both %s." % (info.iAdapterIndex,
+                                                                          " and ".join(entry.describe() for entry in entries)))
+            if entries:
+                matched.append((info, entries[0]))
+        return matched
+
+    def unmatched(self, adapters):
+        """Returns the entries that match none of adapters."""
+        return [entry for entry in self.entries if not any(entry.matches(info) for info in adapters)]
+
+    def fan_curve(self, info):
+        for entry in self.entries:
+            if entry.matches(info):
+                return entry.fan_curve
+        return None
+
+    def resolve(self, adapters):
+        """Checks the profile against each adapter's Overdrive ranges and returns the
+        desired state for apply_desired_state(), in the driver's units.
+        
+        Every problem found is reported in a single ProfileError, before anything is written.
+        """
+        desired = {}
+        problems = []
+        
+        for info, entry in self.match(adapters):
+            adapter_index = info.iAdapterIndex
+            where = "Adapter %d (%s)" % (adapter_index, entry.describe())
+            wanted = desired[adapter_index] = {}
+            
+            if entry.levels:
+                od_parameters = get_od_parameters(adapter_index)
+                if not od_parameters.iDiscretePerformanceLevels:
+                    problems.append("%s does not support discrete performance levels" % where)
+                levels = wanted["levels"] = {}
+                for level, (engine_clock, memory_clock, core_voltage) in sorted(entry.levels.items()):
+                    if not 0 <= level < od_parameters.iNumberOfPerformanceLevels:
+                        problems.append("%s has no performance level %d" % (where, level))
+                        continue
+                    values = (None if engine_clock is None else int(round(engine_clock*100.0)),
+                              None if memory_clock is None else int(round(memory_clock*100.0)),
+                              None if core_voltage is None else int(round(core_voltage*1000.0)))
+                    for value, value_range, name, scale, unit in ((values[0], od_parameters.sEngineClock, "engine clock", 100.0, "MHz"),
+                                                                  (values[1], od_parameters.sMemoryClock, "memory clock", 100.0, "MHz"),
+                                                                  (values[2], od_parameters.sVddc, "core voltage", 1000.0, "VDC")):
+                        if value is not None and not value_range.iMin <= value <= value_range.iMax:
+                            problems.append("%s level %d: %s %g%s is outside %g - %g%s" %
+                                            (where, level, name, value/scale, unit,
+                                             value_range.iMin/scale, value_range.iMax/scale, unit))
+                    levels[level] = values
+            
+            fan_percents = []
+            if entry.fan_speed not in (None, "default"):
+                fan_percents.append(entry.fan_speed)
+            if entry.fan_curve:
+                fan_percents.extend(percent for temperature, percent in entry.fan_curve)
+            if fan_percents:
+                fan_speed_info = get_fan_speed_info(adapter_index)
+                for percent in fan_percents:
+                    if not fan_speed_info.iMinPercent <= percent <= fan_speed_info.iMaxPercent:
+                        problems.append("%s: fan speed %g%% is outside %d - %d%%" %
+                                        (where, percent, fan_speed_info.iMinPercent, fan_speed_info.iMaxPercent))
+            if entry.fan_speed is not None:
+                wanted["fan_speed"] = entry.fan_speed
+            
+            if entry.powertune is not None:
+                wanted["powertune"] = entry.powertune
+        
+        if problems:
+            raise ProfileError("Invalid profile: %s." % "; ".join(problems))
+        
+        return desired
+
+def parse_profile(text, format="json"):
+    if format == "toml":
+        if tomllib is None:
+            raise ProfileError("TOML profiles need Python 3.11 or later; use JSON instead.")
+        try:
+            data = tomllib.loads(text)
+        except tomllib.TOMLDecodeError as err:
+            raise ProfileError("Invalid TOML profile: %s" % err)
+    else:
+        try:
+            data = json.loads(text)
+        except ValueError as err:
+            raise ProfileError("Invalid JSON profile: %s" % err)
+    return Profile.from_dict(data)
+
+def load_profile(path):
+    """Reads a profile from a .json or .toml file."""
+    try:
+        with open(path) as profile_file:
+            text = profile_file.read()
+    except (IOError, OSError) as err:
+        raise ProfileError("Can't read profile %s: %s" % (path, err.strerror or err))
+    return parse_profile(text, "toml" if path.lower().endswith(".toml") else "json")
+
+def apply_profile(profile, adapters, cache=None, dry_run=False):
+    """Validates profile against adapters and applies it to all of them in one transaction;
+    returns the StateChanges made, like apply_desired_state()."""
+    return apply_desired_state(profile.resolve(adapters), cache=cache, dry_run=dry_run)
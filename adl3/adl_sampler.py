@@ -0,0 +1,132 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import threading
+import time
+from itertools import repeat
+from array import array
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    # Python 2 needs the 'futures' backport for Sampler; the rest of adl3 works without it
+    ThreadPoolExecutor = None
+
+from .adl_snapshot import Snapshot, _get_buffers, _NUM_COLUMNS
+
+# prefer a monotonic clock for latencies, so wall clock adjustments don't skew them
+_clock = getattr(time, "monotonic", time.time)
+
+# Lock policies for concurrent sampling. ADL itself makes no thread-safety promises, so:
+#   LOCK_GLOBAL  - one ADL call at a time across all adapters (safest, no overlap)
+#   LOCK_ADAPTER - reads for different adapters overlap, but each adapter is read by one thread at a time
+#   LOCK_NONE    - no locking at all; only for drivers known to be reentrant
+LOCK_GLOBAL = "global"
+LOCK_ADAPTER = "adapter"
+LOCK_NONE = "none"
+
+class _NullLock(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+# the locks are shared by every Sampler, so two samplers can't read the same adapter at once
+_global_lock = threading.Lock()
+_adapter_locks = {}
+_adapter_locks_lock = threading.Lock()
+_null_lock = _NullLock()
+
+def _get_lock(adapter_index, lock_policy):
+    if lock_policy == LOCK_GLOBAL:
+        return _global_lock
+    elif lock_policy == LOCK_ADAPTER:
+        with _adapter_locks_lock:
+            lock = _adapter_locks.get(adapter_index)
+            if lock is None:
+                lock = _adapter_locks[adapter_index] = threading.Lock()
+            return lock
+    elif lock_policy == LOCK_NONE:
+        return _null_lock
+    else:
+        raise ValueError("Unknown lock policy '%s'." % lock_policy)
+
+class Sweep(object):
+    """The result of Sampler.sweep(): a Snapshot plus how long each adapter took to read."""
+    
+    __slots__ = ["snapshot", "latencies", "elapsed"]
+    
+    def __init__(self, num_adapters):
+        self.snapshot = Snapshot(num_adapters)
+        self.latencies = array("d", [0.0]) * num_adapters
+        self.elapsed = 0.0
+
+class Sampler(object):
+    """Reads snapshots of several adapters concurrently on a bounded thread pool.
+    
+    ctypes releases the GIL for the duration of every foreign call, so adapters whose
+    Overdrive calls block in the driver are waited on in parallel, and a sweep takes
+    about as long as the slowest adapter rather than the sum of all of them.
+    """
+    
+    def __init__(self, adapters, max_workers=None, lock_policy=LOCK_ADAPTER):
+        if ThreadPoolExecutor is None:
+            raise RuntimeError("Sampler requires concurrent.futures (the 'futures' package on Python 2).")
+        
+        self._buffers = [_get_buffers(adapter) for adapter in adapters]
+        self._locks = [_get_lock(buffers.adapter_index, lock_policy) for buffers in self._buffers]
+        self.lock_policy = lock_policy
+        
+        if max_workers is None:
+            max_workers = min(len(self._buffers), 16)
+        self._executor = ThreadPoolExecutor(max_workers=max(max_workers, 1))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def _read(self, row, sweep):
+        with self._locks[row]:
+            start = _clock()
+            self._buffers[row].read(sweep.snapshot.data, row * _NUM_COLUMNS)
+            sweep.latencies[row] = _clock() - start
+
+    def sweep(self, out=None):
+        """Reads every adapter once and returns a Sweep. Pass the previous Sweep as out to reuse it."""
+        if out is None or out.snapshot.num_adapters != len(self._buffers):
+            out = Sweep(len(self._buffers))
+        
+        start = _clock()
+        out.snapshot.timestamp = time.time()
+        
+        # consume the results so that any exception raised by a worker is re-raised here
+        for result in self._executor.map(self._read, range(len(self._buffers)), repeat(out)):
+            pass
+        
+        out.elapsed = _clock() - start
+        return out
@@ -0,0 +1,263 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import heapq
+import time
+from ctypes import byref
+
+from . import adl_api
+from .adl_structures import ADLMemoryInfo, ADLBiosInfo, StructurePool
+from .adl_api import ADLError, ADLFunctionNotFoundError, ADLNotSupportedError
+from .adl_overdrive import (get_od_parameters, get_fan_speed_info, get_current_activity, get_temperature,
+                            get_power_control, get_performance_levels)
+
+_clock = getattr(time, "monotonic", time.time)
+
+def _get_memory_info(adapter_index):
+    # only the Linux library exports ADL_Adapter_MemoryInfo_Get
+    function = getattr(adl_api, "ADL_Adapter_MemoryInfo_Get", None)
+    if function is None:
+        raise ADLFunctionNotFoundError("ADL_Adapter_MemoryInfo_Get is not available on this platform.")
+    memory_info = ADLMemoryInfo()
+    function(adapter_index, byref(memory_info))
+    return memory_info
+
+def _get_video_bios_info(adapter_index):
+    bios_info = ADLBiosInfo()
+    adl_api.ADL_Adapter_VideoBiosInfo_Get(adapter_index, byref(bios_info))
+    return bios_info
+
+def _get_performance_levels(adapter_index):
+    od_parameters = get_od_parameters(adapter_index)
+    return get_performance_levels(adapter_index, od_parameters.iNumberOfPerformanceLevels)
+
+class MetricSource(object):
+    """One thing the Scheduler can read: read(adapter_index) returns its value.
+    
+    period is how often poll() refreshes it (None: only when get() needs it); ttl is how
+    long get() trusts a cached value (None: forever). fast_period, if set, replaces period
+    while the scheduler is boosted.
+    """
+    
+    __slots__ = ["name", "read", "period", "ttl", "fast_period"]
+    
+    def __init__(self, name, read, period=None, ttl=None, fast_period=None):
+        self.name = name
+        self.read = read
+        self.period = period
+        self.ttl = period if ttl is None else ttl
+        self.fast_period = fast_period
+
+# The Overdrive ranges, fan limits, BIOS and memory don't change while the driver is loaded,
+# so they're read once; the performance level table only changes when someone sets it. The
+# sources polled periodically that return plain values read into reused structures.
+def default_sources():
+    pool = StructurePool()
+    return [
+        MetricSource("od_parameters", get_od_parameters),
+        MetricSource("fan_speed_info", get_fan_speed_info),
+        MetricSource("video_bios_info", _get_video_bios_info),
+        MetricSource("memory_info", _get_memory_info),
+        MetricSource("performance_levels", _get_performance_levels, ttl=300.0),
+        MetricSource("current_activity", get_current_activity, period=1.0, fast_period=0.25),
+        MetricSource("temperature", lambda adapter_index: get_temperature(adapter_index, pool=pool),
+                     period=2.0, fast_period=0.25),
+        MetricSource("power_control", lambda adapter_index: get_power_control(adapter_index, pool=pool), period=10.0),
+    ]
+
+class _Entry(object):
+    
+    __slots__ = ["value", "error", "timestamp", "generation"]
+    
+    def __init__(self):
+        self.value = None
+        self.error = None
+        self.timestamp = None
+        self.generation = 0
+
+class Scheduler(object):
+    """Reads each metric source of each adapter at its own rate and caches the results.
+    
+    poll() refreshes whatever is due, from a heap ordered by due time; get() returns the
+    cached value, reading it first if it's missing or older than the source's ttl. When
+    the temperature climbs faster than boost_rate degrees C per second, or passes
+    boost_temperature, sources with a fast_period switch to it for boost_hold seconds.
+    A source an adapter doesn't support (ADLNotSupportedError) is no longer polled, and
+    get() raises the cached error until it is invalidated. Any other failed read is
+    trusted for at most error_ttl seconds, so a driver hiccup doesn't stick to a source
+    whose value would otherwise be cached forever.
+    
+    The scheduler isn't thread-safe; use it from one thread.
+    """
+    
+    def __init__(self, adapters, sources=None, boost_rate=1.0, boost_temperature=None, boost_hold=30.0,
+                 error_ttl=1.0):
+        self.adapters = [getattr(adapter, "iAdapterIndex", adapter) for adapter in adapters]
+        self.sources = dict((source.name, source) for source in (sources or default_sources()))
+        self.boost_rate = boost_rate
+        self.boost_temperature = boost_temperature
+        self.boost_hold = boost_hold
+        self.error_ttl = error_ttl
+        
+        self.calls = 0
+        self._entries = {}
+        self._heap = []
+        self._sequence = 0
+        self._boosted_until = {}
+        
+        now = _clock()
+        for adapter_index in self.adapters:
+            self._boosted_until[adapter_index] = None
+            for source in self.sources.values():
+                self._entries[adapter_index, source.name] = _Entry()
+                if source.period is not None:
+                    self._schedule(adapter_index, source.name, now)
+
+    def _schedule(self, adapter_index, name, due):
+        entry = self._entries[adapter_index, name]
+        self._sequence += 1
+        heapq.heappush(self._heap, (due, self._sequence, adapter_index, name, entry.generation))
+
+    def _period(self, adapter_index, source, now):
+        boosted_until = self._boosted_until[adapter_index]
+        if source.fast_period is not None and boosted_until is not None and now < boosted_until:
+            return source.fast_period
+        return source.period
+
+    def boosted(self, adapter_index, now=None):
+        boosted_until = self._boosted_until[adapter_index]
+        return boosted_until is not None and (now if now is not None else _clock()) < boosted_until
+
+    def _read(self, adapter_index, name, now):
+        entry = self._entries[adapter_index, name]
+        previous_value, previous_timestamp = entry.value, entry.timestamp
+        
+        self.calls += 1
+        try:
+            entry.value = self.sources[name].read(adapter_index)
+            entry.error = None
+        except ADLError as err:
+            entry.value = None
+            entry.error = err
+        entry.timestamp = now
+        
+        if name == "temperature" and entry.error is None:
+            self._check_boost(adapter_index, previous_value, previous_timestamp, entry.value, now)
+        
+        return entry
+
+    def _check_boost(self, adapter_index, previous_value, previous_timestamp, value, now):
+        # temperatures are in millidegrees C
+        rising = (previous_value is not None and now > previous_timestamp and
+                  (value - previous_value) / 1000.0 / (now - previous_timestamp) >= self.boost_rate)
+        hot = self.boost_temperature is not None and value / 1000.0 >= self.boost_temperature
+        if not (rising or hot):
+            return
+        
+        was_boosted = self.boosted(adapter_index, now)
+        self._boosted_until[adapter_index] = now + self.boost_hold
+        if not was_boosted:
+            # pull the boosted sources forward instead of waiting out their slow period
+            for source in self.sources.values():
+                if source.fast_period is not None and source.period is not None:
+                    entry = self._entries[adapter_index, source.name]
+                    entry.generation += 1
+                    self._schedule(adapter_index, source.name, now + source.fast_period)
+
+    def poll(self, now=None):
+        """Reads every source that is due; returns the (adapter index, source name) pairs read."""
+        if now is None:
+            now = _clock()
+        
+        read = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            due, sequence, adapter_index, name, generation = heapq.heappop(heap)
+            entry = self._entries[adapter_index, name]
+            if generation != entry.generation:
+                # superseded by a reschedule
+                continue
+            entry = self._read(adapter_index, name, now)
+            read.append((adapter_index, name))
+            if isinstance(entry.error, ADLNotSupportedError):
+                continue
+            
+            # schedule from the due time so the rate doesn't drift, but never into the past
+            period = self._period(adapter_index, self.sources[name], now)
+            next_due = due + period
+            if next_due <= now:
+                next_due = now + period
+            self._schedule(adapter_index, name, next_due)
+        
+        return read
+
+    def next_due(self, now=None):
+        """Seconds until poll() has something to read, or None if nothing is periodic."""
+        heap = self._heap
+        while heap and heap[0][4] != self._entries[heap[0][2], heap[0][3]].generation:
+            heapq.heappop(heap)
+        if not heap:
+            return None
+        return max(0.0, heap[0][0] - (now if now is not None else _clock()))
+
+    def get(self, adapter_index, name, max_age=None):
+        """Returns the cached value of a source, reading it if it's older than max_age
+        (the source's ttl by default). Raises the ADLError of a failed read."""
+        source = self.sources[name]
+        entry = self._entries[adapter_index, name]
+        now = _clock()
+        ttl = source.ttl if max_age is None else max_age
+        if entry.error is not None and not isinstance(entry.error, ADLNotSupportedError):
+            ttl = self.error_ttl if ttl is None else min(ttl, self.error_ttl)
+        
+        if entry.timestamp is None or (ttl is not None and now - entry.timestamp > ttl and
+                                       not isinstance(entry.error, ADLNotSupportedError)):
+            entry = self._read(adapter_index, name, now)
+        
+        if entry.error is not None:
+            raise entry.error
+        return entry.value
+
+    def invalidate(self, adapter_index=None, name=None):
+        """Drops cached values, e.g. after changing performance levels, and resumes polling
+        sources that were dropped as unsupported."""
+        now = _clock()
+        for (entry_adapter, entry_name), entry in self._entries.items():
+            if (adapter_index is None or entry_adapter == adapter_index) and (name is None or entry_name == name):
+                if isinstance(entry.error, ADLNotSupportedError) and self.sources[entry_name].period is not None:
+                    entry.generation += 1
+                    self._schedule(entry_adapter, entry_name, now)
+                entry.timestamp = None
+                entry.error = None
+
+    def run(self, stop=None, callback=None):
+        """Polls until stop (a threading.Event) is set; callback gets each poll()'s result."""
+        while stop is None or not stop.is_set():
+            read = self.poll()
+            if callback is not None and read:
+                callback(read)
+            delay = self.next_due()
+            if delay is None:
+                delay = 1.0
+            if stop is not None:
+                stop.wait(delay)
+            else:
+                time.sleep(delay)
@@ -0,0 +1,1002 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+#
+# A pure-Python stand-in for libatiadlxx, so adl3 can be exercised without Radeon hardware.
+# Select it with ADL3_LIBRARY=simulated or adl3.set_library(SimulatedADL(...)).
+
+import os
+import random
+import threading
+import time
+from ctypes import CFUNCTYPE, POINTER, addressof, cast, c_int, memmove, memset, sizeof
+
+from .adl_defines import *
+from .adl_structures import *
+from . import adl_api
+
+def _bytes(value):
+    return value if isinstance(value, bytes) else value.encode("ascii")
+
+def _pnp_id(vendor):
+    # three letters, five bits each, 'A' == 1
+    value = 0
+    for char in vendor:
+        value = (value << 5) | (ord(char) - ord("A") + 1)
+    return value
+
+def _detailed_timing(pixel_clock, hactive, hblank, hsync_offset, hsync_width,
+                     vactive, vblank, vsync_offset, vsync_width, width_mm, height_mm):
+    return bytearray([
+        pixel_clock & 0xff, pixel_clock >> 8,
+        hactive & 0xff, hblank & 0xff, ((hactive >> 8) << 4) | (hblank >> 8),
+        vactive & 0xff, vblank & 0xff, ((vactive >> 8) << 4) | (vblank >> 8),
+        hsync_offset & 0xff, hsync_width & 0xff,
+        ((vsync_offset & 0xf) << 4) | (vsync_width & 0xf),
+        ((hsync_offset >> 8) << 6) | ((hsync_width >> 8) << 4) | ((vsync_offset >> 4) << 2) | (vsync_width >> 4),
+        width_mm & 0xff, height_mm & 0xff, ((width_mm >> 8) << 4) | (height_mm >> 8),
+        0, 0, 0x1e,
+    ])
+
+def _text_descriptor(tag, text):
+    text = bytearray(_bytes(text)[:13])
+    if len(text) < 13:
+        text += b"\n" + b" " * (12 - len(text))
+    return bytearray([0, 0, 0, tag, 0]) + text
+
+def _checksum(block):
+    block[127] = (-sum(block[:127])) & 0xff
+    return block
+
+def make_edid(vendor="SIM", product_code=0x1234, serial_number=1, name="SIM DISPLAY", num_extensions=0):
+    """Builds a valid EDID 1.3 block for a 1920x1080@60 panel, followed by num_extensions empty CEA blocks."""
+    block = bytearray(128)
+    block[0:8] = b"\x00\xff\xff\xff\xff\xff\xff\x00"
+    manufacturer = _pnp_id(vendor)
+    block[8:10] = bytearray([manufacturer >> 8, manufacturer & 0xff])
+    block[10:12] = bytearray([product_code & 0xff, product_code >> 8])
+    block[12:16] = bytearray([(serial_number >> shift) & 0xff for shift in (0, 8, 16, 24)])
+    block[16:18] = bytearray([1, 2011 - 1990])
+    block[18:20] = bytearray([1, 3])
+    block[20:25] = bytearray([0x80, 53, 30, 120, 0x0a])
+    block[35:38] = bytearray([0x21, 0x08, 0x00])
+    block[38:54] = bytearray([1, 1] * 8)
+    block[54:72] = _detailed_timing(14850, 1920, 280, 88, 44, 1080, 45, 4, 5, 531, 299)
+    block[72:90] = _text_descriptor(0xfc, name)
+    block[90:108] = _text_descriptor(0xff, "%08d" % serial_number)
+    block[108:126] = _text_descriptor(0xfe, "SIMULATED")
+    block[126] = num_extensions
+    edid = _checksum(block)
+    
+    for extension in range(num_extensions):
+        block = bytearray(128)
+        block[0:4] = bytearray([0x02, 0x03, 0x04, 0x00])
+        edid += _checksum(block)
+    
+    return bytes(edid)
+
+class SimulatedDisplay(object):
+    """One display attached to a SimulatedGPU."""
+    
+    def __init__(self, index, serial_number, num_extensions=1):
+        self.index = index
+        self.name = "SIM DISPLAY %d" % index
+        self.manufacturer = "SIM"
+        self.connected = True
+        self.mapped = True
+        self.edid = make_edid(serial_number=serial_number, name=self.name, num_extensions=num_extensions)
+        # (xres, yres, refresh rate, colour depth)
+        self.modes = [(xres, yres, refresh, depth)
+                      for xres, yres, refresh in ((1920, 1080, 60.0), (1920, 1080, 50.0), (1680, 1050, 60.0),
+                                                  (1280, 1024, 60.0), (1280, 720, 60.0), (1024, 768, 60.0),
+                                                  (800, 600, 60.0))
+                      for depth in (32, 16)]
+
+class SimulatedDisplayMap(object):
+    """One desktop of a SimulatedGPU: a mode, shown on the displays listed in targets."""
+    
+    def __init__(self, mode, targets, x=0, y=0):
+        # (xres, yres, refresh rate, colour depth), as in SimulatedDisplay.modes
+        self.mode = mode
+        self.targets = list(targets)
+        self.x = x
+        self.y = y
+
+class SimulatedSLSMap(object):
+    """One SLS (Eyefinity) configuration of a SimulatedGPU: displays arranged in a grid."""
+    
+    def __init__(self, rows, columns, positions, orientation=0):
+        self.rows = rows
+        self.columns = columns
+        # {display index: (column, row)}
+        self.positions = dict(positions)
+        self.orientation = orientation
+        # {display index: (x, y)} bezel offsets, in pixels
+        self.offsets = {}
+
+class SimulatedGPU(object):
+    """The state of one simulated GPU. Change the attributes to script a scenario."""
+    
+    def __init__(self, index, num_displays=1):
+        self.adapter_id = 0x1000 + index
+        self.bus_number = index + 1
+        self.udid = "PCI_VEN_1002&DEV_6798&SUBSYS_30001002&REV_00&BUS_%d" % self.bus_number
+        self.name = "Simulated Radeon HD 7970"
+        self.bios_part_number = "113-C3865000-101"
+        self.bios_version = "015.012.000.002.000000"
+        self.bios_date = "2011/12/15 14:30"
+        self.memory_size = 3 << 30
+        self.memory_type = "GDDR5"
+        self.memory_bandwidth = 264000
+        
+        # (min, max, step) in the driver's units
+        self.engine_clock_range = (30000, 120000, 500)
+        self.memory_clock_range = (15000, 160000, 500)
+        self.vddc_range = (800, 1300, 5)
+        
+        # (engine clock, memory clock, vddc) per performance level
+        self.default_levels = [(30000, 15000, 850), (50000, 137500, 1000), (92500, 137500, 1170)]
+        self.levels = list(self.default_levels)
+        
+        self.performance_level = 2
+        self.activity = 99
+        self.bus_speed = 5000
+        self.bus_lanes = 16
+        self.max_bus_lanes = 16
+        self.temperature = 65000
+        self.fan_percent = 30
+        self.fan_default_percent = 30
+        self.fan_user_defined = False
+        self.fan_max_rpm = 5000
+        self.powertune = 0
+        self.powertune_default = 0
+        
+        self.displays = [SimulatedDisplay(display_index, (index << 8) | display_index)
+                         for display_index in range(num_displays)]
+        # one display map per controller, each showing at most max_clone_targets displays
+        self.num_controllers = 6
+        self.max_clone_targets = 2
+        # an extended desktop: each display is its own map, left to right
+        self.display_maps = [SimulatedDisplayMap(display.modes[0], [display.index], x=display.index * display.modes[0][0])
+                             for display in self.displays]
+        
+        # the SLS grids the driver offers, as (rows, columns), and the SLS maps created so far
+        self.sls_grids = [(rows, columns) for rows in (1, 2, 3) for columns in (1, 2, 3, 4, 5, 6)
+                          if 1 < rows * columns <= min(num_displays, 6)]
+        self.sls_maps = {}
+        self.active_sls_map = None
+        # bezel offsets are multiples of these, in pixels
+        self.bezel_step = (2, 2)
+        # how many times changing the SLS configuration reset the desktop
+        self.desktop_resets = 0
+
+class SimulatedADL(object):
+    """Implements the Main, Adapter, Overdrive5 and Display entry points of ADL over SimulatedGPUs.
+    
+    Like a CDLL, the functions are attributes: ctypes function pointers with the prototypes from
+    adl_api, so they're called exactly the way the real library is. Each GPU appears as
+    logical_adapters_per_gpu logical adapters, like the real driver's per-controller adapters.
+    latency (seconds, or a dict of seconds by function name) is slept in every call, and
+    failures maps function names to a failure probability or a (probability, ADL error code)
+    tuple. Functions named in missing are not exported at all.
+    """
+    
+    def __init__(self, num_gpus=1, logical_adapters_per_gpu=1, num_displays=1,
+                 latency=0.0, failures=None, missing=(), seed=None):
+        self.gpus = [SimulatedGPU(index, num_displays) for index in range(num_gpus)]
+        self.logical_adapters_per_gpu = logical_adapters_per_gpu
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.missing = set(missing)
+        self.calls = {}
+        self.initialized = False
+        self._malloc = None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._prototypes = dict(adl_api._prototypes)
+
+    @classmethod
+    def from_environment(cls):
+        """Builds a SimulatedADL from $ADL3_SIMULATED_GPUS, $ADL3_SIMULATED_LATENCY and $ADL3_SIMULATED_FAILURE_RATE."""
+        num_gpus = int(os.environ.get("ADL3_SIMULATED_GPUS", "1"))
+        latency = float(os.environ.get("ADL3_SIMULATED_LATENCY", "0"))
+        failure_rate = float(os.environ.get("ADL3_SIMULATED_FAILURE_RATE", "0"))
+        
+        failures = None
+        if failure_rate:
+            failures = dict((name, failure_rate) for name, argtypes in adl_api._prototypes
+                            if not name.startswith("ADL_Main_"))
+        
+        return cls(num_gpus=num_gpus, latency=latency, failures=failures)
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name in self.missing or name not in self._prototypes:
+            raise AttributeError(name)
+        
+        implementation = getattr(self, "_" + name, None)
+        if implementation is None:
+            raise AttributeError(name)
+        
+        func = CFUNCTYPE(c_int, *self._prototypes[name])(self._wrap(name, implementation))
+        # cache it, as CDLL does; this also keeps the callback alive
+        setattr(self, name, func)
+        return func
+
+    def _wrap(self, name, implementation):
+        def call(*args):
+            with self._lock:
+                self.calls[name] = self.calls.get(name, 0) + 1
+                failure = self.failures.get(name)
+                failed = failure is not None and self._random.random() < (
+                    failure[0] if isinstance(failure, tuple) else failure)
+            
+            latency = self.latency.get(name, 0.0) if isinstance(self.latency, dict) else self.latency
+            if latency:
+                time.sleep(latency)
+            
+            if failed:
+                return failure[1] if isinstance(failure, tuple) else ADL_ERR
+            if not self.initialized and name != "ADL_Main_Control_Create":
+                return ADL_ERR_NOT_INIT
+            return implementation(*args)
+        return call
+
+    def _gpu(self, adapter_index):
+        if 0 <= adapter_index < len(self.gpus) * self.logical_adapters_per_gpu:
+            return self.gpus[adapter_index // self.logical_adapters_per_gpu]
+        return None
+
+    def _display(self, adapter_index, display_index):
+        gpu = self._gpu(adapter_index)
+        if gpu is not None and 0 <= display_index < len(gpu.displays):
+            return gpu.displays[display_index]
+        return None
+
+    def _allocate(self, struct_type, count):
+        # buffers handed back to the caller come from its ADL_Main_Memory_Alloc, as with the real library
+        size = sizeof(struct_type) * max(count, 1)
+        address = self._malloc(size)
+        memset(address, 0, size)
+        return cast(address, POINTER(struct_type))
+
+    # Main
+
+    def _ADL_Main_Control_Create(self, callback, enum_connected_adapters):
+        self._malloc = callback
+        self.initialized = True
+        return ADL_OK
+
+    def _ADL_Main_Control_Refresh(self):
+        return ADL_OK
+
+    def _ADL_Main_Control_Destroy(self):
+        self.initialized = False
+        return ADL_OK
+
+    # Adapter
+
+    def _ADL_Adapter_NumberOfAdapters_Get(self, num_adapters):
+        num_adapters[0] = len(self.gpus) * self.logical_adapters_per_gpu
+        return ADL_OK
+
+    def _ADL_Adapter_AdapterInfo_Get(self, adapter_info, input_size):
+        num_adapters = len(self.gpus) * self.logical_adapters_per_gpu
+        if input_size < sizeof(AdapterInfo) * num_adapters:
+            return ADL_ERR_INVALID_PARAM_SIZE
+        
+        for adapter_index in range(num_adapters):
+            gpu = self._gpu(adapter_index)
+            info = adapter_info[adapter_index]
+            info.iSize = sizeof(AdapterInfo)
+            info.iAdapterIndex = adapter_index
+            info.strUDID = _bytes(gpu.udid)
+            info.iBusNumber = gpu.bus_number
+            info.iDeviceNumber = 0
+            info.iFunctionNumber = adapter_index % self.logical_adapters_per_gpu
+            info.iVendorID = 1002
+            info.strAdapterName = _bytes(gpu.name)
+            info.strDisplayName = _bytes(":0.%d" % (adapter_index // self.logical_adapters_per_gpu))
+            info.iPresent = 1
+        return ADL_OK
+
+    def _ADL_Adapter_ID_Get(self, adapter_index, adapter_id):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        adapter_id[0] = gpu.adapter_id
+        return ADL_OK
+
+    def _ADL_Adapter_Active_Get(self, adapter_index, status):
+        if self._gpu(adapter_index) is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        status[0] = 1
+        return ADL_OK
+
+    def _ADL_Adapter_Accessibility_Get(self, adapter_index, accessibility):
+        return self._ADL_Adapter_Active_Get(adapter_index, accessibility)
+
+    def _ADL_Adapter_VideoBiosInfo_Get(self, adapter_index, bios_info):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        bios_info[0].strPartNumber = _bytes(gpu.bios_part_number)
+        bios_info[0].strVersion = _bytes(gpu.bios_version)
+        bios_info[0].strDate = _bytes(gpu.bios_date)
+        return ADL_OK
+
+    def _ADL_Adapter_MemoryInfo_Get(self, adapter_index, memory_info):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        memory_info[0].iMemorySize = gpu.memory_size
+        memory_info[0].strMemoryType = _bytes(gpu.memory_type)
+        memory_info[0].iMemoryBandwidth = gpu.memory_bandwidth
+        return ADL_OK
+
+    def _ADL_Adapter_Speed_Caps(self, adapter_index, caps, valid):
+        if self._gpu(adapter_index) is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        caps[0] = ADL_CONTEXT_SPEED_FORCEHIGH | ADL_CONTEXT_SPEED_FORCELOW
+        valid[0] = ADL_CONTEXT_SPEED_FORCEHIGH | ADL_CONTEXT_SPEED_FORCELOW
+        return ADL_OK
+
+    def _ADL_Display_Capabilities_Get(self, adapter_index, num_controllers, num_displays):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        num_controllers[0] = gpu.num_controllers
+        num_displays[0] = len(gpu.displays)
+        return ADL_OK
+
+    # Overdrive5
+
+    def _ADL_Overdrive5_CurrentActivity_Get(self, adapter_index, activity):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        activity = activity[0]
+        activity.iEngineClock, activity.iMemoryClock, activity.iVddc = gpu.levels[gpu.performance_level]
+        activity.iActivityPercent = gpu.activity
+        activity.iCurrentPerformanceLevel = gpu.performance_level
+        activity.iCurrentBusSpeed = gpu.bus_speed
+        activity.iCurrentBusLanes = gpu.bus_lanes
+        activity.iMaximumBusLanes = gpu.max_bus_lanes
+        return ADL_OK
+
+    def _ADL_Overdrive5_ThermalDevices_Enum(self, adapter_index, thermal_controller_index, thermal_controller_info):
+        if self._gpu(adapter_index) is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        if thermal_controller_index != 0:
+            return ADL_ERR
+        thermal_controller_info[0].iThermalDomain = ADL_DL_THERMAL_DOMAIN_GPU
+        thermal_controller_info[0].iDomainIndex = 0
+        thermal_controller_info[0].iFlags = ADL_DL_THERMAL_FLAG_FANCONTROL
+        return ADL_OK
+
+    def _ADL_Overdrive5_Temperature_Get(self, adapter_index, thermal_controller_index, temperature):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        temperature[0].iTemperature = gpu.temperature
+        return ADL_OK
+
+    def _ADL_Overdrive5_FanSpeedInfo_Get(self, adapter_index, thermal_controller_index, fan_speed_info):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        fan_speed_info = fan_speed_info[0]
+        fan_speed_info.iFlags = (ADL_DL_FANCTRL_SUPPORTS_PERCENT_READ | ADL_DL_FANCTRL_SUPPORTS_PERCENT_WRITE |
+                                 ADL_DL_FANCTRL_SUPPORTS_RPM_READ | ADL_DL_FANCTRL_SUPPORTS_RPM_WRITE)
+        fan_speed_info.iMinPercent = 0
+        fan_speed_info.iMaxPercent = 100
+        fan_speed_info.iMinRPM = 0
+        fan_speed_info.iMaxRPM = gpu.fan_max_rpm
+        return ADL_OK
+
+    def _ADL_Overdrive5_FanSpeed_Get(self, adapter_index, thermal_controller_index, fan_speed_value):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        fan_speed_value = fan_speed_value[0]
+        if fan_speed_value.iSpeedType == ADL_DL_FANCTRL_SPEED_TYPE_PERCENT:
+            fan_speed_value.iFanSpeed = gpu.fan_percent
+        elif fan_speed_value.iSpeedType == ADL_DL_FANCTRL_SPEED_TYPE_RPM:
+            fan_speed_value.iFanSpeed = gpu.fan_percent * gpu.fan_max_rpm // 100
+        else:
+            return ADL_ERR_INVALID_PARAM
+        fan_speed_value.iFlags = ADL_DL_FANCTRL_FLAG_USER_DEFINED_SPEED if gpu.fan_user_defined else 0
+        return ADL_OK
+
+    def _ADL_Overdrive5_FanSpeed_Set(self, adapter_index, thermal_controller_index, fan_speed_value):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        fan_speed_value = fan_speed_value[0]
+        if fan_speed_value.iSpeedType == ADL_DL_FANCTRL_SPEED_TYPE_PERCENT:
+            percent = fan_speed_value.iFanSpeed
+        elif fan_speed_value.iSpeedType == ADL_DL_FANCTRL_SPEED_TYPE_RPM:
+            percent = fan_speed_value.iFanSpeed * 100 // gpu.fan_max_rpm
+        else:
+            return ADL_ERR_INVALID_PARAM
+        if not 0 <= percent <= 100:
+            return ADL_ERR_INVALID_PARAM
+        gpu.fan_percent = percent
+        gpu.fan_user_defined = True
+        return ADL_OK
+
+    def _ADL_Overdrive5_FanSpeedToDefault_Set(self, adapter_index, thermal_controller_index):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        gpu.fan_percent = gpu.fan_default_percent
+        gpu.fan_user_defined = False
+        return ADL_OK
+
+    def _ADL_Overdrive5_ODParameters_Get(self, adapter_index, od_parameters):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        od_parameters = od_parameters[0]
+        if od_parameters.iSize != sizeof(ADLODParameters):
+            return ADL_ERR_INVALID_PARAM_SIZE
+        od_parameters.iNumberOfPerformanceLevels = len(gpu.levels)
+        od_parameters.iActivityReportingSupported = 1
+        od_parameters.iDiscretePerformanceLevels = 1
+        for parameter_range, (minimum, maximum, step) in ((od_parameters.sEngineClock, gpu.engine_clock_range),
+                                                          (od_parameters.sMemoryClock, gpu.memory_clock_range),
+                                                          (od_parameters.sVddc, gpu.vddc_range)):
+            parameter_range.iMin = minimum
+            parameter_range.iMax = maximum
+            parameter_range.iStep = step
+        return ADL_OK
+
+    def _levels(self, plevels, gpu):
+        # the caller sizes ADLODPerformanceLevels for its number of levels, so check it's big enough
+        num_levels = (plevels[0].iSize - sizeof(ADLODPerformanceLevels)) // sizeof(ADLODPerformanceLevel) + 1
+        if num_levels < len(gpu.levels):
+            return None
+        return cast(addressof(plevels[0]) + ADLODPerformanceLevels.aLevels.offset, POINTER(ADLODPerformanceLevel))
+
+    def _ADL_Overdrive5_ODPerformanceLevels_Get(self, adapter_index, default, plevels):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        levels = self._levels(plevels, gpu)
+        if levels is None:
+            return ADL_ERR_INVALID_PARAM_SIZE
+        for index, (engine_clock, memory_clock, vddc) in enumerate(gpu.default_levels if default else gpu.levels):
+            levels[index].iEngineClock = engine_clock
+            levels[index].iMemoryClock = memory_clock
+            levels[index].iVddc = vddc
+        return ADL_OK
+
+    def _ADL_Overdrive5_ODPerformanceLevels_Set(self, adapter_index, plevels):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        levels = self._levels(plevels, gpu)
+        if levels is None:
+            return ADL_ERR_INVALID_PARAM_SIZE
+        
+        new_levels = []
+        for index in range(len(gpu.levels)):
+            level = (levels[index].iEngineClock, levels[index].iMemoryClock, levels[index].iVddc)
+            for value, (minimum, maximum, step) in zip(level, (gpu.engine_clock_range, gpu.memory_clock_range,
+                                                               gpu.vddc_range)):
+                if not minimum <= value <= maximum:
+                    return ADL_ERR_INVALID_PARAM
+            new_levels.append(level)
+        
+        gpu.levels = new_levels
+        return ADL_OK
+
+    def _ADL_Overdrive5_PowerControl_Caps(self, adapter_index, supported, reserved):
+        if self._gpu(adapter_index) is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        supported[0] = 1
+        return ADL_OK
+
+    def _ADL_Overdrive5_PowerControl_Get(self, adapter_index, current_value, default_value):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        current_value[0] = gpu.powertune
+        default_value[0] = gpu.powertune_default
+        return ADL_OK
+
+    def _ADL_Overdrive5_PowerControl_Set(self, adapter_index, value):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        if not -20 <= value <= 20:
+            return ADL_ERR_INVALID_PARAM
+        gpu.powertune = value
+        return ADL_OK
+
+    # Display
+
+    def _ADL_Display_NumberOfDisplays_Get(self, adapter_index, num_displays):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        num_displays[0] = len(gpu.displays)
+        return ADL_OK
+
+    def _ADL_Display_ConnectedDisplays_Get(self, adapter_index, connections):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        connections[0] = sum(1 << display.index for display in gpu.displays if display.connected)
+        return ADL_OK
+
+    def _ADL_Display_DisplayInfo_Get(self, adapter_index, num_displays, display_info, force_detect):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        
+        info = self._allocate(ADLDisplayInfo, len(gpu.displays))
+        for index, display in enumerate(gpu.displays):
+            info[index].displayID.iDisplayLogicalIndex = display.index
+            info[index].displayID.iDisplayPhysicalIndex = display.index
+            info[index].displayID.iDisplayLogicalAdapterIndex = adapter_index
+            info[index].displayID.iDisplayPhysicalAdapterIndex = adapter_index
+            info[index].iDisplayControllerIndex = display.index
+            info[index].strDisplayName = _bytes(display.name)
+            info[index].strDisplayManufacturerName = _bytes(display.manufacturer)
+            info[index].iDisplayConnector = ADL_DL_DISPLAYCONFIG_CONTYPE_DISPLAYPORT
+            info[index].iDisplayInfoMask = ADL_DISPLAY_DISPLAYINFO_DISPLAYCONNECTED | ADL_DISPLAY_DISPLAYINFO_DISPLAYMAPPED
+            info[index].iDisplayInfoValue = ((ADL_DISPLAY_DISPLAYINFO_DISPLAYCONNECTED if display.connected else 0) |
+                                             (ADL_DISPLAY_DISPLAYINFO_DISPLAYMAPPED if display.mapped else 0))
+        
+        num_displays[0] = len(gpu.displays)
+        display_info[0] = info
+        return ADL_OK
+
+    def _ADL_Display_EdidData_Get(self, adapter_index, display_index, edid_data):
+        display = self._display(adapter_index, display_index)
+        if display is None:
+            return ADL_ERR_INVALID_DIPLAY_IDX
+        if not display.connected:
+            return ADL_ERR
+        
+        # every block index returns up to 256 bytes of the EDID
+        edid_data = edid_data[0]
+        offset = edid_data.iBlockIndex * 256
+        if not 0 <= offset < len(display.edid):
+            return ADL_ERR_INVALID_PARAM
+        data = display.edid[offset:offset + 256]
+        # assigning to the c_char array would stop at the first NUL, which every EDID starts with
+        memmove(addressof(edid_data) + ADLDisplayEDIDData.cEDIDData.offset, data, len(data))
+        edid_data.iEDIDSize = len(data)
+        return ADL_OK
+
+    def _ADL_Display_Modes_Get(self, adapter_index, display_index, num_modes, modes):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        if display_index == -1:
+            displays = gpu.displays
+        else:
+            display = self._display(adapter_index, display_index)
+            if display is None:
+                return ADL_ERR_INVALID_DIPLAY_IDX
+            displays = [display]
+        
+        all_modes = [(display, mode) for display in displays for mode in display.modes]
+        buffer = self._allocate(ADLMode, len(all_modes))
+        for index, (display, (xres, yres, refresh_rate, colour_depth)) in enumerate(all_modes):
+            mode = buffer[index]
+            mode.iAdapterIndex = adapter_index
+            mode.displayID.iDisplayLogicalIndex = display.index
+            mode.displayID.iDisplayPhysicalIndex = display.index
+            mode.displayID.iDisplayLogicalAdapterIndex = adapter_index
+            mode.displayID.iDisplayPhysicalAdapterIndex = adapter_index
+            mode.iXRes = xres
+            mode.iYRes = yres
+            mode.iColourDepth = colour_depth
+            mode.fRefreshRate = refresh_rate
+        
+        num_modes[0] = len(all_modes)
+        modes[0] = buffer
+        return ADL_OK
+
+    def _ADL_Display_DisplayMapConfig_Get(self, adapter_index, num_maps, maps, num_targets, targets, options):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        
+        map_buffer = self._allocate(ADLDisplayMap, len(gpu.display_maps))
+        target_buffer = self._allocate(ADLDisplayTarget, sum(len(display_map.targets) for display_map in gpu.display_maps))
+        target_index = 0
+        for map_index, display_map in enumerate(gpu.display_maps):
+            entry = map_buffer[map_index]
+            entry.iDisplayMapIndex = map_index
+            mode = entry.displayMode
+            mode.iAdapterIndex = adapter_index
+            mode.iXPos = display_map.x
+            mode.iYPos = display_map.y
+            mode.iXRes, mode.iYRes, mode.fRefreshRate, mode.iColourDepth = display_map.mode
+            entry.iNumDisplayTarget = len(display_map.targets)
+            entry.iFirstDisplayTargetArrayIndex = target_index
+            for display_index in display_map.targets:
+                target = target_buffer[target_index]
+                target.displayID.iDisplayLogicalIndex = display_index
+                target.displayID.iDisplayPhysicalIndex = display_index
+                target.displayID.iDisplayLogicalAdapterIndex = adapter_index
+                target.displayID.iDisplayPhysicalAdapterIndex = adapter_index
+                target.iDisplayMapIndex = map_index
+                target_index += 1
+        
+        num_maps[0] = len(gpu.display_maps)
+        maps[0] = map_buffer
+        num_targets[0] = target_index
+        targets[0] = target_buffer
+        return ADL_OK
+
+    def _check_display_maps(self, gpu, display_maps):
+        # display_maps is a list of (mode, display indexes); returns an ADL status code
+        if not display_maps or len(display_maps) > gpu.num_controllers:
+            return ADL_ERR_INVALID_PARAM
+        seen = set()
+        for mode, targets in display_maps:
+            if not targets or len(targets) > gpu.max_clone_targets:
+                return ADL_ERR_INVALID_PARAM
+            for display_index in targets:
+                if not 0 <= display_index < len(gpu.displays):
+                    return ADL_ERR_INVALID_DIPLAY_IDX
+                display = gpu.displays[display_index]
+                if display_index in seen or not display.connected or mode not in display.modes:
+                    return ADL_ERR_INVALID_PARAM
+                seen.add(display_index)
+        return ADL_OK
+
+    def _read_display_maps(self, num_maps, maps, num_targets, targets):
+        # [(mode, x, y, display indexes)] from ADLDisplayMap/ADLDisplayTarget arrays, or None if malformed
+        display_maps = []
+        for map_index in range(num_maps):
+            entry = maps[map_index]
+            mode = entry.displayMode
+            first = entry.iFirstDisplayTargetArrayIndex
+            if first < 0 or first + entry.iNumDisplayTarget > num_targets:
+                return None
+            display_maps.append(((mode.iXRes, mode.iYRes, round(mode.fRefreshRate, 2), mode.iColourDepth),
+                                 mode.iXPos, mode.iYPos,
+                                 [targets[index].displayID.iDisplayLogicalIndex
+                                  for index in range(first, first + entry.iNumDisplayTarget)]))
+        return display_maps
+
+    def _ADL_Display_DisplayMapConfig_Set(self, adapter_index, num_maps, maps, num_targets, targets):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        display_maps = self._read_display_maps(num_maps, maps, num_targets, targets)
+        if display_maps is None:
+            return ADL_ERR_INVALID_PARAM
+        result = self._check_display_maps(gpu, [(mode, targets) for mode, x, y, targets in display_maps])
+        if result != ADL_OK:
+            return result
+        
+        gpu.display_maps = [SimulatedDisplayMap(mode, targets, x, y) for mode, x, y, targets in display_maps]
+        mapped = set(display_index for mode, x, y, targets in display_maps for display_index in targets)
+        for display in gpu.displays:
+            display.mapped = display.index in mapped
+        return ADL_OK
+
+    def _ADL_Display_DisplayMapConfig_Validate(self, adapter_index, num_possible_maps, possible_maps,
+                                               num_results, results):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        
+        buffer = self._allocate(ADLPossibleMapResult, num_possible_maps)
+        for index in range(num_possible_maps):
+            possible_map = possible_maps[index]
+            display_maps = self._read_display_maps(possible_map.iNumDisplayMap, possible_map.displayMap,
+                                                   possible_map.iNumDisplayTarget, possible_map.displayTarget)
+            valid = display_maps is not None and self._check_display_maps(
+                gpu, [(mode, targets) for mode, x, y, targets in display_maps]) == ADL_OK
+            buffer[index].iIndex = possible_map.iIndex
+            buffer[index].iPossibleMapResultMask = ADL_DISPLAY_POSSIBLEMAPRESULT_VALID
+            buffer[index].iPossibleMapResultValue = ADL_DISPLAY_POSSIBLEMAPRESULT_VALID if valid else 0
+        
+        num_results[0] = num_possible_maps
+        results[0] = buffer
+        return ADL_OK
+
+    def _ADL_Display_DisplayMapConfig_PossibleAddAndRemove(self, adapter_index, num_maps, maps, num_targets, targets,
+                                                           num_add, add_targets, num_remove, remove_targets):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        display_maps = self._read_display_maps(num_maps, maps, num_targets, targets)
+        if display_maps is None or len(display_maps) != 1:
+            return ADL_ERR_INVALID_PARAM
+        mode, x, y, current = display_maps[0]
+        
+        # displays that could join the map: connected, free, able to show its mode, and while there's room
+        mapped = set(display_index for display_map in gpu.display_maps for display_index in display_map.targets)
+        addable = [display.index for display in gpu.displays
+                   if display.connected and display.index not in current and display.index not in mapped and
+                   mode in display.modes] if len(current) < gpu.max_clone_targets else []
+        # a map keeps at least one display
+        removable = list(current) if len(current) > 1 else []
+        
+        for count, out, indexes in ((num_add, add_targets, addable), (num_remove, remove_targets, removable)):
+            buffer = self._allocate(ADLDisplayTarget, len(indexes))
+            for position, display_index in enumerate(indexes):
+                buffer[position].displayID.iDisplayLogicalIndex = display_index
+                buffer[position].displayID.iDisplayPhysicalIndex = display_index
+                buffer[position].displayID.iDisplayLogicalAdapterIndex = adapter_index
+                buffer[position].displayID.iDisplayPhysicalAdapterIndex = adapter_index
+            count[0] = len(indexes)
+            out[0] = buffer
+        return ADL_OK
+
+    # SLS
+
+    def _ADL_Display_SLSGrid_Caps(self, adapter_index, num_grids, grids, option):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        
+        buffer = self._allocate(ADLSLSGrid, len(gpu.sls_grids))
+        for grid_index, (rows, columns) in enumerate(gpu.sls_grids):
+            grid = buffer[grid_index]
+            grid.iAdapterIndex = adapter_index
+            grid.iSLSGridIndex = grid_index
+            grid.iSLSGridRow = rows
+            grid.iSLSGridColumn = columns
+            grid.iSLSGridMask = ADL_DISPLAY_SLSGRID_RELATIVETO_LANDSCAPE | ADL_DISPLAY_SLSGRID_PORTAIT_MODE
+            grid.iSLSGridValue = ADL_DISPLAY_SLSGRID_RELATIVETO_LANDSCAPE | (
+                ADL_DISPLAY_SLSGRID_PORTAIT_MODE if rows > columns else 0)
+        num_grids[0] = len(gpu.sls_grids)
+        grids[0] = buffer
+        return ADL_OK
+
+    def _ADL_Display_SLSMapIndexList_Get(self, adapter_index, num_indexes, indexes, option):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        
+        if option & ADL_DISPLAY_SLSMAPINDEXLIST_OPTION_ACTIVE:
+            map_indexes = [gpu.active_sls_map] if gpu.active_sls_map is not None else []
+        else:
+            map_indexes = sorted(gpu.sls_maps)
+        buffer = self._allocate(c_int, len(map_indexes))
+        for position, map_index in enumerate(map_indexes):
+            buffer[position] = map_index
+        num_indexes[0] = len(map_indexes)
+        indexes[0] = buffer
+        return ADL_OK
+
+    def _ADL_Display_SLSMapConfig_Get(self, adapter_index, map_index, sls_map, num_targets, targets,
+                                      num_native_modes, native_modes, num_bezel_modes, bezel_modes,
+                                      num_transient_modes, transient_modes, num_offsets, offsets, option):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        simulated = gpu.sls_maps.get(map_index)
+        if simulated is None:
+            return ADL_ERR_INVALID_PARAM
+        
+        entry = sls_map[0]
+        entry.iAdapterIndex = adapter_index
+        entry.iSLSMapIndex = map_index
+        entry.grid.iSLSGridIndex = gpu.sls_grids.index((simulated.rows, simulated.columns))
+        entry.grid.iSLSGridRow = simulated.rows
+        entry.grid.iSLSGridColumn = simulated.columns
+        entry.iOrientation = simulated.orientation
+        entry.iNumSLSTarget = len(simulated.positions)
+        entry.iNumBezelOffset = len(simulated.offsets)
+        entry.iSLSMapMask = ADL_DISPLAY_SLSMAP_CURRENTCONFIG | ADL_DISPLAY_SLSMAP_BEZELMODE
+        entry.iSLSMapValue = ((ADL_DISPLAY_SLSMAP_CURRENTCONFIG if gpu.active_sls_map == map_index else 0) |
+                              (ADL_DISPLAY_SLSMAP_BEZELMODE if simulated.offsets else 0))
+        
+        target_buffer = self._allocate(ADLSLSTarget, len(simulated.positions))
+        for position, display_index in enumerate(sorted(simulated.positions)):
+            target = target_buffer[position]
+            target.iAdapterIndex = adapter_index
+            target.iSLSMapIndex = map_index
+            target.displayTarget.displayID.iDisplayLogicalIndex = display_index
+            target.displayTarget.displayID.iDisplayPhysicalIndex = display_index
+            target.displayTarget.displayID.iDisplayLogicalAdapterIndex = adapter_index
+            target.displayTarget.displayID.iDisplayPhysicalAdapterIndex = adapter_index
+            target.iSLSGridPositionX, target.iSLSGridPositionY = simulated.positions[display_index]
+        offset_buffer = self._allocate(ADLSLSOffset, len(simulated.offsets))
+        for position, display_index in enumerate(sorted(simulated.offsets)):
+            offset = offset_buffer[position]
+            offset.iAdapterIndex = adapter_index
+            offset.iSLSMapIndex = map_index
+            offset.displayID.iDisplayLogicalIndex = display_index
+            offset.iBezelOffsetX, offset.iBezelOffsetY = simulated.offsets[display_index]
+        
+        num_targets[0] = len(simulated.positions)
+        targets[0] = target_buffer
+        for count, out, struct_type in ((num_native_modes, native_modes, ADLSLSMode),
+                                        (num_bezel_modes, bezel_modes, ADLBezelTransientMode),
+                                        (num_transient_modes, transient_modes, ADLBezelTransientMode)):
+            count[0] = 0
+            out[0] = self._allocate(struct_type, 0)
+        num_offsets[0] = len(simulated.offsets)
+        offsets[0] = offset_buffer
+        return ADL_OK
+
+    def _read_sls_targets(self, gpu, sls_map, num_targets, targets):
+        # a SimulatedSLSMap from an ADLSLSMap and its ADLSLSTarget array, or None if the driver would refuse it
+        rows, columns = sls_map.grid.iSLSGridRow, sls_map.grid.iSLSGridColumn
+        if (rows, columns) not in gpu.sls_grids or num_targets != rows * columns:
+            return None
+        positions = {}
+        for index in range(num_targets):
+            target = targets[index]
+            display_index = target.displayTarget.displayID.iDisplayLogicalIndex
+            position = (target.iSLSGridPositionX, target.iSLSGridPositionY)
+            if (not 0 <= display_index < len(gpu.displays) or not gpu.displays[display_index].connected or
+                    display_index in positions or position in positions.values() or
+                    not (0 <= position[0] < columns and 0 <= position[1] < rows)):
+                return None
+            positions[display_index] = position
+        if sls_map.iOrientation not in (0, 90, 180, 270):
+            return None
+        return SimulatedSLSMap(rows, columns, positions, sls_map.iOrientation)
+
+    def _ADL_Display_SLSMapConfig_Create(self, adapter_index, sls_map, num_targets, targets, bezel_mode_percent,
+                                         map_index, option):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        simulated = self._read_sls_targets(gpu, sls_map, num_targets, targets)
+        if simulated is None:
+            return ADL_ERR_INVALID_PARAM
+        
+        new_index = max(gpu.sls_maps) + 1 if gpu.sls_maps else 0
+        gpu.sls_maps[new_index] = simulated
+        map_index[0] = new_index
+        return ADL_OK
+
+    def _ADL_Display_SLSMapConfig_Delete(self, adapter_index, map_index):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        if map_index not in gpu.sls_maps:
+            return ADL_ERR_INVALID_PARAM
+        if gpu.active_sls_map == map_index:
+            gpu.active_sls_map = None
+            gpu.desktop_resets += 1
+        del gpu.sls_maps[map_index]
+        return ADL_OK
+
+    def _ADL_Display_SLSMapConfig_SetState(self, adapter_index, map_index, state):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        if map_index not in gpu.sls_maps:
+            return ADL_ERR_INVALID_PARAM
+        
+        # enabling a map replaces the active one; either way the desktop is rebuilt
+        active = map_index if state else (None if gpu.active_sls_map == map_index else gpu.active_sls_map)
+        if active != gpu.active_sls_map:
+            gpu.active_sls_map = active
+            gpu.desktop_resets += 1
+        return ADL_OK
+
+    def _ADL_Display_SLSMapConfig_Rearrange(self, adapter_index, map_index, num_targets, targets, sls_map, option):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        current = gpu.sls_maps.get(map_index)
+        simulated = self._read_sls_targets(gpu, sls_map, num_targets, targets)
+        if current is None or simulated is None or set(simulated.positions) != set(current.positions):
+            return ADL_ERR_INVALID_PARAM
+        
+        current.rows, current.columns = simulated.rows, simulated.columns
+        current.positions = simulated.positions
+        current.orientation = simulated.orientation
+        if gpu.active_sls_map == map_index:
+            gpu.desktop_resets += 1
+        return ADL_OK
+
+    def _ADL_Display_BezelOffsetSteppingSize_Get(self, adapter_index, num_sizes, sizes):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        
+        buffer = self._allocate(ADLBezelOffsetSteppingSize, len(gpu.sls_maps))
+        for position, map_index in enumerate(sorted(gpu.sls_maps)):
+            size = buffer[position]
+            size.iAdapterIndex = adapter_index
+            size.iSLSMapIndex = map_index
+            size.iBezelOffsetSteppingSizeX, size.iBezelOffsetSteppingSizeY = gpu.bezel_step
+        num_sizes[0] = len(gpu.sls_maps)
+        sizes[0] = buffer
+        return ADL_OK
+
+    def _ADL_Display_BezelOffset_Set(self, adapter_index, map_index, num_offsets, offsets, sls_map, option):
+        gpu = self._gpu(adapter_index)
+        if gpu is None:
+            return ADL_ERR_INVALID_ADL_IDX
+        simulated = gpu.sls_maps.get(map_index)
+        if simulated is None:
+            return ADL_ERR_INVALID_PARAM
+        
+        step_x, step_y = gpu.bezel_step
+        new_offsets = {}
+        for index in range(num_offsets):
+            offset = offsets[index]
+            display_index = offset.displayID.iDisplayLogicalIndex
+            if (display_index not in simulated.positions or
+                    offset.iBezelOffsetX % step_x or offset.iBezelOffsetY % step_y):
+                return ADL_ERR_INVALID_PARAM
+            new_offsets[display_index] = (offset.iBezelOffsetX, offset.iBezelOffsetY)
+        
+        if sls_map.iSLSMapMask & ADL_DISPLAY_SLSMAP_BEZELMODE and not sls_map.iSLSMapValue & ADL_DISPLAY_SLSMAP_BEZELMODE:
+            # bezel mode off
+            simulated.offsets.clear()
+        else:
+            simulated.offsets.update(new_offsets)
+        # stepping adjusts a live desktop in place; committing to the active map rebuilds it
+        if option & ADL_DISPLAY_BEZELOFFSET_COMMIT and gpu.active_sls_map == map_index:
+            gpu.desktop_resets += 1
+        return ADL_OK
+
+def _benchmark(latency=0.0, gpu_counts=(1, 4, 16, 64), sweeps=20):
+    from .adl_topology import AdapterTopology
+    from .adl_snapshot import snapshot
+    from .adl_sampler import Sampler
+    from . import adl_overdrive
+    
+    print("%6s %14s %14s %10s" % ("gpus", "snapshot (ms)", "sampler (ms)", "set path"))
+    for num_gpus in gpu_counts:
+        simulated = SimulatedADL(num_gpus=num_gpus, latency=latency)
+        adl_api.set_library(simulated)
+        adl_api.ADL_Main_Control_Create(adl_api.ADL_Main_Memory_Alloc, 1)
+        try:
+            topology = AdapterTopology()
+            
+            status = None
+            start = time.time()
+            for sweep in range(sweeps):
+                status = snapshot(topology.adapters, out=status)
+            snapshot_time = (time.time() - start) / sweeps
+            
+            with Sampler(topology.adapters) as sampler:
+                result = None
+                start = time.time()
+                for sweep in range(sweeps):
+                    result = sampler.sweep(out=result)
+                sampler_time = (time.time() - start) / sweeps
+            
+            # raise the top engine clock on every adapter and check that it took
+            for info in topology.adapters:
+                num_levels = adl_overdrive.get_od_parameters(info.iAdapterIndex).iNumberOfPerformanceLevels
+                plevels = adl_overdrive.get_performance_levels(info.iAdapterIndex, num_levels)
+                adl_overdrive.get_levels(plevels)[num_levels - 1].iEngineClock += 500
+                adl_overdrive.set_performance_levels(info.iAdapterIndex, plevels)
+            correct = all(gpu.levels[-1][0] == gpu.default_levels[-1][0] + 500 for gpu in simulated.gpus)
+            
+            print("%6d %14.3f %14.3f %10s" % (num_gpus, snapshot_time * 1000.0, sampler_time * 1000.0,
+                                              "ok" if correct else "FAILED"))
+        finally:
+            adl_api.ADL_Main_Control_Destroy()
+
+if __name__ == "__main__":
+    # python -m adl3.adl_simulated [per-call latency in seconds]
+    import sys
+    _benchmark(latency=float(sys.argv[1]) if len(sys.argv) > 1 else 0.0)
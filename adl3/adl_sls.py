@@ -0,0 +1,320 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import math
+from collections import namedtuple
+from ctypes import byref, c_int
+
+from .adl_defines import (ADL_DISPLAY_SLSGRID_CAP_OPTION_RELATIVETO_LANDSCAPE, ADL_DISPLAY_SLSGRID_PORTAIT_MODE,
+                          ADL_DISPLAY_SLSMAP_BEZELMODE, ADL_DISPLAY_SLSMAP_CURRENTCONFIG,
+                          ADL_DISPLAY_SLSMAPCONFIG_GET_OPTION_RELATIVETO_LANDSCAPE,
+                          ADL_DISPLAY_SLSMAPCONFIG_CREATE_OPTION_RELATIVETO_LANDSCAPE,
+                          ADL_DISPLAY_SLSMAPCONFIG_REARRANGE_OPTION_RELATIVETO_LANDSCAPE,
+                          ADL_DISPLAY_BEZELOFFSET_STEPBYSTEPSET, ADL_DISPLAY_BEZELOFFSET_COMMIT)
+from .adl_structures import (ADLSLSGrid, ADLSLSMap, ADLSLSTarget, ADLSLSMode, ADLSLSOffset,
+                             ADLBezelTransientMode, ADLBezelOffsetSteppingSize)
+from .adl_memory import ADLBuffer, Arena
+from .adl_api import (ADLNotSupportedError,
+                      ADL_Display_SLSGrid_Caps,
+                      ADL_Display_SLSMapIndexList_Get,
+                      ADL_Display_SLSMapConfig_Get,
+                      ADL_Display_SLSMapConfig_Create,
+                      ADL_Display_SLSMapConfig_Delete,
+                      ADL_Display_SLSMapConfig_SetState,
+                      ADL_Display_SLSMapConfig_Rearrange,
+                      ADL_Display_BezelOffsetSteppingSize_Get,
+                      ADL_Display_BezelOffset_Set)
+
+# A grid the driver can build an SLS (Eyefinity) desktop on.
+SLSGrid = namedtuple("SLSGrid", "index rows columns portrait")
+
+# An SLS map as the driver has it. displays lists the display indexes row by row (None where a
+# grid position is empty), and offsets is a sorted tuple of (display index, x, y) bezel offsets.
+SLSMapConfig = namedtuple("SLSMapConfig", "index rows columns orientation displays offsets active")
+
+def _round_to(value, step):
+    # halves round up on Python 2 and 3 alike (Python 3's round() goes to the even multiple)
+    return int(math.floor(value / float(step) + 0.5)) * step
+
+class SLSLayout(namedtuple("SLSLayout", "rows columns displays orientation bezel")):
+    """A declarative SLS grid: rows x columns displays (display indexes, row by row), rotated by
+    orientation degrees, with bezel an (x, y) number of pixels hidden behind the bezels between
+    neighbouring displays, or None for no bezel compensation. SLSLayout.parse() reads the
+    same from a string such as "2x3:0,1,2,3,4,5 bezel=64,48".
+    """
+    
+    __slots__ = ()
+    
+    def __new__(cls, rows, columns, displays, orientation=0, bezel=None):
+        displays = tuple(displays)
+        if rows < 1 or columns < 1 or len(displays) != rows * columns:
+            raise ValueError("a %dx%d SLS grid needs %d displays, not %d" % (rows, columns, rows * columns, len(displays)))
+        if len(set(displays)) != len(displays):
+            raise ValueError("a display can only appear once in an SLS grid")
+        if orientation not in (0, 90, 180, 270):
+            raise ValueError("orientation must be 0, 90, 180 or 270, not %r" % (orientation,))
+        if bezel is not None:
+            bezel = (int(bezel[0]), int(bezel[1]))
+        return super(SLSLayout, cls).__new__(cls, rows, columns, displays, orientation, bezel)
+
+    @classmethod
+    def parse(cls, spec):
+        """Parses "ROWSxCOLUMNS:DISPLAY,DISPLAY,... [rotate=DEGREES] [bezel=X,Y]"."""
+        try:
+            words = spec.split()
+            grid, displays = words[0].split(":")
+            rows, columns = [int(value) for value in grid.lower().split("x")]
+            options = dict(word.split("=", 1) for word in words[1:])
+            bezel = options.pop("bezel", None)
+            orientation = int(options.pop("rotate", 0))
+            if options:
+                raise ValueError("unknown option %s" % ", ".join(sorted(options)))
+            return cls(rows, columns, [int(display) for display in displays.split(",")], orientation,
+                       [int(value) for value in bezel.split(",")] if bezel is not None else None)
+        except ValueError as e:
+            raise ValueError("invalid SLS layout %r: %s" % (spec, e))
+
+    def positions(self):
+        """{display index: (column, row)}"""
+        return dict((display_index, (position % self.columns, position // self.columns))
+                    for position, display_index in enumerate(self.displays))
+
+    def offsets(self, step=(1, 1)):
+        """The bezel offsets that compensate for self.bezel, as a sorted tuple of (display index,
+        x, y), each rounded to the nearest multiple of the driver's (x, y) step; () without bezel."""
+        if self.bezel is None:
+            return ()
+        step_x, step_y = max(step[0], 1), max(step[1], 1)
+        return tuple(sorted((display_index,
+                             _round_to(column * self.bezel[0], step_x),
+                             _round_to(row * self.bezel[1], step_y))
+                            for display_index, (column, row) in self.positions().items()))
+
+class SLSEngine(object):
+    """Creates, rearranges and enables SLS maps on one adapter from SLSLayouts.
+    
+    The possible grids are read from the driver once, and the SLS maps once until clear() (call it
+    if something else changes the SLS configuration); apply() works out from them which calls it
+    needs instead of asking the driver. Whatever needs changing is changed while the map is
+    inactive, and the map is then enabled with a single ADL_Display_SLSMapConfig_SetState, so the
+    desktop is reset only once. An already active map is rearranged in place, with its bezel
+    offsets set step by step, which doesn't reset the desktop again.
+    """
+    
+    def __init__(self, adapter_index):
+        self.adapter_index = getattr(adapter_index, "iAdapterIndex", adapter_index)
+        self._grids = None
+        self._maps = None
+        self._steps = {}
+
+    def clear(self):
+        self._maps = None
+        self._steps.clear()
+
+    def grids(self):
+        """The SLSGrids the adapter supports."""
+        if self._grids is None:
+            num_grids = c_int()
+            with ADLBuffer(ADLSLSGrid) as grids:
+                ADL_Display_SLSGrid_Caps(self.adapter_index, byref(num_grids), grids.ref,
+                                         ADL_DISPLAY_SLSGRID_CAP_OPTION_RELATIVETO_LANDSCAPE)
+                grids.count = num_grids.value
+                self._grids = tuple(SLSGrid(grid.iSLSGridIndex, grid.iSLSGridRow, grid.iSLSGridColumn,
+                                            bool(grid.iSLSGridValue & ADL_DISPLAY_SLSGRID_PORTAIT_MODE))
+                                    for grid in grids)
+        return self._grids
+
+    def grid(self, rows, columns):
+        for grid in self.grids():
+            if grid.rows == rows and grid.columns == columns:
+                return grid
+        raise ADLNotSupportedError("Adapter %d can't build a %dx%d SLS grid." % (self.adapter_index, rows, columns),
+                                   function="ADL_Display_SLSGrid_Caps", adapter_index=self.adapter_index)
+
+    def maps(self, refresh=False):
+        """{SLS map index: SLSMapConfig} for every SLS map on the adapter."""
+        if self._maps is None or refresh:
+            num_indexes = c_int()
+            with ADLBuffer(c_int) as indexes:
+                ADL_Display_SLSMapIndexList_Get(self.adapter_index, byref(num_indexes), indexes.ref, 0)
+                indexes.count = num_indexes.value
+                self._maps = dict((map_index, self._read_map(map_index)) for map_index in list(indexes))
+        return self._maps
+
+    def _read_map(self, map_index):
+        sls_map = ADLSLSMap()
+        counts = [c_int() for i in range(5)]
+        with Arena() as arena:
+            targets = arena.buffer(ADLSLSTarget)
+            offsets = arena.buffer(ADLSLSOffset)
+            buffers = [targets, arena.buffer(ADLSLSMode), arena.buffer(ADLBezelTransientMode),
+                       arena.buffer(ADLBezelTransientMode), offsets]
+            arguments = []
+            for count, buffer in zip(counts, buffers):
+                arguments += [byref(count), buffer.ref]
+            ADL_Display_SLSMapConfig_Get(self.adapter_index, map_index, byref(sls_map), *(arguments +
+                                         [ADL_DISPLAY_SLSMAPCONFIG_GET_OPTION_RELATIVETO_LANDSCAPE]))
+            for count, buffer in zip(counts, buffers):
+                buffer.count = count.value
+            
+            rows, columns = sls_map.grid.iSLSGridRow, sls_map.grid.iSLSGridColumn
+            displays = [None] * (rows * columns)
+            for target in targets:
+                position = target.iSLSGridPositionY * columns + target.iSLSGridPositionX
+                if 0 <= position < len(displays):
+                    displays[position] = target.displayTarget.displayID.iDisplayLogicalIndex
+            return SLSMapConfig(map_index, rows, columns, sls_map.iOrientation, tuple(displays),
+                                tuple(sorted((offset.displayID.iDisplayLogicalIndex, offset.iBezelOffsetX,
+                                              offset.iBezelOffsetY) for offset in offsets)),
+                                bool(sls_map.iSLSMapMask & sls_map.iSLSMapValue & ADL_DISPLAY_SLSMAP_CURRENTCONFIG))
+
+    def active(self):
+        """The active SLSMapConfig, or None."""
+        for config in self.maps().values():
+            if config.active:
+                return config
+        return None
+
+    def find(self, displays):
+        """The SLSMapConfig spanning exactly the given displays, or None."""
+        displays = set(displays)
+        for config in self.maps().values():
+            if set(config.displays) == displays:
+                return config
+        return None
+
+    def bezel_step(self, map_index):
+        """The (x, y) multiples of pixels bezel offsets on an SLS map must be."""
+        if map_index not in self._steps:
+            num_sizes = c_int()
+            with ADLBuffer(ADLBezelOffsetSteppingSize) as sizes:
+                ADL_Display_BezelOffsetSteppingSize_Get(self.adapter_index, byref(num_sizes), sizes.ref)
+                sizes.count = num_sizes.value
+                self._steps = dict((size.iSLSMapIndex, (size.iBezelOffsetSteppingSizeX, size.iBezelOffsetSteppingSizeY))
+                                   for size in sizes)
+        return self._steps.get(map_index, (1, 1))
+
+    def _structures(self, layout, map_index=-1):
+        grid = self.grid(layout.rows, layout.columns)
+        sls_map = ADLSLSMap()
+        sls_map.iAdapterIndex = self.adapter_index
+        sls_map.iSLSMapIndex = map_index
+        sls_map.grid.iAdapterIndex = self.adapter_index
+        sls_map.grid.iSLSGridIndex = grid.index
+        sls_map.grid.iSLSGridRow = grid.rows
+        sls_map.grid.iSLSGridColumn = grid.columns
+        sls_map.iOrientation = layout.orientation
+        sls_map.iNumSLSTarget = len(layout.displays)
+        
+        targets = (ADLSLSTarget * len(layout.displays))()
+        for target, (display_index, (column, row)) in zip(targets, sorted(layout.positions().items())):
+            target.iAdapterIndex = self.adapter_index
+            target.iSLSMapIndex = map_index
+            target.displayTarget.displayID.iDisplayLogicalIndex = display_index
+            target.displayTarget.displayID.iDisplayPhysicalIndex = display_index
+            target.displayTarget.displayID.iDisplayLogicalAdapterIndex = self.adapter_index
+            target.displayTarget.displayID.iDisplayPhysicalAdapterIndex = self.adapter_index
+            target.iSLSGridPositionX = column
+            target.iSLSGridPositionY = row
+        return sls_map, targets
+
+    def apply(self, layout, enable=True):
+        """Makes layout (an SLSLayout or a spec for SLSLayout.parse) an SLS map, reusing the map
+        that spans its displays if there is one, sets its bezel offsets and, if enable, makes it
+        the active SLS desktop. Returns its SLSMapConfig."""
+        if not isinstance(layout, SLSLayout):
+            layout = SLSLayout.parse(layout)
+        config = self.find(layout.displays)
+        
+        try:
+            if config is None:
+                sls_map, targets = self._structures(layout)
+                map_index = c_int()
+                ADL_Display_SLSMapConfig_Create(self.adapter_index, sls_map, len(targets), targets, 0, byref(map_index),
+                                                ADL_DISPLAY_SLSMAPCONFIG_CREATE_OPTION_RELATIVETO_LANDSCAPE)
+                config = SLSMapConfig(map_index.value, layout.rows, layout.columns, layout.orientation,
+                                      layout.displays, (), False)
+                self._maps[config.index] = config
+            elif (config.rows, config.columns, config.displays, config.orientation) != layout[:4]:
+                sls_map, targets = self._structures(layout, config.index)
+                ADL_Display_SLSMapConfig_Rearrange(self.adapter_index, config.index, len(targets), targets, sls_map,
+                                                   ADL_DISPLAY_SLSMAPCONFIG_REARRANGE_OPTION_RELATIVETO_LANDSCAPE)
+                config = config._replace(rows=layout.rows, columns=layout.columns, orientation=layout.orientation,
+                                         displays=layout.displays)
+                self._maps[config.index] = config
+            
+            # without bezel compensation the offsets are cleared, so none are left over from
+            # an earlier arrangement
+            offsets = layout.offsets(self.bezel_step(config.index)) if layout.bezel is not None else ()
+            if offsets != config.offsets:
+                self._set_offsets(layout, config, offsets)
+                config = config._replace(offsets=offsets)
+                self._maps[config.index] = config
+            
+            if enable and not config.active:
+                ADL_Display_SLSMapConfig_SetState(self.adapter_index, config.index, 1)
+                for other in self._maps.values():
+                    if other.active:
+                        self._maps[other.index] = other._replace(active=False)
+                config = config._replace(active=True)
+                self._maps[config.index] = config
+        except Exception:
+            # a failed call may have left the driver somewhere between the cached state and the layout
+            self.clear()
+            raise
+        return config
+
+    def _set_offsets(self, layout, config, offsets):
+        # no offsets turns bezel mode off, zeroing the offsets of every display
+        sls_map, targets = self._structures(layout, config.index)
+        sls_map.iSLSMapMask = ADL_DISPLAY_SLSMAP_BEZELMODE
+        if offsets:
+            sls_map.iSLSMapValue = ADL_DISPLAY_SLSMAP_BEZELMODE
+        else:
+            offsets = tuple((display_index, 0, 0) for display_index in sorted(layout.displays))
+        sls_map.iNumBezelOffset = len(offsets)
+        
+        structures = (ADLSLSOffset * len(offsets))()
+        for structure, (display_index, x, y) in zip(structures, offsets):
+            structure.iAdapterIndex = self.adapter_index
+            structure.iSLSMapIndex = config.index
+            structure.displayID.iDisplayLogicalIndex = display_index
+            structure.displayID.iDisplayPhysicalIndex = display_index
+            structure.displayID.iDisplayLogicalAdapterIndex = self.adapter_index
+            structure.displayID.iDisplayPhysicalAdapterIndex = self.adapter_index
+            structure.iBezelOffsetX = x
+            structure.iBezelOffsetY = y
+        
+        # committing offsets to the active desktop rebuilds it, stepping adjusts it in place
+        ADL_Display_BezelOffset_Set(self.adapter_index, config.index, len(offsets), structures, sls_map,
+                                    ADL_DISPLAY_BEZELOFFSET_STEPBYSTEPSET if config.active else ADL_DISPLAY_BEZELOFFSET_COMMIT)
+
+    def disable(self):
+        """Turns the active SLS desktop off, if there is one."""
+        config = self.active()
+        if config is not None:
+            ADL_Display_SLSMapConfig_SetState(self.adapter_index, config.index, 0)
+            self._maps[config.index] = config._replace(active=False)
+
+    def delete(self, map_index):
+        ADL_Display_SLSMapConfig_Delete(self.adapter_index, map_index)
+        self.maps().pop(map_index, None)
+        self._steps.pop(map_index, None)
@@ -0,0 +1,207 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import threading
+import time
+from array import array
+from ctypes import c_int
+
+from .adl_defines import ADL_DL_FANCTRL_SPEED_TYPE_PERCENT, ADL_DL_FANCTRL_SPEED_TYPE_RPM
+from .adl_structures import ADLPMActivity, ADLTemperature, ADLFanSpeedValue, default_pool
+from .adl_caps import (CAP_ALL, CAP_CURRENT_ACTIVITY, CAP_TEMPERATURE, CAP_FAN_SPEED_PERCENT,
+                       CAP_FAN_SPEED_RPM, CAP_POWER_CONTROL)
+from .adl_api import (ADLError, ADLNotSupportedError,
+                      ADL_Overdrive5_CurrentActivity_Get,
+                      ADL_Overdrive5_Temperature_Get,
+                      ADL_Overdrive5_FanSpeed_Get,
+                      ADL_Overdrive5_PowerControl_Get)
+
+# Columns of a snapshot row, in the driver's own units: clocks in 10kHz, vddc in mV,
+# temperature in millidegrees C, powertune in percent.
+SNAPSHOT_COLUMNS = (
+    "adapter_index",
+    "engine_clock",
+    "memory_clock",
+    "vddc",
+    "activity",
+    "performance_level",
+    "bus_speed",
+    "bus_lanes",
+    "max_bus_lanes",
+    "fan_percent",
+    "fan_rpm",
+    "temperature",
+    "powertune",
+)
+
+# stored in place of any metric the driver couldn't read (powertune can legitimately be negative)
+SNAPSHOT_MISSING = -2147483648
+
+_NUM_COLUMNS = len(SNAPSHOT_COLUMNS)
+_COLUMN_INDEX = dict((name, index) for index, name in enumerate(SNAPSHOT_COLUMNS))
+
+class Snapshot(object):
+    """One reading of every metric for a list of adapters, stored row-major in a single array('i')."""
+    
+    __slots__ = ["data", "num_adapters", "timestamp"]
+    
+    columns = SNAPSHOT_COLUMNS
+    
+    def __init__(self, num_adapters):
+        self.data = array("i", [SNAPSHOT_MISSING]) * (num_adapters * _NUM_COLUMNS)
+        self.num_adapters = num_adapters
+        self.timestamp = 0.0
+
+    def __len__(self):
+        return self.num_adapters
+
+    def row(self, index):
+        offset = index * _NUM_COLUMNS
+        return self.data[offset:offset + _NUM_COLUMNS]
+
+    def rows(self):
+        for index in range(self.num_adapters):
+            yield self.row(index)
+
+    def column(self, name):
+        return self.data[_COLUMN_INDEX[name]::_NUM_COLUMNS]
+
+    def get(self, index, name):
+        value = self.data[index * _NUM_COLUMNS + _COLUMN_INDEX[name]]
+        return None if value == SNAPSHOT_MISSING else value
+
+class _AdapterBuffers(object):
+    # the ctypes structures (and their byrefs) used to sample one adapter, allocated once
+    
+    __slots__ = ["adapter_index", "caps", "lock",
+                 "activity", "activity_ref",
+                 "temperature", "temperature_ref",
+                 "fan_speed_value", "fan_speed_value_ref",
+                 "powertune_level_value", "powertune_level_value_ref", "dummy_ref"]
+    
+    def __init__(self, adapter_index):
+        self.adapter_index = adapter_index
+        self.caps = CAP_ALL
+        # snapshot() and every Sampler fill the same structures, whatever their ADL lock policy
+        self.lock = threading.Lock()
+        
+        # the structures come from the shared pool, under their own name so no other user
+        # of the pool overwrites them mid-sample
+        self.activity, self.activity_ref = default_pool.slot(adapter_index, ADLPMActivity, "snapshot")
+        self.temperature, self.temperature_ref = default_pool.slot(adapter_index, ADLTemperature, "snapshot")
+        self.fan_speed_value, self.fan_speed_value_ref = default_pool.slot(adapter_index, ADLFanSpeedValue, "snapshot")
+        self.powertune_level_value, self.powertune_level_value_ref = default_pool.slot(adapter_index, c_int, "snapshot")
+        self.dummy_ref = default_pool.slot(adapter_index, c_int, "snapshot_default")[1]
+
+    def _call(self, capability, function, *args):
+        # an adapter that answers ADL_ERR_NOT_SUPPORTED loses the capability, so the call isn't repeated
+        try:
+            function(*args)
+        except ADLNotSupportedError:
+            self.caps &= ~capability
+            return False
+        except ADLError:
+            return False
+        return True
+
+    def read(self, data, offset):
+        with self.lock:
+            self._read(data, offset)
+
+    def _read(self, data, offset):
+        adapter_index = self.adapter_index
+        data[offset] = adapter_index
+        caps = self.caps
+        
+        # calls the adapter is known not to support are skipped and reported as missing
+        activity = self.activity
+        if caps & CAP_CURRENT_ACTIVITY and self._call(CAP_CURRENT_ACTIVITY, ADL_Overdrive5_CurrentActivity_Get,
+                                                      adapter_index, self.activity_ref):
+            data[offset + 1] = activity.iEngineClock
+            data[offset + 2] = activity.iMemoryClock
+            data[offset + 3] = activity.iVddc
+            data[offset + 4] = activity.iActivityPercent
+            data[offset + 5] = activity.iCurrentPerformanceLevel
+            data[offset + 6] = activity.iCurrentBusSpeed
+            data[offset + 7] = activity.iCurrentBusLanes
+            data[offset + 8] = activity.iMaximumBusLanes
+        else:
+            for column in range(1, 9):
+                data[offset + column] = SNAPSHOT_MISSING
+        
+        # the driver may rewrite iSpeedType, so set it before every call
+        fan_speed_value = self.fan_speed_value
+        fan_speed_value.iSpeedType = ADL_DL_FANCTRL_SPEED_TYPE_PERCENT
+        if caps & CAP_FAN_SPEED_PERCENT and self._call(CAP_FAN_SPEED_PERCENT, ADL_Overdrive5_FanSpeed_Get, adapter_index, 0, self.fan_speed_value_ref):
+            data[offset + 9] = fan_speed_value.iFanSpeed
+        else:
+            data[offset + 9] = SNAPSHOT_MISSING
+        
+        fan_speed_value.iSpeedType = ADL_DL_FANCTRL_SPEED_TYPE_RPM
+        if caps & CAP_FAN_SPEED_RPM and self._call(CAP_FAN_SPEED_RPM, ADL_Overdrive5_FanSpeed_Get, adapter_index, 0, self.fan_speed_value_ref):
+            data[offset + 10] = fan_speed_value.iFanSpeed
+        else:
+            data[offset + 10] = SNAPSHOT_MISSING
+        
+        if caps & CAP_TEMPERATURE and self._call(CAP_TEMPERATURE, ADL_Overdrive5_Temperature_Get, adapter_index, 0, self.temperature_ref):
+            data[offset + 11] = self.temperature.iTemperature
+        else:
+            data[offset + 11] = SNAPSHOT_MISSING
+        
+        if caps & CAP_POWER_CONTROL and self._call(CAP_POWER_CONTROL, ADL_Overdrive5_PowerControl_Get, adapter_index,
+                                                   self.powertune_level_value_ref, self.dummy_ref):
+            data[offset + 12] = self.powertune_level_value.value
+        else:
+            data[offset + 12] = SNAPSHOT_MISSING
+
+# per-adapter buffers, keyed by ADL adapter index and reused by every snapshot
+_buffers = {}
+
+def _get_buffers(adapter):
+    # accept AdapterInfo structures as well as plain ADL adapter indexes
+    adapter_index = getattr(adapter, "iAdapterIndex", adapter)
+    buffers = _buffers.get(adapter_index)
+    if buffers is None:
+        buffers = _buffers[adapter_index] = _AdapterBuffers(adapter_index)
+    return buffers
+
+def set_capabilities(adapter, caps):
+    """Tells snapshot() which CAP_* metrics an adapter supports, so it stops calling the rest."""
+    _get_buffers(adapter).caps = caps
+
+def snapshot(adapters, out=None):
+    """Reads every metric for the given adapters into a Snapshot, one row per adapter.
+    
+    adapters may hold AdapterInfo structures or ADL adapter indexes. Metrics the driver
+    fails to report are stored as SNAPSHOT_MISSING. Pass the previous Snapshot as out
+    to refill it in place instead of allocating a new one.
+    """
+    adapter_buffers = [_get_buffers(adapter) for adapter in adapters]
+    
+    if out is None or out.num_adapters != len(adapter_buffers):
+        out = Snapshot(len(adapter_buffers))
+    
+    data = out.data
+    out.timestamp = time.time()
+    for row, buffers in enumerate(adapter_buffers):
+        buffers.read(data, row * _NUM_COLUMNS)
+    
+    return out
@@ -20,8 +20,8 @@
 #
 # This code is based on the AMD Display Library 3.0 SDK
 
-from ctypes import Structure, POINTER
-from ctypes import c_int, c_float, c_char, c_char_p, c_short, c_long, c_longlong
+from ctypes import Structure, POINTER, byref, cast, pointer, sizeof
+from ctypes import c_int, c_float, c_char, c_char_p, c_short, c_long, c_longlong, c_ubyte
 import platform
 
 _platform = platform.system()
@@ -1228,3 +1228,77 @@ struct_ADLBezelOffsetSteppingSize._fields_ = [
 
 ADLBezelOffsetSteppingSize = struct_ADLBezelOffsetSteppingSize     # ADL_SDK_3.0/include/adl_structures.h:2322
 LPADLBezelOffsetSteppingSize = POINTER(struct_ADLBezelOffsetSteppingSize)     # ADL_SDK_3.0/include/adl_structures.h:2322
+
+# Preallocated structures for hot paths. Allocating a structure, filling in iSize and
+# building its byref() costs more than the ADL call itself when sampling at 20Hz, so a
+# StructurePool hands out the same instance (and pointer) for every call on an adapter.
+
+_performance_levels_types = {}
+
+def performance_levels_type(num_levels):
+    """Returns a Structure laid out like ADLODPerformanceLevels with room for num_levels
+    levels, so aLevels can be indexed directly instead of through resize() and cast()."""
+    structure_type = _performance_levels_types.get(num_levels)
+    if structure_type is None:
+        structure_type = type("ADLODPerformanceLevels_%d" % num_levels, (Structure,), {
+            "_fields_": [("iSize", c_int),
+                         ("iReserved", c_int),
+                         ("aLevels", ADLODPerformanceLevel * num_levels)]})
+        _performance_levels_types[num_levels] = structure_type
+    return structure_type
+
+def new_structure(structure_type):
+    """Returns a zeroed structure_type with iSize set, if it has one."""
+    structure = structure_type()
+    if hasattr(structure_type, "iSize"):
+        structure.iSize = sizeof(structure_type)
+    return structure
+
+def as_memoryview(structure):
+    """Returns a writable memoryview of structure's sizeof(structure) bytes, without copying them."""
+    # memoryview(structure) has one item of the structure's own format; view it as a byte array
+    # instead, and on Python 3 drop the "<B" format ctypes gives it, which memoryview can't index
+    view = memoryview((c_ubyte * sizeof(structure)).from_buffer(structure))
+    return view.cast("B") if hasattr(view, "cast") else view
+
+class StructurePool(object):
+    """Per-adapter structures that are allocated and sized once, then reused.
+    
+    slot() returns (structure, pointer) for a structure type; the pointer can be passed
+    straight to an ADL function. Everything handed out is overwritten by the next call
+    for the same adapter, so copy out what you need to keep, and don't share an adapter's
+    structures between threads without a lock.
+    """
+    
+    def __init__(self):
+        self._slots = {}
+
+    def slot(self, adapter_index, structure_type, name=None):
+        """name tells apart several structures of one type used at once on an adapter."""
+        key = (adapter_index, structure_type, name)
+        slot = self._slots.get(key)
+        if slot is None:
+            structure = new_structure(structure_type)
+            slot = self._slots[key] = (structure, byref(structure))
+        return slot
+
+    def performance_levels(self, adapter_index, num_levels, name=None):
+        """Returns (block, pointer): block has num_levels entries in aLevels and pointer
+        is typed as POINTER(ADLODPerformanceLevels), as the ODPerformanceLevels calls expect."""
+        key = (adapter_index, ADLODPerformanceLevels, num_levels, name)
+        slot = self._slots.get(key)
+        if slot is None:
+            block = new_structure(performance_levels_type(num_levels))
+            slot = self._slots[key] = (block, cast(pointer(block), POINTER(ADLODPerformanceLevels)))
+        return slot
+
+    def clear(self, adapter_index=None):
+        """Drops the structures of one adapter (or of all of them)."""
+        if adapter_index is None:
+            self._slots.clear()
+        else:
+            for key in [key for key in self._slots if key[0] == adapter_index]:
+                del self._slots[key]
+
+# shared by the sampling code in adl3; callers with their own threads can make their own pools
+default_pool = StructurePool()
@@ -0,0 +1,118 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from ctypes import byref, cast, c_int, sizeof
+
+from .adl_structures import AdapterInfo, LPAdapterInfo
+from .adl_api import (ADL_Main_Control_Refresh,
+                      ADL_Adapter_NumberOfAdapters_Get,
+                      ADL_Adapter_AdapterInfo_Get,
+                      ADL_Adapter_ID_Get)
+
+def _get_adapter_info(num_adapters):
+    # AdapterInfo_Get grabs info for ALL adapters in the system
+    adapter_info = (AdapterInfo * num_adapters)()
+    if num_adapters > 0:
+        ADL_Adapter_AdapterInfo_Get(cast(adapter_info, LPAdapterInfo), sizeof(adapter_info))
+    return adapter_info
+
+def _signature(adapter_info):
+    # what identifies each logical adapter: its UDID and PCI location
+    return tuple((info.strUDID, info.iBusNumber, info.iDeviceNumber, info.iFunctionNumber) for info in adapter_info)
+
+class AdapterTopology(object):
+    """The physical adapters in the system, enumerated once and cached until refreshed.
+    
+    ADL reports one logical adapter per controller; only the first one of every GPU is kept.
+    """
+    
+    def __init__(self):
+        self.adapters = []
+        self.adapter_ids = []
+        self.generation = 0
+        self._by_id = {}
+        self._signature = None
+        self._adapter_info = None
+        self._enumerate()
+
+    def __len__(self):
+        return len(self.adapters)
+
+    def __iter__(self):
+        return iter(self.adapters)
+
+    def __getitem__(self, index):
+        return self.adapters[index]
+
+    def find(self, adapter_id):
+        """Returns the AdapterInfo for the physical adapter with the given ADL adapter ID, or None."""
+        return self._by_id.get(adapter_id)
+
+    def _get_num_adapters(self):
+        num_adapters = c_int(-1)
+        ADL_Adapter_NumberOfAdapters_Get(byref(num_adapters))
+        return num_adapters.value
+
+    def _enumerate(self):
+        adapter_info = _get_adapter_info(self._get_num_adapters())
+        
+        by_id = {}
+        adapters = []
+        adapter_ids = []
+        adapter_id = c_int(-1)
+        
+        for info in adapter_info:
+            ADL_Adapter_ID_Get(info.iAdapterIndex, byref(adapter_id))
+            
+            # save it if it's the first controller of the adapter
+            if adapter_id.value not in by_id:
+                by_id[adapter_id.value] = info
+                adapters.append(info)
+                adapter_ids.append(adapter_id.value)
+        
+        # the AdapterInfo entries point into this array, so hang on to it
+        self._adapter_info = adapter_info
+        self._signature = _signature(adapter_info)
+        self._by_id = by_id
+        self.adapters = adapters
+        self.adapter_ids = adapter_ids
+        self.generation += 1
+
+    def changed(self):
+        """Returns True if the driver now reports different adapters than were enumerated: a
+        different number of them, or one with a different UDID or PCI bus, device or function.
+        A change in the count is caught without reading the adapter info."""
+        num_adapters = self._get_num_adapters()
+        if num_adapters != len(self._signature):
+            return True
+        return _signature(_get_adapter_info(num_adapters)) != self._signature
+
+    def refresh(self, driver=True):
+        """Re-enumerates the adapters. If driver is True, ADL's own adapter info is refreshed first."""
+        if driver:
+            ADL_Main_Control_Refresh()
+        self._enumerate()
+
+    def refresh_if_changed(self):
+        """Refreshes if changed() says so. Returns True if the adapters were re-enumerated."""
+        if self.changed():
+            self.refresh()
+            return True
+        return False
@@ -0,0 +1,385 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import time
+from collections import namedtuple
+from ctypes import addressof, memmove, sizeof
+
+from .adl_defines import ADL_DL_FANCTRL_SPEED_TYPE_PERCENT, ADL_DL_FANCTRL_FLAG_USER_DEFINED_SPEED
+from .adl_api import ADLError
+from .adl_overdrive import (get_od_parameters, get_performance_levels, set_performance_levels,
+                            new_performance_levels, get_levels,
+                            get_fan_speed, set_fan_speed, set_fan_speed_default,
+                            get_power_control, set_power_control)
+from .adl_sampler import ThreadPoolExecutor, _get_lock, LOCK_ADAPTER
+
+_clock = getattr(time, "monotonic", time.time)
+
+class ADLTransactionError(ADLError):
+    """A Transaction failed and was rolled back.
+    
+    failures maps ADL adapter indexes to the error that failed them; rollback_failures
+    holds the adapters that could not be restored, which are left in an unknown state.
+    """
+    
+    def __init__(self, message, failures, rollback_failures):
+        ADLError.__init__(self, message)
+        self.failures = failures
+        self.rollback_failures = rollback_failures
+
+class _AdapterChange(object):
+    # what a transaction will do to one adapter, and what it found there beforehand
+    
+    __slots__ = ["adapter_index", "levels", "fan_speed", "powertune", "num_levels",
+                 "saved_plevels", "saved_fan_speed", "saved_powertune", "applied"]
+    
+    def __init__(self, adapter_index):
+        self.adapter_index = adapter_index
+        self.levels = {}
+        self.fan_speed = None
+        self.powertune = None
+        self.num_levels = 0
+        self.saved_plevels = None
+        self.saved_fan_speed = None
+        self.saved_powertune = None
+        self.applied = False
+
+    def save(self):
+        adapter_index = self.adapter_index
+        
+        if self.levels:
+            od_parameters = get_od_parameters(adapter_index)
+            num_levels = self.num_levels = od_parameters.iNumberOfPerformanceLevels
+            
+            # validate everything up front, so a bad request fails before any adapter is touched
+            if not od_parameters.iDiscretePerformanceLevels:
+                raise ADLError("Adapter %d does not support discrete performance levels." % adapter_index)
+            for level, (engine_clock, memory_clock, vddc) in self.levels.items():
+                if not 0 <= level < num_levels:
+                    raise ADLError("Adapter %d has no performance level %d." % (adapter_index, level))
+                for value, value_range, name in ((engine_clock, od_parameters.sEngineClock, "engine clock"),
+                                                 (memory_clock, od_parameters.sMemoryClock, "memory clock"),
+                                                 (vddc, od_parameters.sVddc, "core voltage")):
+                    if value is not None and not value_range.iMin <= value <= value_range.iMax:
+                        raise ADLError("The %s %d is out of range for adapter %d (%d - %d)." %
+                                       (name, value, adapter_index, value_range.iMin, value_range.iMax))
+            
+            self.saved_plevels = get_performance_levels(adapter_index, num_levels)
+        
+        if self.fan_speed is not None:
+            fan_speed_value = get_fan_speed(adapter_index, ADL_DL_FANCTRL_SPEED_TYPE_PERCENT)
+            if fan_speed_value.iFlags & ADL_DL_FANCTRL_FLAG_USER_DEFINED_SPEED:
+                self.saved_fan_speed = fan_speed_value.iFanSpeed
+            else:
+                self.saved_fan_speed = "default"
+        
+        if self.powertune is not None:
+            self.saved_powertune = get_power_control(adapter_index)[0]
+
+    def apply(self):
+        adapter_index = self.adapter_index
+        self.applied = True
+        
+        if self.levels:
+            # start from the saved levels, so levels the transaction doesn't mention stay as they are
+            plevels = new_performance_levels(self.num_levels)
+            memmove(addressof(plevels), addressof(self.saved_plevels), sizeof(plevels))
+            levels = get_levels(plevels)
+            for level, (engine_clock, memory_clock, vddc) in self.levels.items():
+                if engine_clock is not None:
+                    levels[level].iEngineClock = engine_clock
+                if memory_clock is not None:
+                    levels[level].iMemoryClock = memory_clock
+                if vddc is not None:
+                    levels[level].iVddc = vddc
+            set_performance_levels(adapter_index, plevels)
+        
+        if self.fan_speed == "default":
+            set_fan_speed_default(adapter_index)
+        elif self.fan_speed is not None:
+            set_fan_speed(adapter_index, self.fan_speed)
+        
+        if self.powertune is not None:
+            set_power_control(adapter_index, self.powertune)
+
+    def apply_and_verify(self):
+        self.apply()
+        self.verify()
+
+    def verify(self):
+        adapter_index = self.adapter_index
+        
+        if self.levels:
+            plevels = get_performance_levels(adapter_index, self.num_levels)
+            levels = get_levels(plevels)
+            for level, expected in self.levels.items():
+                actual = (levels[level].iEngineClock, levels[level].iMemoryClock, levels[level].iVddc)
+                for value, actual_value, name in zip(expected, actual, ("engine clock", "memory clock", "core voltage")):
+                    if value is not None and value != actual_value:
+                        raise ADLError("Adapter %d reports %s %d on performance level %d after setting %d." %
+                                       (adapter_index, name, actual_value, level, value))
+        
+        # the fan reading follows the fan as it spins up, so only check who is in control of it
+        if self.fan_speed is not None:
+            user_defined = bool(get_fan_speed(adapter_index).iFlags & ADL_DL_FANCTRL_FLAG_USER_DEFINED_SPEED)
+            if user_defined != (self.fan_speed != "default"):
+                raise ADLError("Adapter %d did not take the new fan speed." % adapter_index)
+        
+        if self.powertune is not None:
+            powertune = get_power_control(adapter_index)[0]
+            if powertune != self.powertune:
+                raise ADLError("Adapter %d reports powertune %d%% after setting %d%%." %
+                               (adapter_index, powertune, self.powertune))
+
+    def rollback(self):
+        adapter_index = self.adapter_index
+        
+        if self.saved_plevels is not None:
+            set_performance_levels(adapter_index, self.saved_plevels)
+        
+        if self.saved_fan_speed == "default":
+            set_fan_speed_default(adapter_index)
+        elif self.saved_fan_speed is not None:
+            set_fan_speed(adapter_index, self.saved_fan_speed)
+        
+        if self.saved_powertune is not None:
+            set_power_control(adapter_index, self.saved_powertune)
+
+class Transaction(object):
+    """Applies Overdrive settings to several adapters as one all-or-nothing change.
+    
+    Queue changes with set_performance_level(), set_fan_speed() and set_powertune(), then
+    call commit(). The current state of every affected adapter is saved first, the changes
+    are applied to all adapters concurrently and read back, and if any adapter fails or
+    reads back something else, every adapter is restored and ADLTransactionError raised.
+    Values are in the driver's units: clocks in 10kHz, vddc in mV.
+    
+    Without concurrent.futures (Python 2 without the backport) adapters are handled one
+    after the other.
+    """
+    
+    def __init__(self, max_workers=None, lock_policy=LOCK_ADAPTER):
+        self.max_workers = max_workers
+        self.lock_policy = lock_policy
+        self._changes = {}
+
+    def _change(self, adapter_index):
+        change = self._changes.get(adapter_index)
+        if change is None:
+            change = self._changes[adapter_index] = _AdapterChange(adapter_index)
+        return change
+
+    def __len__(self):
+        return len(self._changes)
+
+    def adapters(self):
+        return sorted(self._changes)
+
+    def set_performance_level(self, adapter_index, level, engine_clock=None, memory_clock=None, vddc=None):
+        levels = self._change(adapter_index).levels
+        previous = levels.get(level, (None, None, None))
+        levels[level] = tuple(previous[position] if value is None else int(value)
+                              for position, value in enumerate((engine_clock, memory_clock, vddc)))
+
+    def set_fan_speed(self, adapter_index, fan_speed):
+        """Sets a user-defined fan speed in percent, or "default" to return to automatic control."""
+        self._change(adapter_index).fan_speed = fan_speed if fan_speed == "default" else int(fan_speed)
+
+    def set_powertune(self, adapter_index, powertune):
+        self._change(adapter_index).powertune = int(powertune)
+
+    def _run(self, step, changes):
+        # runs step(change) for every change and returns {adapter index: error} for the ones that raised
+        def run(change):
+            try:
+                with _get_lock(change.adapter_index, self.lock_policy):
+                    step(change)
+            except ADLError as err:
+                return change.adapter_index, err
+            return None
+        
+        if ThreadPoolExecutor is None or len(changes) < 2:
+            results = [run(change) for change in changes]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers or len(changes)) as executor:
+                results = list(executor.map(run, changes))
+        
+        return dict(result for result in results if result is not None)
+
+    def commit(self):
+        """Applies every queued change, or none of them; returns the adapter indexes changed."""
+        changes = [self._changes[adapter_index] for adapter_index in sorted(self._changes)]
+        
+        failures = self._run(_AdapterChange.save, changes)
+        if failures:
+            raise ADLTransactionError("Transaction aborted before any change: %s." % _describe(failures),
+                                      failures, {})
+        
+        failures = self._run(_AdapterChange.apply_and_verify, changes)
+        if failures:
+            rollback_failures = self._run(_AdapterChange.rollback, [change for change in changes if change.applied])
+            if rollback_failures:
+                message = "Transaction failed: %s; could not roll back: %s." % (_describe(failures),
+                                                                             _describe(rollback_failures))
+            else:
+                message = "Transaction failed and was rolled back: %s." % _describe(failures)
+            raise ADLTransactionError(message, failures, rollback_failures)
+        
+        self._changes = {}
+        return [change.adapter_index for change in changes]
+
+def _describe(failures):
+    return "; ".join("adapter %d: %s" % (adapter_index, str(failures[adapter_index]).rstrip("."))
+                     for adapter_index in sorted(failures))
+
+# One setting apply_desired_state() changed: name is "engine_clock", "memory_clock", "vddc",
+# "fan_speed" or "powertune", and level the performance level for the first three.
+StateChange = namedtuple("StateChange", "adapter_index name level old new")
+
+_LEVEL_SETTINGS = ("engine_clock", "memory_clock", "vddc")
+
+class _AdapterState(object):
+    # the last known settings of one adapter; None where they haven't been read
+    
+    __slots__ = ["levels", "fan_speed", "powertune", "timestamp"]
+    
+    def __init__(self):
+        self.levels = None
+        self.fan_speed = None
+        self.powertune = None
+        self.timestamp = _clock()
+
+class StateCache(object):
+    """Remembers adapter settings between apply_desired_state() calls, so a steady-state
+    run needs neither reads nor writes.
+    
+    Entries older than max_age seconds are read again; with max_age None they are kept
+    until invalidate() is called, so changes made behind the cache's back go unnoticed.
+    """
+    
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self._states = {}
+
+    def get(self, adapter_index):
+        state = self._states.get(adapter_index)
+        if state is None or (self.max_age is not None and _clock() - state.timestamp > self.max_age):
+            state = self._states[adapter_index] = _AdapterState()
+        return state
+
+    def invalidate(self, adapter_index=None):
+        if adapter_index is None:
+            self._states.clear()
+        else:
+            self._states.pop(adapter_index, None)
+
+def _read_state(adapter_index, desired, state):
+    # fills in whatever desired needs that state doesn't know yet
+    if desired.get("levels") and state.levels is None:
+        od_parameters = get_od_parameters(adapter_index)
+        if od_parameters.iDiscretePerformanceLevels:
+            num_levels = od_parameters.iNumberOfPerformanceLevels
+            plevels = get_performance_levels(adapter_index, num_levels)
+            levels = get_levels(plevels)
+            state.levels = [(levels[level].iEngineClock, levels[level].iMemoryClock, levels[level].iVddc)
+                            for level in range(num_levels)]
+        else:
+            state.levels = []
+    
+    if desired.get("fan_speed") is not None and state.fan_speed is None:
+        fan_speed_value = get_fan_speed(adapter_index, ADL_DL_FANCTRL_SPEED_TYPE_PERCENT)
+        if fan_speed_value.iFlags & ADL_DL_FANCTRL_FLAG_USER_DEFINED_SPEED:
+            state.fan_speed = fan_speed_value.iFanSpeed
+        else:
+            state.fan_speed = "default"
+    
+    if desired.get("powertune") is not None and state.powertune is None:
+        state.powertune = get_power_control(adapter_index)[0]
+
+def apply_desired_state(desired, cache=None, dry_run=False, transaction=None):
+    """Brings adapters to the desired settings, writing only the ones that differ.
+    
+    desired maps ADL adapter indexes to dicts with any of "levels" ({performance level:
+    (engine clock, memory clock, vddc)}, None for values to leave alone), "fan_speed" (percent
+    or "default") and "powertune"; values are in the driver's units. The current settings
+    come from cache when given, or are read from the driver. Needed writes go through one
+    Transaction, so they are verified and rolled back together. Returns a list of
+    StateChange; with dry_run, nothing is written.
+    """
+    if cache is None:
+        cache = StateCache()
+    if transaction is None:
+        transaction = Transaction()
+    
+    changes = []
+    states = {}
+    for adapter_index in sorted(desired):
+        wanted = desired[adapter_index]
+        state = states[adapter_index] = cache.get(adapter_index)
+        _read_state(adapter_index, wanted, state)
+        
+        for level in sorted(wanted.get("levels") or {}):
+            if level >= len(state.levels):
+                raise ADLError("Adapter %d has no performance level %d." % (adapter_index, level))
+            current = state.levels[level]
+            values = [None, None, None]
+            for position, value in enumerate(wanted["levels"][level]):
+                if value is not None and int(value) != current[position]:
+                    values[position] = int(value)
+                    changes.append(StateChange(adapter_index, _LEVEL_SETTINGS[position], level,
+                                               current[position], int(value)))
+            if values != [None, None, None]:
+                transaction.set_performance_level(adapter_index, level, *values)
+        
+        fan_speed = wanted.get("fan_speed")
+        if fan_speed is not None:
+            if fan_speed != "default":
+                fan_speed = int(fan_speed)
+            if fan_speed != state.fan_speed:
+                changes.append(StateChange(adapter_index, "fan_speed", None, state.fan_speed, fan_speed))
+                transaction.set_fan_speed(adapter_index, fan_speed)
+        
+        powertune = wanted.get("powertune")
+        if powertune is not None and int(powertune) != state.powertune:
+            changes.append(StateChange(adapter_index, "powertune", None, state.powertune, int(powertune)))
+            transaction.set_powertune(adapter_index, powertune)
+    
+    if dry_run or not changes:
+        return changes
+    
+    try:
+        transaction.commit()
+    except ADLError:
+        # the driver state is unknown (or rolled back), so don't trust the cache for these adapters
+        for adapter_index in transaction.adapters():
+            cache.invalidate(adapter_index)
+        raise
+    
+    for change in changes:
+        state = states[change.adapter_index]
+        if change.level is not None:
+            level = list(state.levels[change.level])
+            level[_LEVEL_SETTINGS.index(change.name)] = change.new
+            state.levels[change.level] = tuple(level)
+        else:
+            setattr(state, change.name, change.new)
+    
+    return changes
@@ -0,0 +1,119 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+#
+# asyncio front-end for adl3. Every call is run on a single dedicated worker thread,
+# which keeps the driver calls off the event loop and serializes access to the ADL context.
+# It needs Python 3.7 or later (asyncio.get_running_loop()).
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .adl_defines import ADL_DL_FANCTRL_SPEED_TYPE_PERCENT
+from .adl_api import ADL_Main_Control_Create, ADL_Main_Control_Destroy, ADL_Main_Memory_Alloc
+from .adl_snapshot import snapshot as _snapshot
+from . import adl_overdrive
+
+_executor = None
+
+def get_executor():
+    """Returns the single-threaded executor that every call in this module runs on."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="adl3")
+    return _executor
+
+def _run(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+def _initialize(active_only):
+    ADL_Main_Control_Create(ADL_Main_Memory_Alloc, 1 if active_only else 0)
+
+def _shutdown():
+    ADL_Main_Control_Destroy()
+
+async def initialize(active_only=True):
+    await _run(_initialize, active_only)
+
+async def shutdown():
+    await _run(_shutdown)
+
+# read paths
+
+async def get_current_activity(adapter_index):
+    return await _run(adl_overdrive.get_current_activity, adapter_index)
+
+async def get_temperature(adapter_index, thermal_controller_index=0):
+    return await _run(adl_overdrive.get_temperature, adapter_index, thermal_controller_index)
+
+async def get_fan_speed(adapter_index, speed_type=ADL_DL_FANCTRL_SPEED_TYPE_PERCENT, thermal_controller_index=0):
+    return await _run(adl_overdrive.get_fan_speed, adapter_index, speed_type, thermal_controller_index)
+
+async def get_fan_speed_info(adapter_index, thermal_controller_index=0):
+    return await _run(adl_overdrive.get_fan_speed_info, adapter_index, thermal_controller_index)
+
+async def get_power_control(adapter_index):
+    return await _run(adl_overdrive.get_power_control, adapter_index)
+
+async def get_od_parameters(adapter_index):
+    return await _run(adl_overdrive.get_od_parameters, adapter_index)
+
+async def get_performance_levels(adapter_index, num_levels, default=False):
+    return await _run(adl_overdrive.get_performance_levels, adapter_index, num_levels, default)
+
+# set paths
+
+async def set_performance_levels(adapter_index, plevels):
+    await _run(adl_overdrive.set_performance_levels, adapter_index, plevels)
+
+async def set_fan_speed(adapter_index, fan_speed, thermal_controller_index=0):
+    await _run(adl_overdrive.set_fan_speed, adapter_index, fan_speed, thermal_controller_index)
+
+async def set_fan_speed_default(adapter_index, thermal_controller_index=0):
+    await _run(adl_overdrive.set_fan_speed_default, adapter_index, thermal_controller_index)
+
+async def set_power_control(adapter_index, powertune_level):
+    await _run(adl_overdrive.set_power_control, adapter_index, powertune_level)
+
+# snapshots
+
+async def snapshot(adapters):
+    return await _run(_snapshot, list(adapters))
+
+async def snapshots(adapters, interval):
+    """Yields a new Snapshot of the given adapters every interval seconds, without drifting."""
+    if interval <= 0:
+        raise ValueError("interval must be greater than 0, not %r" % (interval,))
+    adapters = list(adapters)
+    loop = asyncio.get_running_loop()
+    next_tick = loop.time()
+    
+    while True:
+        yield await _run(_snapshot, adapters)
+        
+        next_tick += interval
+        delay = next_tick - loop.time()
+        if delay < 0:
+            # we overran; skip the missed ticks rather than sampling back-to-back to catch up
+            next_tick += (int(-delay / interval) + 1) * interval
+            delay = next_tick - loop.time()
+        await asyncio.sleep(delay)
@@ -0,0 +1,80 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import threading
+import time
+import unittest
+
+from adl3 import adl_api, adl_snapshot
+from adl3.adl_defines import ADL_ERR
+from adl3.adl_simulated import SimulatedADL
+
+class SimulatedTestCase(unittest.TestCase):
+    """Runs each test against a fresh SimulatedADL of num_gpus GPUs with num_displays displays each."""
+    
+    num_gpus = 1
+    num_displays = 1
+    
+    def setUp(self):
+        self.lib = SimulatedADL(self.num_gpus, num_displays=self.num_displays, seed=0)
+        adl_api.set_library(self.lib)
+        # the snapshot buffers outlive a library, along with what they learned about its adapters
+        adl_snapshot._buffers.clear()
+        adl_api.ADL_Main_Control_Create(adl_api.ADL_Main_Memory_Alloc, 1)
+
+    def tearDown(self):
+        adl_api.ADL_Main_Control_Destroy()
+
+    def fail_calls(self, name, code=ADL_ERR):
+        """Makes every call of the ADL function name return code."""
+        self.lib.failures[name] = (1.0, code)
+
+class CallOverlap(object):
+    """Wraps a SimulatedADL implementation (a _ADL_... method taking the adapter index first), making
+    each call take delay seconds and recording how many calls were in it at once, overall and per adapter."""
+    
+    def __init__(self, function, delay=0.02):
+        self.function = function
+        self.delay = delay
+        self.max_total = 0
+        self.max_per_adapter = 0
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, adapter_index, *args):
+        with self._lock:
+            self._active[adapter_index] = self._active.get(adapter_index, 0) + 1
+            self.max_total = max(self.max_total, sum(self._active.values()))
+            self.max_per_adapter = max(self.max_per_adapter, self._active[adapter_index])
+        try:
+            time.sleep(self.delay)
+            return self.function(adapter_index, *args)
+        finally:
+            with self._lock:
+                self._active[adapter_index] -= 1
+
+def run_concurrently(*functions):
+    """Calls each function in its own thread and waits for them all."""
+    threads = [threading.Thread(target=function) for function in functions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,111 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import sys
+import threading
+import unittest
+
+from adl3 import adl_overdrive
+from adl3.adl_api import ADLError
+
+from .simulated import SimulatedTestCase
+
+# adl3.aio uses async syntax, so it's only imported where it can be
+@unittest.skipIf(sys.version_info < (3, 7), "adl3.aio needs Python 3.7 (asyncio.get_running_loop)")
+class AsyncTest(SimulatedTestCase):
+    
+    def setUp(self):
+        import asyncio
+        from adl3 import aio
+        SimulatedTestCase.setUp(self)
+        self.aio = aio
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+        SimulatedTestCase.tearDown(self)
+
+    def wait(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_getters(self):
+        aio = self.aio
+        self.assertEqual(self.wait(aio.get_temperature(0)), 65000)
+        self.assertEqual(self.wait(aio.get_current_activity(0)).iEngineClock,
+                         adl_overdrive.get_current_activity(0).iEngineClock)
+        self.assertEqual(self.wait(aio.get_fan_speed(0)).iFanSpeed, 30)
+        self.assertEqual(self.wait(aio.get_fan_speed_info(0)).iMaxRPM, 5000)
+        self.assertEqual(self.wait(aio.get_power_control(0)), (0, 0))
+        od_parameters = self.wait(aio.get_od_parameters(0))
+        plevels = self.wait(aio.get_performance_levels(0, od_parameters.iNumberOfPerformanceLevels, default=True))
+        self.assertEqual(adl_overdrive.get_levels(plevels)[2].iEngineClock, 92500)
+
+    def test_calls_run_on_the_worker_thread(self):
+        threads = []
+        temperature_get = self.lib._ADL_Overdrive5_Temperature_Get
+        def record_thread(*args):
+            threads.append(threading.current_thread())
+            return temperature_get(*args)
+        self.lib._ADL_Overdrive5_Temperature_Get = record_thread
+        
+        self.wait(self.aio.get_temperature(0))
+        self.wait(self.aio.get_temperature(0))
+        self.assertEqual(len(set(threads)), 1)
+        self.assertFalse(threads[0] is threading.current_thread())
+        self.assertTrue(threads[0].name.startswith("adl3"))
+
+    def test_errors_are_raised_by_await(self):
+        self.fail_calls("ADL_Overdrive5_Temperature_Get")
+        self.assertRaises(ADLError, self.wait, self.aio.get_temperature(0))
+
+    def test_setters(self):
+        aio = self.aio
+        gpu = self.lib.gpus[0]
+        self.wait(aio.set_fan_speed(0, 70))
+        self.assertEqual((gpu.fan_percent, gpu.fan_user_defined), (70, True))
+        self.wait(aio.set_fan_speed_default(0))
+        self.assertFalse(gpu.fan_user_defined)
+        self.wait(aio.set_power_control(0, 10))
+        self.assertEqual(gpu.powertune, 10)
+        
+        plevels = self.wait(aio.get_performance_levels(0, 3))
+        adl_overdrive.get_levels(plevels)[2].iEngineClock = 95000
+        self.wait(aio.set_performance_levels(0, plevels))
+        self.assertEqual(gpu.levels[2], (95000, 137500, 1170))
+
+    def test_snapshot(self):
+        result = self.wait(self.aio.snapshot(iter([0])))
+        self.assertEqual(list(result.column("temperature")), [65000])
+
+    def test_snapshots(self):
+        snapshots = self.aio.snapshots([0], 0.01)
+        try:
+            first = self.wait(snapshots.__anext__())
+            first_timestamp = first.timestamp
+            self.lib.gpus[0].temperature = 70000
+            second = self.wait(snapshots.__anext__())
+        finally:
+            self.wait(snapshots.aclose())
+        self.assertEqual(list(second.column("temperature")), [70000])
+        self.assertGreaterEqual(second.timestamp - first_timestamp, 0.005)
+
+    def test_snapshots_interval_must_be_positive(self):
+        self.assertRaises(ValueError, self.wait, self.aio.snapshots([0], 0).__anext__())
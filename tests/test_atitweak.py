@@ -0,0 +1,57 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import os
+import subprocess
+import sys
+import unittest
+
+_atitweak = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "atitweak")
+
+@unittest.skipIf(sys.version_info[0] != 2, "atitweak is a Python 2 script")
+class AtitweakTest(unittest.TestCase):
+    
+    def run_atitweak(self, *args):
+        env = dict(os.environ, ADL3_LIBRARY="simulated",
+                   PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(_atitweak), os.environ.get("PYTHONPATH")])))
+        process = subprocess.Popen([sys.executable, _atitweak] + list(args), env=env,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate()
+        return process.returncode, stdout, stderr
+
+    def test_interval_must_be_positive(self):
+        for interval in ("0", "-1"):
+            returncode, stdout, stderr = self.run_atitweak("--daemon", "--interval", interval)
+            self.assertEqual(returncode, 2)
+            self.assertIn(b"--interval must be greater than 0", stderr)
+
+    def test_set_state_reports_every_requested_setting(self):
+        returncode, stdout, stderr = self.run_atitweak("-e", "800", "-m", "1000", "-P", "1", "-f", "50", "-p", "10")
+        self.assertEqual(returncode, 0, stderr)
+        self.assertEqual(stdout.splitlines(),
+                         [b"Setting performance level 1 on adapter 0: engine clock 800MHz, memory clock 1000MHz",
+                          b"Setting fan speed to 50% on adapter 0",
+                          b"Setting powertune level to 10% on adapter 0"])
+
+    def test_zero_fan_speed_and_powertune_are_ignored(self):
+        returncode, stdout, stderr = self.run_atitweak("-f", "0", "-p", "0")
+        self.assertEqual(returncode, 0, stderr)
+        self.assertEqual(stdout, b"")
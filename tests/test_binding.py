@@ -0,0 +1,75 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import unittest
+from ctypes import byref, c_int
+
+from adl3 import adl_api
+from adl3.adl_api import ADLFunctionNotFoundError
+from adl3.adl_simulated import SimulatedADL
+
+def _number_of_adapters():
+    num_adapters = c_int()
+    adl_api.ADL_Adapter_NumberOfAdapters_Get(byref(num_adapters))
+    return num_adapters.value
+
+class LazyBindingTest(unittest.TestCase):
+    
+    def tearDown(self):
+        adl_api.ADL_Main_Control_Destroy()
+
+    def test_functions_are_bound_on_first_call(self):
+        lib = SimulatedADL(2)
+        adl_api.set_library(lib)
+        self.assertFalse("ADL_Adapter_NumberOfAdapters_Get" in lib.__dict__)
+        adl_api.ADL_Main_Control_Create(adl_api.ADL_Main_Memory_Alloc, 1)
+        self.assertEqual(_number_of_adapters(), 2)
+        self.assertTrue("ADL_Adapter_NumberOfAdapters_Get" in lib.__dict__)
+        self.assertFalse("ADL_Adapter_ID_Get" in lib.__dict__)
+
+    def test_functions_are_rebound(self):
+        first = SimulatedADL(1)
+        adl_api.set_library(first)
+        adl_api.ADL_Main_Control_Create(adl_api.ADL_Main_Memory_Alloc, 1)
+        self.assertEqual(_number_of_adapters(), 1)
+        
+        second = SimulatedADL(4)
+        adl_api.set_library(second)
+        self.assertTrue(adl_api.get_library() is second)
+        adl_api.ADL_Main_Control_Create(adl_api.ADL_Main_Memory_Alloc, 1)
+        self.assertEqual(_number_of_adapters(), 4)
+        self.assertEqual(first.calls["ADL_Adapter_NumberOfAdapters_Get"], 1)
+        self.assertEqual(second.calls["ADL_Adapter_NumberOfAdapters_Get"], 1)
+        first.ADL_Main_Control_Destroy()
+
+    def test_missing_function(self):
+        adl_api.set_library(SimulatedADL(missing=("ADL_Adapter_ID_Get",)))
+        adl_api.ADL_Main_Control_Create(adl_api.ADL_Main_Memory_Alloc, 1)
+        self.assertFalse(adl_api.ADL_Adapter_ID_Get.available())
+        self.assertTrue(adl_api.ADL_Adapter_Active_Get.available())
+        self.assertRaises(ADLFunctionNotFoundError, adl_api.ADL_Adapter_ID_Get, 0, byref(c_int()))
+        
+        # a function that was missing is found once the library exports it
+        adl_api.set_library(SimulatedADL())
+        adl_api.ADL_Main_Control_Create(adl_api.ADL_Main_Memory_Alloc, 1)
+        adapter_id = c_int()
+        adl_api.ADL_Adapter_ID_Get(0, byref(adapter_id))
+        self.assertTrue(adl_api.ADL_Adapter_ID_Get.available())
@@ -0,0 +1,91 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import unittest
+
+from adl3.adl_callstats import CallProfiler, CallStats, _MAX_MICROSECONDS, _bucket, _bucket_value
+
+class HistogramTest(unittest.TestCase):
+    
+    def test_buckets_are_monotonic(self):
+        buckets = [_bucket(microseconds) for microseconds in range(1 << 12)]
+        self.assertEqual(buckets, sorted(buckets))
+
+    def test_bucket_edges(self):
+        # values below 32us are exact; above that, each power of two is split in 16
+        for microseconds in (0, 1, 31, 32, 33, 63, 64, 65, 1023, 1024, 1025, 65535, 65536, _MAX_MICROSECONDS):
+            value = _bucket_value(_bucket(microseconds))
+            self.assertLessEqual(abs(value - microseconds), microseconds / 16.0, microseconds)
+        self.assertEqual(_bucket(31), 31)
+        self.assertNotEqual(_bucket(63), _bucket(64))
+        self.assertEqual(_bucket(_MAX_MICROSECONDS * 10), _bucket(_MAX_MICROSECONDS))
+
+class CallStatsTest(unittest.TestCase):
+    
+    def test_percentiles_at_bucket_edges(self):
+        for microseconds in (32, 64, 1024, 1025, 4095, 4096):
+            stats = CallStats()
+            for i in range(100):
+                stats.record(microseconds / 1000000.0)
+            for percent in (50, 90, 99):
+                self.assertAlmostEqual(stats.percentile(percent) * 1000000.0, microseconds, delta=microseconds / 16.0)
+
+    def test_percentiles_of_a_spread(self):
+        stats = CallStats()
+        for microseconds in range(1, 1001):
+            stats.record(microseconds / 1000000.0)
+        for percent in (50, 90, 99):
+            self.assertAlmostEqual(stats.percentile(percent) * 1000000.0, percent * 10, delta=percent * 10 / 16.0)
+        self.assertEqual(stats.percentile(100), stats.max)
+
+    def test_percentile_never_exceeds_max(self):
+        stats = CallStats()
+        stats.record(0.001025)
+        self.assertLessEqual(stats.percentile(99), 0.001025)
+
+    def test_counts(self):
+        stats = CallStats()
+        self.assertEqual((stats.mean, stats.percentile(50)), (0.0, 0.0))
+        stats.record(0.002)
+        stats.record(0.004, failed=True)
+        self.assertEqual((stats.calls, stats.errors, stats.max), (2, 1, 0.004))
+        self.assertAlmostEqual(stats.mean, 0.003)
+
+class CallProfilerTest(unittest.TestCase):
+    
+    def test_summary(self):
+        profiler = CallProfiler()
+        for adapter_index, seconds in ((0, 0.001), (0, 0.003), (1, 0.010)):
+            profiler.record("ADL_Overdrive5_Temperature_Get", adapter_index, seconds)
+        profiler.record("ADL_Adapter_NumberOfAdapters_Get", None, 0.0005, failed=True)
+        
+        rows = profiler.summary()
+        self.assertEqual([(row.function, row.adapter_index, row.calls) for row in rows],
+                         [("ADL_Overdrive5_Temperature_Get", 1, 1), ("ADL_Overdrive5_Temperature_Get", 0, 2),
+                          ("ADL_Adapter_NumberOfAdapters_Get", None, 1)])
+        self.assertEqual(rows[-1].errors, 1)
+        
+        merged = profiler.summary(by_adapter=False)[0]
+        self.assertEqual((merged.function, merged.adapter_index, merged.calls, merged.max),
+                         ("ADL_Overdrive5_Temperature_Get", None, 3, 0.010))
+        
+        profiler.reset()
+        self.assertEqual(profiler.summary(), [])
@@ -0,0 +1,65 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import os
+import shutil
+import tempfile
+
+from adl3.adl_defines import ADL_ERR_NOT_SUPPORTED
+from adl3.adl_caps import CAP_ALL, CAP_TEMPERATURE, CapabilityCache, probe
+from adl3.adl_topology import AdapterTopology
+
+from .simulated import SimulatedTestCase
+
+class ProbeTest(SimulatedTestCase):
+    
+    def setUp(self):
+        SimulatedTestCase.setUp(self)
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "capabilities.json")
+        self.info = AdapterTopology()[0]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        SimulatedTestCase.tearDown(self)
+
+    def test_everything_supported(self):
+        self.assertEqual(probe(0), CAP_ALL)
+
+    def test_not_supported_clears_capability(self):
+        self.fail_calls("ADL_Overdrive5_Temperature_Get", ADL_ERR_NOT_SUPPORTED)
+        cache = CapabilityCache(self.path)
+        self.assertEqual(cache.get(self.info), CAP_ALL & ~CAP_TEMPERATURE)
+        # saved, so a new cache doesn't probe again
+        self.assertEqual(CapabilityCache(self.path).get(self.info), CAP_ALL & ~CAP_TEMPERATURE)
+
+    def test_transient_error_keeps_capability_and_is_not_saved(self):
+        self.fail_calls("ADL_Overdrive5_Temperature_Get")
+        cache = CapabilityCache(self.path)
+        self.assertEqual(cache.get(self.info), CAP_ALL)
+        self.assertFalse(os.path.exists(self.path))
+        
+        # the next lookup probes again, and once the probe is clean it's saved
+        del self.lib.failures["ADL_Overdrive5_Temperature_Get"]
+        calls = self.lib.calls["ADL_Overdrive5_Temperature_Get"]
+        self.assertEqual(cache.get(self.info), CAP_ALL)
+        self.assertEqual(self.lib.calls["ADL_Overdrive5_Temperature_Get"], calls + 1)
+        self.assertTrue(os.path.exists(self.path))
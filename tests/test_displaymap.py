@@ -0,0 +1,58 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from adl3.adl_api import ADLError
+from adl3.adl_displaymap import DisplayMap, DisplayMapPlanner
+
+from .simulated import SimulatedTestCase
+
+class DisplayMapPlannerTest(SimulatedTestCase):
+    
+    num_displays = 3
+    
+    def setUp(self):
+        SimulatedTestCase.setUp(self)
+        self.planner = DisplayMapPlanner(0)
+
+    def sets(self):
+        return self.lib.calls.get("ADL_Display_DisplayMapConfig_Set", 0)
+
+    def test_mode_change_of_every_map_is_one_set(self):
+        current = self.planner.current()
+        target = [display_map._replace(xres=1280, yres=720, x=index * 1280)
+                  for index, display_map in enumerate(current.maps)]
+        self.assertEqual(len(self.planner.apply(target)), 1)
+        self.assertEqual(self.sets(), 1)
+        self.assertEqual(self.planner.current(refresh=True), self.planner.current())
+
+    def test_clone_is_one_set(self):
+        current = self.planner.current()
+        target = [DisplayMap(1920, 1080, 60.0, 32, 0, 0, (0, 1)), current.maps[2]]
+        self.planner.apply(target)
+        self.assertEqual(self.sets(), 1)
+        self.assertEqual([display_map.targets for display_map in self.planner.current(refresh=True).maps],
+                         [(0, 1), (2,)])
+
+    def test_invalid_target(self):
+        # the simulated GPU clones at most two displays
+        target = [DisplayMap(1920, 1080, 60.0, 32, 0, 0, (0, 1, 2))]
+        self.assertRaises(ADLError, self.planner.plan, target)
+        self.assertEqual(self.sets(), 0)
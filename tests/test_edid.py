@@ -0,0 +1,58 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from adl3.adl_edid import EDIDCache
+
+from .simulated import SimulatedTestCase
+
+class EDIDCacheTest(SimulatedTestCase):
+    
+    num_gpus = 2
+    num_displays = 2
+    
+    def reads(self):
+        return self.lib.calls.get("ADL_Display_EdidData_Get", 0)
+
+    def test_edids_are_read_once(self):
+        cache = EDIDCache(check_interval=None)
+        edids = cache.get_all([0, 1])
+        self.assertEqual(len(edids), 4)
+        self.assertTrue(all(edid.valid for edid in edids.values()))
+        reads = self.reads()
+        cache.get_all([0, 1])
+        self.assertEqual(self.reads(), reads)
+
+    def test_notify_hotplug_all_rereads_every_adapter(self):
+        cache = EDIDCache(check_interval=None)
+        cache.get_all([0, 1])
+        reads = self.reads()
+        cache.notify_hotplug()
+        self.assertEqual((cache.generation(0), cache.generation(1)), (1, 1))
+        cache.get_all([0, 1])
+        self.assertEqual(self.reads(), 2 * reads)
+
+    def test_connection_change_rereads_only_that_adapter(self):
+        cache = EDIDCache(check_interval=0.0)
+        cache.get_all([0, 1])
+        self.lib.gpus[1].displays[1].connected = False
+        reads = self.reads()
+        self.assertEqual(len(cache.get_all([0, 1])), 3)
+        self.assertEqual(self.reads(), reads + 1)
@@ -0,0 +1,89 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from ctypes import byref, c_int
+
+from adl3 import adl_api
+from adl3.adl_api import (ADLError, ADLFunctionNotFoundError, ADLInvalidIndexError, ADLInvalidParameterError,
+                          ADLNotSupportedError, error_for_code)
+from adl3.adl_defines import (ADL_ERR, ADL_ERR_INVALID_DIPLAY_IDX, ADL_ERR_INVALID_PARAM_SIZE,
+                              ADL_ERR_NOT_SUPPORTED, ADL_OK_WARNING)
+from adl3.adl_simulated import SimulatedADL
+
+from .simulated import SimulatedTestCase
+
+class ErrorTest(SimulatedTestCase):
+    
+    num_gpus = 2
+    
+    def test_error_for_code(self):
+        error = error_for_code(ADL_ERR_NOT_SUPPORTED, "ADL_Overdrive5_Temperature_Get", 1)
+        self.assertTrue(isinstance(error, ADLNotSupportedError))
+        self.assertEqual((error.code, error.function, error.adapter_index),
+                         (ADL_ERR_NOT_SUPPORTED, "ADL_Overdrive5_Temperature_Get", 1))
+        self.assertEqual(str(error), "ADL_Overdrive5_Temperature_Get failed for adapter 1 (ADL_ERR_NOT_SUPPORTED).")
+        self.assertEqual(type(error_for_code(ADL_ERR, "ADL_Main_Control_Refresh")), ADLError)
+        self.assertEqual(type(error_for_code(-1000, "ADL_Main_Control_Refresh")), ADLError)
+        self.assertEqual(type(error_for_code(ADL_ERR_INVALID_PARAM_SIZE)), ADLInvalidParameterError)
+        self.assertTrue(issubclass(ADLInvalidIndexError, ADLInvalidParameterError))
+
+    def test_failed_call_raises(self):
+        self.fail_calls("ADL_Adapter_ID_Get", ADL_ERR_NOT_SUPPORTED)
+        try:
+            adl_api.ADL_Adapter_ID_Get(1, byref(c_int()))
+        except ADLNotSupportedError as error:
+            self.assertEqual((error.code, error.function, error.adapter_index),
+                             (ADL_ERR_NOT_SUPPORTED, "ADL_Adapter_ID_Get", 1))
+        else:
+            self.fail("ADL_Adapter_ID_Get didn't raise")
+
+    def test_no_adapter_index(self):
+        self.fail_calls("ADL_Adapter_NumberOfAdapters_Get")
+        try:
+            adl_api.ADL_Adapter_NumberOfAdapters_Get(byref(c_int()))
+        except ADLError as error:
+            self.assertEqual((error.code, error.adapter_index), (ADL_ERR, None))
+        else:
+            self.fail("ADL_Adapter_NumberOfAdapters_Get didn't raise")
+
+    def test_invalid_index(self):
+        self.assertRaises(ADLInvalidIndexError, adl_api.ADL_Adapter_ID_Get, 5, byref(c_int()))
+        try:
+            adl_api.ADL_Display_EdidData_Get(0, 9, None)
+        except ADLInvalidIndexError as error:
+            self.assertEqual(error.code, ADL_ERR_INVALID_DIPLAY_IDX)
+        else:
+            self.fail("ADL_Display_EdidData_Get didn't raise")
+
+    def test_warnings_are_returned(self):
+        self.fail_calls("ADL_Adapter_ID_Get", ADL_OK_WARNING)
+        self.assertEqual(adl_api.ADL_Adapter_ID_Get(0, byref(c_int())), ADL_OK_WARNING)
+
+    def test_function_not_found_is_not_supported(self):
+        adl_api.set_library(SimulatedADL(missing=("ADL_Adapter_ID_Get",)))
+        adl_api.ADL_Main_Control_Create(adl_api.ADL_Main_Memory_Alloc, 1)
+        try:
+            adl_api.ADL_Adapter_ID_Get(0, byref(c_int()))
+        except ADLNotSupportedError as error:
+            self.assertTrue(isinstance(error, ADLFunctionNotFoundError))
+            self.assertEqual(error.function, "ADL_Adapter_ID_Get")
+        else:
+            self.fail("ADL_Adapter_ID_Get didn't raise")
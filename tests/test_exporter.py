@@ -0,0 +1,144 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import threading
+import time
+
+try:
+    from urllib.request import ProxyHandler, Request, build_opener
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import HTTPError, ProxyHandler, Request, build_opener
+
+# talk to the test server directly, whatever $http_proxy says
+_opener = build_opener(ProxyHandler({}))
+
+from adl3 import adl_exporter
+from adl3.adl_api import ADLError
+from adl3.adl_exporter import MetricsExporter, OPENMETRICS_CONTENT_TYPE, PROMETHEUS_CONTENT_TYPE, parse_address
+from adl3.adl_snapshot import snapshot
+from adl3.adl_topology import AdapterTopology
+
+from .simulated import SimulatedTestCase
+
+class MetricsExporterTest(SimulatedTestCase):
+    
+    def test_interval_must_be_positive(self):
+        for interval in (0, -1.0):
+            self.assertRaises(ValueError, MetricsExporter, [], interval=interval)
+
+    def test_render(self):
+        exporter = MetricsExporter([0], labels=[{"adapter": "0", "name": "Radeon \"HD\"\n7970"}])
+        text = exporter.render(snapshot([0]), 0.25).decode("utf-8")
+        self.assertIn("# TYPE adl_temperature_celsius gauge\n", text)
+        self.assertIn('adl_temperature_celsius{adapter="0",name="Radeon \\"HD\\"\\n7970"} 65.0\n', text)
+        self.assertIn("adl_sample_duration_seconds 0.250000\n", text)
+        self.assertIn("# TYPE adl_sample_errors_total counter\nadl_sample_errors_total 0\n", text)
+        
+        exporter.errors = 2
+        text = exporter.render(snapshot([0]), 0.25, openmetrics=True).decode("utf-8")
+        self.assertIn("# TYPE adl_sample_errors counter\nadl_sample_errors_total 2\n", text)
+
+    def test_missing_metrics_are_left_out(self):
+        self.fail_calls("ADL_Overdrive5_Temperature_Get")
+        text = MetricsExporter([AdapterTopology()[0]]).render(snapshot([0]), 0.0).decode("utf-8")
+        self.assertIn("# TYPE adl_temperature_celsius gauge\n", text)
+        self.assertNotIn("adl_temperature_celsius{", text)
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address(":9400"), ("", 9400))
+        self.assertEqual(parse_address("127.0.0.1:9100"), ("127.0.0.1", 9100))
+        self.assertEqual(parse_address("[::1]:9100"), ("::1", 9100))
+        for address in ("::1:9100", "localhost", "localhost:http", "[::1]"):
+            self.assertRaises(ValueError, parse_address, address)
+
+class MetricsServerTest(SimulatedTestCase):
+    
+    def setUp(self):
+        SimulatedTestCase.setUp(self)
+        self.exporter = MetricsExporter([AdapterTopology()[0]], interval=0.01)
+        self.server = self.exporter.make_server(("127.0.0.1", 0))
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.01})
+        self.thread.start()
+
+    def tearDown(self):
+        self.exporter.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        SimulatedTestCase.tearDown(self)
+
+    def get(self, path="/metrics", accept=None):
+        request = Request("http://127.0.0.1:%d%s" % (self.server.server_address[1], path))
+        if accept is not None:
+            request.add_header("Accept", accept)
+        try:
+            response = _opener.open(request)
+        except HTTPError as err:
+            response = err
+        try:
+            return response.code, response.headers["Content-Type"], response.read()
+        finally:
+            response.close()
+
+    def wait_for(self, condition):
+        deadline = time.time() + 5.0
+        while not condition():
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.005)
+
+    def test_not_sampled_yet(self):
+        code, content_type, body = self.get()
+        self.assertEqual(code, 503)
+        self.assertEqual(self.get("/")[0], 404)
+
+    def test_content_negotiation(self):
+        self.exporter.start()
+        self.wait_for(lambda: self.exporter.samples > 0)
+        
+        code, content_type, body = self.get()
+        self.assertEqual((code, content_type), (200, PROMETHEUS_CONTENT_TYPE))
+        self.assertIn(b"# TYPE adl_sample_errors_total counter\n", body)
+        self.assertFalse(body.endswith(b"# EOF\n"))
+        
+        code, content_type, body = self.get(accept="application/openmetrics-text; version=1.0.0,text/plain;q=0.5")
+        self.assertEqual((code, content_type), (200, OPENMETRICS_CONTENT_TYPE))
+        self.assertIn(b"# TYPE adl_sample_errors counter\n", body)
+        self.assertTrue(body.endswith(b"# EOF\n"))
+
+    def test_stale_metrics(self):
+        self.exporter.max_age = 0.05
+        self.exporter.start()
+        self.wait_for(lambda: self.exporter.samples > 0)
+        
+        def fail(adapters, out=None):
+            raise ADLError("ADL_Overdrive5_CurrentActivity_Get failed.")
+        adl_exporter.snapshot = fail
+        try:
+            self.wait_for(lambda: self.exporter.errors > 0)
+            self.assertEqual(self.exporter.last_error, "ADL_Overdrive5_CurrentActivity_Get failed.")
+            self.wait_for(lambda: self.get()[0] == 503)
+            self.assertIn(b"Last error: ADL_Overdrive5_CurrentActivity_Get failed.", self.get()[2])
+        finally:
+            adl_exporter.snapshot = snapshot
+        
+        # the thread kept sampling, so the metrics come back
+        self.wait_for(lambda: self.get()[0] == 200)
@@ -0,0 +1,76 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from adl3.adl_api import ADLError
+from adl3.adl_defines import ADL_ERR
+from adl3.adl_fancontrol import FanController, FanCurve
+
+from .simulated import SimulatedTestCase
+
+class FanControllerTest(SimulatedTestCase):
+    
+    num_gpus = 3
+    
+    def fail_for_adapters(self, name, *adapter_indexes):
+        """Makes calls of the ADL function name for the given adapters fail; returns the set
+        of failing adapters, which can be changed later."""
+        failing = set(adapter_indexes)
+        implementation = getattr(self.lib, "_" + name)
+        def call(adapter_index, *args):
+            if adapter_index in failing:
+                return ADL_ERR
+            return implementation(adapter_index, *args)
+        setattr(self.lib, "_" + name, call)
+        return failing
+
+    def test_step(self):
+        controller = FanController(range(3), FanCurve.parse("50:30,85:100"), max_rate=None)
+        # the simulated GPUs are at 65 C
+        self.assertEqual(controller.step(now=0.0), [(0, 65.0, 60), (1, 65.0, 60), (2, 65.0, 60)])
+        self.assertEqual([gpu.fan_percent for gpu in self.lib.gpus], [60, 60, 60])
+        self.assertEqual(controller.step(now=1.0), [])
+        controller.close()
+        self.assertFalse(any(gpu.fan_user_defined for gpu in self.lib.gpus))
+
+    def test_failed_write_doesnt_stop_the_other_adapters(self):
+        failing = self.fail_for_adapters("ADL_Overdrive5_FanSpeed_Set", 1)
+        controller = FanController(range(3), FanCurve.parse("50:30,85:100"), max_rate=None)
+        self.assertEqual([adapter_index for adapter_index, temperature, percent in controller.step(now=0.0)], [0, 2])
+        self.assertEqual(sorted(controller.errors), [1])
+        self.assertTrue(isinstance(controller.errors[1], ADLError))
+        self.assertEqual([gpu.fan_percent for gpu in self.lib.gpus], [60, 30, 60])
+        
+        # the failed write is retried on the next step
+        failing.clear()
+        self.assertEqual(controller.step(now=1.0), [(1, 65.0, 60)])
+        self.assertEqual(controller.errors, {})
+
+    def test_adapter_without_fan_info_is_skipped(self):
+        self.fail_for_adapters("ADL_Overdrive5_FanSpeedInfo_Get", 0)
+        controller = FanController(range(3), FanCurve.parse("50:30,85:100"), max_rate=None)
+        self.assertEqual(len(controller), 2)
+        self.assertEqual(sorted(controller.skipped), [0])
+        self.assertEqual([adapter_index for adapter_index, temperature, percent in controller.step(now=0.0)], [1, 2])
+        self.assertEqual(self.lib.gpus[0].fan_percent, 30)
+
+    def test_period_must_be_positive(self):
+        controller = FanController([0], FanCurve.parse("50:30,85:100"))
+        self.assertRaises(ValueError, controller.run, period=0)
@@ -0,0 +1,84 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import csv
+import io
+import json
+import unittest
+
+from adl3.adl_format import make_writer, status_values, STATUS_FIELDS
+from adl3.adl_snapshot import Snapshot, SNAPSHOT_MISSING
+
+FIELDS = [("adapter", int), ("name", str), ("clock", float)]
+
+RECORDS = [(0, "Radeon, \"HD\" 7970", 925.0), (1, None, 1.5)]
+
+class _Stream(io.StringIO):
+    # the writers build native str on Python 2 and 3
+    def write(self, text):
+        return io.StringIO.write(self, text if isinstance(text, type(u"")) else text.decode("utf-8"))
+
+class RecordWriterTest(unittest.TestCase):
+    
+    def output(self, format, records=RECORDS, fields=FIELDS):
+        stream = _Stream()
+        writer = make_writer(format, stream, fields)
+        writer.write_all(records)
+        writer.close()
+        return stream.getvalue()
+
+    def test_ndjson(self):
+        lines = self.output("ndjson").splitlines()
+        self.assertEqual([json.loads(line) for line in lines],
+                         [{"adapter": 0, "name": "Radeon, \"HD\" 7970", "clock": 925.0},
+                          {"adapter": 1, "name": None, "clock": 1.5}])
+
+    def test_ndjson_fast_path(self):
+        # no strings and no None: one format string for the whole record
+        output = self.output("ndjson", [(2, 0.1)], [("adapter", int), ("clock", float)])
+        self.assertEqual(json.loads(output), {"adapter": 2, "clock": 0.1})
+
+    def test_json(self):
+        self.assertEqual(json.loads(self.output("json")),
+                         [{"adapter": 0, "name": "Radeon, \"HD\" 7970", "clock": 925.0},
+                          {"adapter": 1, "name": None, "clock": 1.5}])
+        self.assertEqual(json.loads(self.output("json", [])), [])
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(self.output("csv"))))
+        self.assertEqual(rows, [["adapter", "name", "clock"],
+                                ["0", "Radeon, \"HD\" 7970", "925.0"],
+                                ["1", "", "1.5"]])
+
+    def test_unknown_format(self):
+        self.assertRaises(ValueError, make_writer, "xml", _Stream(), FIELDS)
+
+class StatusValuesTest(unittest.TestCase):
+    
+    def test_units_and_missing_values(self):
+        status = Snapshot(1)
+        status.timestamp = 1.0
+        for column, value in enumerate([3, 92500, 137500, 1170, 99, 2, 5000, 16, 16,
+                                        SNAPSHOT_MISSING, 1500, 65000, SNAPSHOT_MISSING]):
+            status.data[column] = value
+        values = dict(zip([name for name, kind in STATUS_FIELDS], status_values(status, 0, 0)))
+        self.assertEqual((values["adapter_index"], values["engine_clock"], values["core_voltage"]), (3, 925.0, 1.17))
+        self.assertEqual((values["fan_speed_percent"], values["temperature"], values["powertune"]), (None, 65.0, None))
@@ -0,0 +1,82 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import unittest
+
+from adl3.adl_history import History
+from adl3.adl_snapshot import Snapshot, SNAPSHOT_COLUMNS, SNAPSHOT_MISSING
+
+_TEMPERATURE = SNAPSHOT_COLUMNS.index("temperature")
+
+def _snapshot(timestamp, temperature, adapter_index=0):
+    snapshot = Snapshot(1)
+    snapshot.timestamp = timestamp
+    snapshot.data[0] = adapter_index
+    snapshot.data[_TEMPERATURE] = temperature
+    return snapshot
+
+class HistoryTest(unittest.TestCase):
+    
+    def feed(self, history, samples):
+        for timestamp, temperature in samples:
+            history.append(_snapshot(timestamp, temperature))
+
+    def test_raw_ring_wraps_around(self):
+        history = History(raw_capacity=4, tiers=())
+        self.feed(history, [(float(second), 1000 * second) for second in range(10)])
+        self.assertEqual(history.series(0, "temperature"), [(6.0, 6000), (7.0, 7000), (8.0, 8000), (9.0, 9000)])
+        self.assertEqual(history.window(0, "temperature"), (6000, 9000, 7500.0, 4, 0.0))
+        # memory is fixed when the adapter is first seen
+        nbytes = history.nbytes()
+        self.feed(history, [(float(second), 0) for second in range(10, 100)])
+        self.assertEqual(history.nbytes(), nbytes)
+
+    def test_buckets_roll_up_min_max_mean(self):
+        history = History(raw_capacity=2, tiers=((10.0, 3),))
+        self.feed(history, [(0.0, 10), (5.0, 30), (9.9, 20), (10.0, 50), (15.0, 70)])
+        self.assertEqual(history.series(0, "temperature", resolution=10.0), [(0.0, 20.0), (10.0, 60.0)])
+        self.assertEqual(history.window(0, "temperature", resolution=10.0), (10, 70, 36.0, 5, 10.0))
+
+    def test_bucket_ring_wraps_around(self):
+        history = History(raw_capacity=2, tiers=((10.0, 3),))
+        self.feed(history, [(10.0 * bucket, bucket) for bucket in range(7)])
+        self.assertEqual([start for start, mean in history.series(0, "temperature", resolution=10.0)],
+                         [40.0, 50.0, 60.0])
+
+    def test_window_picks_the_finest_covering_ring(self):
+        history = History(raw_capacity=5, tiers=((10.0, 100),))
+        self.feed(history, [(float(second), second) for second in range(60)])
+        self.assertEqual(history.window(0, "temperature", seconds=3).resolution, 0.0)
+        self.assertEqual(history.window(0, "temperature", seconds=30).resolution, 10.0)
+
+    def test_missing_values_are_skipped(self):
+        history = History(raw_capacity=4, tiers=((10.0, 2),))
+        self.feed(history, [(0.0, SNAPSHOT_MISSING), (1.0, 40)])
+        self.assertEqual(history.window(0, "temperature"), (40, 40, 40.0, 1, 0.0))
+        history = History(raw_capacity=4, tiers=((10.0, 2),))
+        self.feed(history, [(0.0, SNAPSHOT_MISSING)])
+        self.assertEqual(history.window(0, "temperature"), (None, None, None, 0, 0.0))
+        self.assertEqual(history.window(0, "temperature", resolution=10.0), (None, None, None, 0, 10.0))
+
+    def test_clock_stepping_back_stays_in_the_current_bucket(self):
+        history = History(raw_capacity=2, tiers=((10.0, 3),))
+        self.feed(history, [(25.0, 10), (12.0, 20)])
+        self.assertEqual(history.series(0, "temperature", resolution=10.0), [(20.0, 15.0)])
@@ -0,0 +1,94 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import gc
+from ctypes import byref, c_int
+
+from adl3.adl_api import ADL_Display_Modes_Get, ADL_Display_DisplayMapConfig_Get
+from adl3.adl_memory import ADLBuffer, Arena, outstanding_allocations, outstanding_bytes
+from adl3.adl_modes import ModeCatalog, display_map_signature
+from adl3.adl_structures import ADLDisplayMap, ADLDisplayTarget, ADLMode
+
+from .simulated import SimulatedTestCase
+
+class ADLMemoryTest(SimulatedTestCase):
+    
+    num_displays = 2
+    
+    def read_modes(self, buffer):
+        num_modes = c_int()
+        ADL_Display_Modes_Get(0, -1, byref(num_modes), buffer.ref)
+        buffer.count = num_modes.value
+
+    def test_buffer_is_freed_by_with(self):
+        with ADLBuffer(ADLMode) as modes:
+            self.read_modes(modes)
+            self.assertEqual(outstanding_allocations(), 1)
+            self.assertTrue(outstanding_bytes() >= len(modes) > 0)
+        self.assertEqual(outstanding_allocations(), 0)
+        self.assertEqual(outstanding_bytes(), 0)
+        self.assertFalse(modes)
+        self.assertEqual(len(modes), 0)
+
+    def test_arena_release(self):
+        arena = Arena()
+        for cycle in range(2):
+            maps = arena.buffer(ADLDisplayMap)
+            targets = arena.buffer(ADLDisplayTarget)
+            num_maps = c_int()
+            num_targets = c_int()
+            ADL_Display_DisplayMapConfig_Get(0, byref(num_maps), maps.ref, byref(num_targets), targets.ref, 0)
+            self.read_modes(arena.buffer(ADLMode))
+            self.assertEqual(outstanding_allocations(), 3)
+            self.assertEqual(arena.nbytes(), outstanding_bytes())
+            arena.release()
+            self.assertEqual(outstanding_allocations(), 0)
+            self.assertEqual(len(arena), 0)
+
+    def test_arena_with(self):
+        with Arena() as arena:
+            self.read_modes(arena.buffer(ADLMode))
+            self.read_modes(arena.buffer(ADLMode))
+            self.assertEqual(outstanding_allocations(), 2)
+        self.assertEqual(outstanding_allocations(), 0)
+
+    def test_buffer_is_freed_when_collected(self):
+        modes = ADLBuffer(ADLMode)
+        self.read_modes(modes)
+        self.assertEqual(outstanding_allocations(), 1)
+        del modes
+        gc.collect()
+        self.assertEqual(outstanding_allocations(), 0)
+
+    def test_free_twice(self):
+        modes = ADLBuffer(ADLMode)
+        self.read_modes(modes)
+        modes.free()
+        modes.free()
+        self.assertEqual(outstanding_allocations(), 0)
+        self.assertRaises(IndexError, lambda: modes[0])
+
+    def test_mode_catalog_frees_its_buffers(self):
+        catalog = ModeCatalog(0)
+        catalog.refresh_if_changed()
+        display_map_signature(0)
+        self.assertTrue(len(catalog) > 0)
+        self.assertEqual(outstanding_allocations(), 0)
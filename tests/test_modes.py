@@ -0,0 +1,102 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from adl3.adl_modes import ModeCatalog
+from adl3.adl_simulated import SimulatedDisplayMap
+
+from .simulated import SimulatedTestCase
+
+class ModeCatalogTest(SimulatedTestCase):
+    
+    num_displays = 2
+    
+    def setUp(self):
+        SimulatedTestCase.setUp(self)
+        display = self.lib.gpus[0].displays[0]
+        display.modes = [(1920, 1080, 50.0, 32), (1920, 1080, 60.0, 32), (1920, 1080, 60.0, 16), (1920, 1080, 70.0, 32),
+                         (1920, 1080, 60.0, 32), (1280, 720, 60.0, 32)]
+        self.catalog = ModeCatalog(0)
+
+    def test_load(self):
+        self.assertEqual(self.catalog.displays(), [0, 1])
+        # the duplicate 1920x1080@60 is kept once
+        self.assertEqual(len(self.catalog.modes(0)), 5)
+        self.assertEqual(self.catalog.resolutions(0), [(1280, 720), (1920, 1080)])
+        self.assertEqual([mode.refresh_rate for mode in self.catalog.with_resolution(0, 1920, 1080)],
+                         [50.0, 60.0, 60.0, 70.0])
+        self.assertEqual(self.catalog.modes(7), [])
+
+    def test_find(self):
+        find = self.catalog.find
+        self.assertEqual(find(0, 1920, 1080)[3:5], (70.0, 32))
+        self.assertEqual(find(0, 1920, 1080, 61.0)[3:5], (60.0, 32))
+        self.assertEqual(find(0, 1920, 1080, 55.0)[3:5], (60.0, 32))
+        # 65 is as close to 60 as to 70; ties go to the higher rate
+        self.assertEqual(find(0, 1920, 1080, 65.0)[3:5], (70.0, 32))
+        self.assertEqual(find(0, 1920, 1080, 1000.0)[3:5], (70.0, 32))
+        self.assertEqual(find(0, 1920, 1080, 0.0)[3:5], (50.0, 32))
+
+    def test_find_colour_depth(self):
+        find = self.catalog.find
+        self.assertEqual(find(0, 1920, 1080, 60.0, 16)[3:5], (60.0, 16))
+        # a depth the rate doesn't have falls back to the deepest
+        self.assertEqual(find(0, 1920, 1080, 60.0, 24)[3:5], (60.0, 32))
+        self.assertEqual(find(0, 1920, 1080, 50.0, 16)[3:5], (50.0, 32))
+
+    def test_find_missing(self):
+        self.assertEqual(self.catalog.find(0, 1024, 768), None)
+        self.assertEqual(self.catalog.find(7, 1920, 1080), None)
+
+    def test_with_refresh_rate(self):
+        rates = lambda modes: sorted(mode.refresh_rate for mode in modes)
+        self.assertEqual(rates(self.catalog.with_refresh_rate(0, 60.0)), [60.0, 60.0, 60.0])
+        self.assertEqual(rates(self.catalog.with_refresh_rate(0, 59.6)), [60.0, 60.0, 60.0])
+        self.assertEqual(rates(self.catalog.with_refresh_rate(0, 59.0)), [])
+        self.assertEqual(rates(self.catalog.with_refresh_rate(0, 55.0, tolerance=5.0)), [50.0, 60.0, 60.0, 60.0])
+
+    def test_with_colour_depth(self):
+        self.assertEqual([mode[1:5] for mode in self.catalog.with_colour_depth(0, 16)], [(1920, 1080, 60.0, 16)])
+        self.assertEqual(self.catalog.with_colour_depth(0, 8), [])
+
+    def test_refresh_if_changed(self):
+        self.assertFalse(self.catalog.refresh_if_changed())
+        
+        gpu = self.lib.gpus[0]
+        gpu.displays[0].modes.append((2560, 1440, 60.0, 32))
+        # new modes alone don't change the display map
+        self.assertFalse(self.catalog.refresh_if_changed())
+        
+        gpu.display_maps[0] = SimulatedDisplayMap((2560, 1440, 60.0, 32), [0])
+        self.assertTrue(self.catalog.refresh_if_changed())
+        self.assertEqual(self.catalog.find(0, 2560, 1440)[3], 60.0)
+        self.assertFalse(self.catalog.refresh_if_changed())
+
+    def test_single_precision_rates(self):
+        # ADL reports refresh rates as floats; 59.94 is stored as 59.939998626...
+        self.lib.gpus[0].displays[1].modes = [(1920, 1080, 59.94, 32), (1920, 1080, 60.0, 32), (1920, 1080, 50.0, 32)]
+        self.catalog.refresh()
+        rates = lambda modes: [round(mode.refresh_rate, 2) for mode in modes]
+        self.assertEqual(rates(self.catalog.with_refresh_rate(1, 59.94, tolerance=0.0)), [59.94])
+        self.assertEqual(rates(self.catalog.with_refresh_rate(1, 60.0, tolerance=0.06)), [59.94, 60.0])
+        self.assertEqual(rates(self.catalog.with_refresh_rate(1, 60.0, tolerance=0.05)), [60.0])
+        self.assertEqual(round(self.catalog.find(1, 1920, 1080, 59.94).refresh_rate, 2), 59.94)
+        self.assertEqual(round(self.catalog.find(1, 1920, 1080, 59.97).refresh_rate, 2), 60.0)
+        self.assertEqual(self.catalog.find(1, 1920, 1080).refresh_rate, 60.0)
@@ -0,0 +1,59 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import unittest
+
+from adl3.adl_sampler import LOCK_ADAPTER, LOCK_GLOBAL, LOCK_NONE, Sampler, ThreadPoolExecutor
+
+from .simulated import CallOverlap, SimulatedTestCase, run_concurrently
+
+@unittest.skipIf(ThreadPoolExecutor is None, "Sampler needs concurrent.futures")
+class SamplerTest(SimulatedTestCase):
+    
+    num_gpus = 4
+    
+    def setUp(self):
+        SimulatedTestCase.setUp(self)
+        self.overlap = CallOverlap(self.lib._ADL_Overdrive5_Temperature_Get)
+        self.lib._ADL_Overdrive5_Temperature_Get = self.overlap
+
+    def test_sweep(self):
+        with Sampler(range(4)) as sampler:
+            sweep = sampler.sweep()
+        self.assertEqual(list(sweep.snapshot.column("temperature")), [65000] * 4)
+        self.assertTrue(all(latency > 0 for latency in sweep.latencies))
+
+    def test_global_lock_serializes_all_calls(self):
+        with Sampler(range(4), lock_policy=LOCK_GLOBAL) as sampler:
+            sampler.sweep()
+        self.assertEqual(self.overlap.max_total, 1)
+
+    def test_adapter_lock_overlaps_adapters_but_not_an_adapter(self):
+        with Sampler(range(4), lock_policy=LOCK_ADAPTER) as first:
+            with Sampler(range(4), lock_policy=LOCK_ADAPTER) as second:
+                run_concurrently(first.sweep, second.sweep)
+        self.assertGreater(self.overlap.max_total, 1)
+        self.assertEqual(self.overlap.max_per_adapter, 1)
+
+    def test_no_lock_overlaps_adapters(self):
+        with Sampler(range(4), lock_policy=LOCK_NONE) as sampler:
+            sampler.sweep()
+        self.assertGreater(self.overlap.max_total, 1)
@@ -0,0 +1,62 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import time
+
+from adl3.adl_defines import ADL_ERR_NOT_SUPPORTED
+from adl3.adl_api import ADLError, ADLNotSupportedError
+from adl3.adl_scheduler import Scheduler, _clock
+
+from .simulated import SimulatedTestCase
+
+class SchedulerTest(SimulatedTestCase):
+    
+    def test_static_source_recovers_from_transient_error(self):
+        scheduler = Scheduler([0], error_ttl=0.01)
+        self.fail_calls("ADL_Overdrive5_ODParameters_Get")
+        self.assertRaises(ADLError, scheduler.get, 0, "od_parameters")
+        
+        del self.lib.failures["ADL_Overdrive5_ODParameters_Get"]
+        time.sleep(0.02)
+        self.assertEqual(scheduler.get(0, "od_parameters").iNumberOfPerformanceLevels, 3)
+        # and now the value is cached for good
+        calls = self.lib.calls["ADL_Overdrive5_ODParameters_Get"]
+        scheduler.get(0, "od_parameters")
+        self.assertEqual(self.lib.calls["ADL_Overdrive5_ODParameters_Get"], calls)
+
+    def test_not_supported_is_cached(self):
+        scheduler = Scheduler([0], error_ttl=0.0)
+        self.fail_calls("ADL_Overdrive5_ODParameters_Get", ADL_ERR_NOT_SUPPORTED)
+        self.assertRaises(ADLNotSupportedError, scheduler.get, 0, "od_parameters")
+        self.assertRaises(ADLNotSupportedError, scheduler.get, 0, "od_parameters")
+        self.assertEqual(self.lib.calls["ADL_Overdrive5_ODParameters_Get"], 1)
+
+    def test_invalidate_resumes_unsupported_source(self):
+        scheduler = Scheduler([0])
+        self.fail_calls("ADL_Overdrive5_PowerControl_Get", ADL_ERR_NOT_SUPPORTED)
+        now = _clock()
+        self.assertIn((0, "power_control"), scheduler.poll(now + 60))
+        self.assertNotIn((0, "power_control"), scheduler.poll(now + 120))
+        
+        del self.lib.failures["ADL_Overdrive5_PowerControl_Get"]
+        scheduler.invalidate(0, "power_control")
+        self.assertIn((0, "power_control"), scheduler.poll(now + 180))
+        self.assertEqual(scheduler.get(0, "power_control"), (0, 0))
@@ -0,0 +1,93 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import os
+import unittest
+from ctypes import byref, c_int
+
+from adl3 import adl_api
+from adl3.adl_defines import ADL_ERR, ADL_ERR_NOT_INIT, ADL_ERR_NOT_SUPPORTED, ADL_OK
+from adl3.adl_simulated import SimulatedADL
+
+def _number_of_adapters():
+    num_adapters = c_int()
+    adl_api.ADL_Adapter_NumberOfAdapters_Get(byref(num_adapters))
+    return num_adapters.value
+
+class SimulatedADLTest(unittest.TestCase):
+    # calls the simulator's functions directly, so they return the raw ADL status codes
+    
+    def test_calls_before_create_are_not_initialized(self):
+        lib = SimulatedADL(2)
+        num_adapters = c_int()
+        self.assertEqual(lib.ADL_Adapter_NumberOfAdapters_Get(byref(num_adapters)), ADL_ERR_NOT_INIT)
+        self.assertEqual(lib.ADL_Main_Control_Create(adl_api.ADL_Main_Memory_Alloc, 1), ADL_OK)
+        self.assertEqual(lib.ADL_Adapter_NumberOfAdapters_Get(byref(num_adapters)), ADL_OK)
+        self.assertEqual(num_adapters.value, 2)
+        self.assertEqual(lib.calls["ADL_Adapter_NumberOfAdapters_Get"], 2)
+        lib.ADL_Main_Control_Destroy()
+
+    def test_logical_adapters(self):
+        lib = SimulatedADL(2, logical_adapters_per_gpu=3)
+        lib.ADL_Main_Control_Create(adl_api.ADL_Main_Memory_Alloc, 1)
+        num_adapters = c_int()
+        lib.ADL_Adapter_NumberOfAdapters_Get(byref(num_adapters))
+        self.assertEqual(num_adapters.value, 6)
+        lib.ADL_Main_Control_Destroy()
+
+    def test_failures(self):
+        lib = SimulatedADL(failures={"ADL_Adapter_NumberOfAdapters_Get": (1.0, ADL_ERR_NOT_SUPPORTED),
+                                     "ADL_Adapter_ID_Get": 1.0}, seed=0)
+        lib.ADL_Main_Control_Create(adl_api.ADL_Main_Memory_Alloc, 1)
+        value = c_int()
+        self.assertEqual(lib.ADL_Adapter_NumberOfAdapters_Get(byref(value)), ADL_ERR_NOT_SUPPORTED)
+        self.assertEqual(lib.ADL_Adapter_ID_Get(0, byref(value)), ADL_ERR)
+        lib.ADL_Main_Control_Destroy()
+
+    def test_missing(self):
+        lib = SimulatedADL(missing=("ADL_Adapter_ID_Get",))
+        self.assertFalse(hasattr(lib, "ADL_Adapter_ID_Get"))
+        self.assertTrue(hasattr(lib, "ADL_Adapter_Active_Get"))
+        self.assertFalse(hasattr(lib, "ADL_Not_A_Function"))
+
+    def test_from_environment(self):
+        saved = dict(os.environ)
+        try:
+            os.environ["ADL3_SIMULATED_GPUS"] = "3"
+            os.environ["ADL3_SIMULATED_FAILURE_RATE"] = "0.5"
+            lib = SimulatedADL.from_environment()
+        finally:
+            os.environ.clear()
+            os.environ.update(saved)
+        self.assertEqual(len(lib.gpus), 3)
+        self.assertEqual(lib.failures["ADL_Adapter_ID_Get"], 0.5)
+        self.assertFalse("ADL_Main_Control_Create" in lib.failures)
+
+class SetLibraryTest(unittest.TestCase):
+    
+    def tearDown(self):
+        adl_api.ADL_Main_Control_Destroy()
+
+    def test_simulated_by_name(self):
+        adl_api.set_library("simulated")
+        self.assertTrue(isinstance(adl_api.get_library(), SimulatedADL))
+        adl_api.ADL_Main_Control_Create(adl_api.ADL_Main_Memory_Alloc, 1)
+        self.assertEqual(_number_of_adapters(), len(adl_api.get_library().gpus))
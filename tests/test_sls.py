@@ -0,0 +1,83 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from adl3.adl_api import ADLNotSupportedError
+from adl3.adl_memory import outstanding_bytes
+from adl3.adl_sls import SLSEngine, SLSLayout
+
+from .simulated import SimulatedTestCase
+
+class SLSLayoutTest(SimulatedTestCase):
+    
+    def test_parse(self):
+        layout = SLSLayout.parse("2x3:0,1,2,3,4,5 rotate=90 bezel=64,48")
+        self.assertEqual((layout.rows, layout.columns, layout.orientation, layout.bezel), (2, 3, 90, (64, 48)))
+        self.assertEqual(layout.positions()[4], (1, 1))
+        self.assertRaises(ValueError, SLSLayout.parse, "2x2:0,1,2")
+        self.assertRaises(ValueError, SLSLayout.parse, "1x2:0,0")
+
+    def test_offsets_are_rounded_to_the_step(self):
+        layout = SLSLayout.parse("1x3:0,1,2 bezel=65,0")
+        self.assertEqual(layout.offsets((4, 2)), ((0, 0, 0), (1, 64, 0), (2, 132, 0)))
+
+class SLSEngineTest(SimulatedTestCase):
+    
+    num_displays = 6
+    
+    def setUp(self):
+        SimulatedTestCase.setUp(self)
+        self.gpu = self.lib.gpus[0]
+        self.engine = SLSEngine(0)
+
+    def assert_matches_driver(self, config):
+        self.assertEqual(SLSEngine(0).maps()[config.index], config)
+
+    def test_create_resets_desktop_once(self):
+        config = self.engine.apply("2x3:0,1,2,3,4,5 bezel=64,48")
+        self.assertTrue(config.active)
+        self.assertEqual(self.gpu.desktop_resets, 1)
+        self.assertEqual(self.lib.calls["ADL_Display_SLSMapConfig_SetState"], 1)
+        self.assert_matches_driver(config)
+        self.assertEqual(outstanding_bytes(), 0)
+
+    def test_reapplying_makes_no_calls(self):
+        self.engine.apply("2x3:0,1,2,3,4,5 bezel=64,48")
+        calls = dict(self.lib.calls)
+        self.engine.apply("2x3:0,1,2,3,4,5 bezel=64,48")
+        self.assertEqual(self.lib.calls, calls)
+
+    def test_rearrange_recomputes_offsets(self):
+        self.engine.apply("3x2:5,4,3,2,1,0 bezel=64,48")
+        config = self.engine.apply("2x3:0,1,2,3,4,5 bezel=64,48")
+        self.assertEqual(self.gpu.sls_maps[config.index].offsets[4], (64, 48))
+        self.assert_matches_driver(config)
+
+    def test_rearrange_without_bezel_clears_offsets(self):
+        self.engine.apply("3x2:5,4,3,2,1,0 bezel=64,48")
+        resets = self.gpu.desktop_resets
+        config = self.engine.apply("2x3:0,1,2,3,4,5")
+        self.assertEqual(config.offsets, ())
+        self.assertEqual(self.gpu.sls_maps[config.index].offsets, {})
+        self.assertEqual(self.gpu.desktop_resets, resets + 1)
+        self.assert_matches_driver(config)
+
+    def test_unsupported_grid(self):
+        self.assertRaises(ADLNotSupportedError, self.engine.apply, "3x3:0,1,2,3,4,5,6,7,8")
@@ -0,0 +1,44 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import unittest
+
+from adl3.adl_snapshot import snapshot
+from adl3.adl_sampler import LOCK_NONE, Sampler, ThreadPoolExecutor
+
+from .simulated import CallOverlap, SimulatedTestCase, run_concurrently
+
+class SnapshotTest(SimulatedTestCase):
+    
+    num_gpus = 4
+    
+    def test_snapshot(self):
+        result = snapshot(range(4))
+        self.assertEqual(list(result.column("temperature")), [65000] * 4)
+
+    @unittest.skipIf(ThreadPoolExecutor is None, "Sampler needs concurrent.futures")
+    def test_snapshot_and_sampler_share_buffers_safely(self):
+        overlap = CallOverlap(self.lib._ADL_Overdrive5_Temperature_Get)
+        self.lib._ADL_Overdrive5_Temperature_Get = overlap
+        # both fill the same per-adapter structures, whatever the sampler's lock policy
+        with Sampler(range(4), lock_policy=LOCK_NONE) as sampler:
+            run_concurrently(sampler.sweep, lambda: snapshot(range(4)))
+        self.assertEqual(overlap.max_per_adapter, 1)
@@ -0,0 +1,65 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from ctypes import addressof, sizeof, string_at
+
+from adl3.adl_overdrive import get_current_activity, get_power_control, get_temperature, set_fan_speed
+from adl3.adl_structures import ADLODParameters, ADLPMActivity, StructurePool, as_memoryview
+
+from .simulated import SimulatedTestCase
+
+class StructureTest(SimulatedTestCase):
+    
+    def test_as_memoryview(self):
+        structure = ADLODParameters()
+        structure.iSize = sizeof(structure)
+        structure.sEngineClock.iMax = 123456
+        view = as_memoryview(structure)
+        self.assertEqual(len(view), sizeof(structure))
+        self.assertEqual(view.tobytes(), string_at(addressof(structure), sizeof(structure)))
+        
+        # not a copy
+        structure.iActivityReportingSupported = 1
+        self.assertEqual(view.tobytes(), string_at(addressof(structure), sizeof(structure)))
+        view[0:4] = b"\0\0\0\0"
+        self.assertEqual(structure.iSize, 0)
+
+    def test_pool_slots(self):
+        pool = StructurePool()
+        activity, activity_ref = pool.slot(0, ADLPMActivity)
+        self.assertEqual(activity.iSize, sizeof(ADLPMActivity))
+        self.assertTrue(pool.slot(0, ADLPMActivity)[0] is activity)
+        self.assertFalse(pool.slot(1, ADLPMActivity)[0] is activity)
+        self.assertFalse(pool.slot(0, ADLPMActivity, "other")[0] is activity)
+        pool.clear(0)
+        self.assertFalse(pool.slot(0, ADLPMActivity)[0] is activity)
+
+    def test_overdrive_getters_reuse_pooled_structures(self):
+        pool = StructurePool()
+        activity = get_current_activity(0, pool=pool)
+        self.assertTrue(get_current_activity(0, pool=pool) is activity)
+        self.assertFalse(get_current_activity(0) is activity)
+        self.assertEqual(activity.iEngineClock, get_current_activity(0).iEngineClock)
+        
+        self.assertEqual(get_temperature(0, pool=pool), get_temperature(0))
+        self.assertEqual(get_power_control(0, pool=pool), get_power_control(0))
+        set_fan_speed(0, 70, pool=pool)
+        self.assertEqual(self.lib.gpus[0].fan_percent, 70)
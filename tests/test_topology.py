@@ -0,0 +1,68 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from adl3.adl_simulated import SimulatedGPU
+from adl3.adl_topology import AdapterTopology
+
+from .simulated import SimulatedTestCase
+
+class AdapterTopologyTest(SimulatedTestCase):
+    
+    num_gpus = 2
+    
+    def setUp(self):
+        SimulatedTestCase.setUp(self)
+        self.lib.logical_adapters_per_gpu = 2
+
+    def test_first_controller_of_each_gpu(self):
+        topology = AdapterTopology()
+        self.assertEqual([info.iAdapterIndex for info in topology], [0, 2])
+        self.assertEqual(topology.adapter_ids, [0x1000, 0x1001])
+        self.assertEqual(topology.find(0x1001).iBusNumber, 2)
+        self.assertEqual(topology.find(0x2000), None)
+
+    def test_unchanged(self):
+        topology = AdapterTopology()
+        self.assertFalse(topology.changed())
+        self.assertFalse(topology.refresh_if_changed())
+        self.assertEqual(topology.generation, 1)
+
+    def test_added_gpu(self):
+        topology = AdapterTopology()
+        self.lib.gpus.append(SimulatedGPU(2))
+        self.assertTrue(topology.changed())
+        self.assertTrue(topology.refresh_if_changed())
+        self.assertEqual((len(topology), topology.generation), (3, 2))
+        self.assertFalse(topology.changed())
+
+    def test_swapped_gpu_with_the_same_count(self):
+        topology = AdapterTopology()
+        calls = self.lib.calls["ADL_Adapter_AdapterInfo_Get"]
+        self.assertFalse(topology.changed())
+        self.assertEqual(self.lib.calls["ADL_Adapter_AdapterInfo_Get"], calls + 1)
+        
+        # a different card in another slot: same number of adapters, different UDID and bus
+        gpu = SimulatedGPU(5)
+        gpu.adapter_id = 0x1001
+        self.lib.gpus[1] = gpu
+        self.assertTrue(topology.changed())
+        self.assertTrue(topology.refresh_if_changed())
+        self.assertEqual(topology.find(0x1001).iBusNumber, 6)
@@ -0,0 +1,91 @@
+# Copyright (C) 2011 by Mark Visser <mjmvisser@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from adl3.adl_transaction import ADLTransactionError, StateCache, Transaction, apply_desired_state
+
+from .simulated import SimulatedTestCase
+
+class TransactionTest(SimulatedTestCase):
+    
+    num_gpus = 2
+    
+    def test_commit(self):
+        transaction = Transaction()
+        transaction.set_performance_level(0, 2, engine_clock=95000)
+        transaction.set_fan_speed(1, 60)
+        transaction.set_powertune(1, 10)
+        self.assertEqual(transaction.commit(), [0, 1])
+        self.assertEqual(self.lib.gpus[0].levels[2], (95000, 137500, 1170))
+        self.assertEqual((self.lib.gpus[1].fan_percent, self.lib.gpus[1].powertune), (60, 10))
+
+    def test_failed_adapter_rolls_back_the_others(self):
+        transaction = Transaction()
+        transaction.set_performance_level(0, 2, engine_clock=95000, vddc=1200)
+        transaction.set_fan_speed(0, 80)
+        transaction.set_powertune(0, 10)
+        # out of the driver's range, so applying it fails
+        transaction.set_powertune(1, 50)
+        
+        try:
+            transaction.commit()
+        except ADLTransactionError as err:
+            self.assertEqual(sorted(err.failures), [1])
+            self.assertEqual(err.rollback_failures, {})
+        else:
+            self.fail("commit() should have failed")
+        
+        gpu = self.lib.gpus[0]
+        self.assertEqual(gpu.levels, gpu.default_levels)
+        self.assertEqual(gpu.powertune, 0)
+        self.assertFalse(gpu.fan_user_defined)
+        self.assertEqual(self.lib.gpus[1].powertune, 0)
+
+    def test_invalid_level_fails_before_any_change(self):
+        transaction = Transaction()
+        transaction.set_powertune(0, 10)
+        transaction.set_performance_level(1, 7, engine_clock=95000)
+        self.assertRaises(ADLTransactionError, transaction.commit)
+        self.assertNotIn("ADL_Overdrive5_PowerControl_Set", self.lib.calls)
+
+class DesiredStateTest(SimulatedTestCase):
+    
+    num_gpus = 2
+    
+    def test_only_differences_are_written(self):
+        cache = StateCache()
+        desired = {0: {"levels": {2: (92500, 137500, 1170)}, "powertune": 0},
+                   1: {"levels": {2: (95000, None, None)}, "powertune": 5}}
+        changes = apply_desired_state(desired, cache=cache)
+        self.assertEqual(sorted((change.adapter_index, change.name) for change in changes),
+                         [(1, "engine_clock"), (1, "powertune")])
+        self.assertEqual(self.lib.calls["ADL_Overdrive5_PowerControl_Set"], 1)
+        
+        # in the desired state, and the cache knows it: no reads, no writes
+        calls = dict(self.lib.calls)
+        self.assertEqual(apply_desired_state(desired, cache=cache), [])
+        self.assertEqual(self.lib.calls, calls)
+
+    def test_failure_invalidates_the_cache(self):
+        cache = StateCache()
+        desired = {0: {"powertune": 10}, 1: {"powertune": 50}}
+        self.assertRaises(ADLTransactionError, apply_desired_state, desired, cache=cache)
+        self.assertEqual([gpu.powertune for gpu in self.lib.gpus], [0, 0])
+        self.assertEqual(cache.get(0).powertune, None)